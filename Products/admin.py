@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db.models import Q
+from Zentoria.admin import EstimatedCountPaginator
 from .models import Category, Style, Product, FavouriteProduct,\
     ProductReview, SubCategory, Size, Color
 
@@ -12,13 +14,26 @@ class CategoryAdmin(admin.ModelAdmin):
 class SubCategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'parent_category']
     list_filter = ['parent_category']
+    list_select_related = ['parent_category']
     search_fields = ['name']
 
 
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'price', 'quantity', 'category']
     list_filter = ['subcategory__name']
-    search_fields = ['name', 'description']
+    list_select_related = ['category']
+    search_fields = ['name', 'style_code']
+    search_help_text = "Beginning of the product name or an exact style code."
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # The whole term as one case-insensitive prefix, answered on PostgreSQL by the UPPER(name) index, and an
+        # exact style code. The default substring match on name and description read every row.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(Q(name__istartswith=search_term) | Q(style_code=search_term)), False
 
 
 class StyleAdmin(admin.ModelAdmin):
@@ -37,12 +52,22 @@ class ColorAdmin(admin.ModelAdmin):
 
 class FavouriteProductAdmin(admin.ModelAdmin):
     list_display = ['product']
+    list_select_related = ['product']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ProductReviewAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'rating', 'review_date']
+    list_select_related = ['product', 'user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(FavouriteProduct, FavouriteProductAdmin)
 admin.site.register(Product, ProductAdmin)
 admin.site.register(SubCategory, SubCategoryAdmin)
 admin.site.register(Category, CategoryAdmin)
-admin.site.register(ProductReview)
+admin.site.register(ProductReview, ProductReviewAdmin)
 admin.site.register(Style, StyleAdmin)
 
@@ -0,0 +1,115 @@
+import json
+import weakref
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from Zentoria.routers import primary_database
+from .images import available_formats, derivative_url
+from .models import Product, ProductCard
+
+# Columns a card reads, so rebuilding one never loads descriptions or specifications.
+CARD_FIELDS = ['id', 'name', 'price', 'quantity', 'image', 'image_digest', 'style__style']
+
+
+def card_thumbnail(product):
+    if product.image_digest and settings.PRODUCT_CARD_THUMBNAIL_FORMAT in available_formats():
+        return derivative_url(product.image_digest, settings.PRODUCT_CARD_THUMBNAIL_WIDTH,
+                              settings.PRODUCT_CARD_THUMBNAIL_FORMAT)
+    return product.image.url if product.image else None
+
+
+def card_document(product):
+    try:
+        summary = product.rating_summary
+    except ObjectDoesNotExist:
+        summary = None
+    return {
+        'id': str(product.id),
+        'name': product.name,
+        'price': float(product.price),
+        'thumbnail': card_thumbnail(product),
+        'style': product.style.style if product.style else None,
+        'colors': [color.name for color in product.available_colors.all()],
+        'sizes': [size.name for size in product.available_sizes.all()],
+        'rating': {
+            'average': round(summary.average_rating, 2) if summary else 0,
+            'count': summary.total_reviews if summary else 0,
+        },
+        'in_stock': product.quantity > 0,
+    }
+
+
+def encode_card(product):
+    return json.dumps(card_document(product), separators=(',', ':'))
+
+
+def rebuild_product_cards(product_ids, batch_size=500):
+    """
+    Re-encode the cards of ``product_ids`` and store them, ``batch_size`` products per round.
+
+    Ids of products that no longer exist are skipped. Returns ``{product_id: document}``.
+    """
+    product_ids = list(product_ids)
+    documents = {}
+    with primary_database():
+        for start in range(0, len(product_ids), batch_size):
+            products = (
+                Product.objects.filter(pk__in=product_ids[start:start + batch_size])
+                .select_related('style', 'rating_summary')
+                .prefetch_related('available_colors', 'available_sizes')
+                .only(*CARD_FIELDS)
+            )
+            cards = [ProductCard(product_id=product.id, document=encode_card(product)) for product in products]
+            ProductCard.objects.bulk_create(
+                cards, update_conflicts=True, unique_fields=['product'], update_fields=['document', 'updated_at'],
+            )
+            documents.update((card.product_id, card.document) for card in cards)
+    return documents
+
+
+class PendingCardRebuild:
+    # One per transaction: the signals of a bulk edit add their ids here and the cards are rebuilt once.
+    def __init__(self):
+        self.product_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        rebuild_product_cards(self.product_ids)
+
+
+def schedule_card_rebuild(product_ids, using=None):
+    """
+    Rebuild the cards of ``product_ids`` once the current transaction commits, or now outside one.
+
+    Every call in the same transaction shares a single rebuild, which the connection only holds weakly:
+    on rollback Django drops the ``on_commit`` callback, so the rebuild and its ids go with it and the next
+    call starts a new one.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        rebuild_product_cards(product_ids)
+        return
+    reference = getattr(connection, 'pending_card_rebuild', None)
+    pending = reference() if reference else None
+    if pending is None or pending.done:
+        pending = PendingCardRebuild()
+        connection.pending_card_rebuild = weakref.ref(pending)
+        transaction.on_commit(pending, using=using)
+    pending.product_ids.update(product_ids)
+
+
+def get_card_documents(products):
+    """
+    The encoded cards of ``products`` in queryset order, fetched with one joined query.
+
+    Cards missing from the table (products written by raw SQL or before it existed) are built on the spot.
+    """
+    rows = list(products.values_list('id', 'card__document'))
+    built = rebuild_product_cards([product_id for product_id, document in rows if document is None])
+    return [document or built[product_id] for product_id, document in rows if document or product_id in built]
+
+
+def encode_card_list(documents):
+    return '[' + ','.join(documents) + ']'
@@ -0,0 +1,280 @@
+import csv
+import json
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from imaging import file_digest
+from .cards import schedule_card_rebuild
+from .models import Category, Color, Product, Size, Style, SubCategory
+from .style_codes import STYLE_CODE_LENGTH, bulk_create_products
+
+# Columns a row must fill to create a product; rows for existing products may leave any of them blank.
+REQUIRED_COLUMNS = ['name', 'price', 'category', 'image']
+
+
+class CatalogImportError(ValueError):
+    pass
+
+
+def read_rows(path, fmt=None):
+    """
+    Stream ``(line, row)`` pairs from a CSV file with a header row or from newline-delimited JSON.
+    An NDJSON line that does not parse is yielded as ``None``.
+    """
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as file:
+        if fmt == 'csv':
+            yield from enumerate(csv.DictReader(file), start=2)
+            return
+        for line, text in enumerate(file, start=1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except json.JSONDecodeError:
+                yield line, None
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def split_values(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace('|', ',').split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class CatalogLookups:
+    """
+    Names of categories, subcategories, styles, sizes and colors mapped to ids, loaded once per import.
+
+    Unknown categories, subcategories and styles are created when ``create_missing`` is set. Sizes and
+    colors are fixed choice lists and must already exist.
+    """
+
+    def __init__(self, create_missing=False):
+        self.create_missing = create_missing
+        self.categories = {name.lower(): pk for pk, name in Category.objects.order_by('-id').values_list('id', 'name')}
+        self.subcategories = {
+            (parent_id, name.lower()): pk
+            for pk, parent_id, name in SubCategory.objects.values_list('id', 'parent_category_id', 'name')
+        }
+        self.styles = {name.lower(): pk for pk, name in Style.objects.values_list('id', 'style')}
+        self.sizes = {name.lower(): pk for pk, name in Size.objects.values_list('id', 'name')}
+        self.colors = {name.lower(): pk for pk, name in Color.objects.values_list('id', 'name')}
+        self.image_digests = {}
+
+    def category(self, name):
+        if not name:
+            raise CatalogImportError("category is required")
+        key = name.strip().lower()
+        if key not in self.categories:
+            if not self.create_missing:
+                raise CatalogImportError(f"unknown category '{name}'")
+            self.categories[key] = Category.objects.create(name=name.strip()).pk
+        return self.categories[key]
+
+    def subcategory(self, category_id, name):
+        if not name:
+            return None
+        key = (category_id, name.strip().lower())
+        if key not in self.subcategories:
+            if not self.create_missing:
+                raise CatalogImportError(f"unknown subcategory '{name}'")
+            self.subcategories[key] = SubCategory.objects.create(name=name.strip(), parent_category_id=category_id).pk
+        return self.subcategories[key]
+
+    def style(self, name):
+        if not name:
+            return None
+        key = name.strip().lower()
+        if key not in self.styles:
+            if not self.create_missing:
+                raise CatalogImportError(f"unknown style '{name}'")
+            self.styles[key] = Style.objects.create(style=name.strip()).pk
+        return self.styles[key]
+
+    def image_digest(self, name):
+        # Images are expected to be in media storage already; many rows often share one file.
+        if name not in self.image_digests:
+            self.image_digests[name] = ''
+            if name and default_storage.exists(name):
+                with default_storage.open(name, 'rb') as file:
+                    self.image_digests[name] = file_digest(file)
+        return self.image_digests[name]
+
+    def choices(self, mapping, kind, values):
+        ids = []
+        for value in split_values(values):
+            if value.lower() not in mapping:
+                raise CatalogImportError(f"unknown {kind} '{value}'")
+            ids.append(mapping[value.lower()])
+        return ids
+
+
+def present_columns(row):
+    """
+    The columns of ``row`` with a value; a blank CSV cell counts as absent, like a missing NDJSON key.
+    """
+    return {column for column, value in row.items() if value is not None and str(value).strip()}
+
+
+def row_style_code(row):
+    if not isinstance(row, dict):
+        return None
+    return str(row.get('style_code') or '').strip() or None
+
+
+def build_product(row, lookups, existing_id=None):
+    """
+    Validate one row and return ``(product, fields, size_ids, color_ids)``; the product is not saved.
+
+    A row for a new product must fill ``REQUIRED_COLUMNS``. A row for an existing product (``existing_id``)
+    only changes the columns it fills: ``fields`` names the model fields to update, and the size or color
+    ids are ``None`` when that column is blank, leaving the product's links alone.
+    """
+    if not isinstance(row, dict):
+        raise CatalogImportError("row is not a JSON object")
+
+    columns = present_columns(row)
+    if existing_id is None:
+        for column in REQUIRED_COLUMNS:
+            if column not in columns:
+                raise CatalogImportError(f"{column} is required")
+
+    style_code = row_style_code(row)
+    if style_code and len(style_code) > STYLE_CODE_LENGTH:
+        raise CatalogImportError(f"style_code is longer than {STYLE_CODE_LENGTH} characters")
+
+    product = Product(id=existing_id, description='', quantity=0, style_code=style_code)
+    fields = []
+    if 'name' in columns:
+        product.name = str(row['name']).strip()
+        if len(product.name) > 100:
+            raise CatalogImportError("name is longer than 100 characters")
+        fields.append('name')
+    if 'description' in columns:
+        product.description = row['description']
+        fields.append('description')
+    if 'price' in columns:
+        try:
+            product.price = Decimal(str(row['price']))
+        except InvalidOperation:
+            raise CatalogImportError("price must be a number")
+        if not product.price.is_finite() or product.price < 0:
+            raise CatalogImportError("price must not be negative")
+        fields.append('price')
+    if 'quantity' in columns:
+        try:
+            product.quantity = int(row['quantity'])
+        except (TypeError, ValueError):
+            raise CatalogImportError("quantity must be a whole number")
+        if product.quantity < 0:
+            raise CatalogImportError("quantity must not be negative")
+        fields.append('quantity')
+    # A subcategory belongs to a category, so the two are only set together.
+    if 'category' in columns:
+        product.category_id = lookups.category(str(row['category']))
+        product.subcategory_id = lookups.subcategory(product.category_id, row.get('subcategory'))
+        fields += ['category', 'subcategory']
+    elif 'subcategory' in columns:
+        raise CatalogImportError("subcategory can only be changed together with category")
+    if 'image' in columns:
+        image = str(row['image']).strip()
+        product.image, product.image_digest = image, lookups.image_digest(image)
+        fields += ['image', 'image_digest']
+    if 'specification' in columns:
+        product.specification = row['specification']
+        fields.append('specification')
+    if 'style' in columns:
+        product.style_id = lookups.style(str(row['style']))
+        fields.append('style')
+
+    sizes = lookups.choices(lookups.sizes, 'size', row['sizes']) if 'sizes' in columns else None
+    colors = lookups.choices(lookups.colors, 'color', row['colors']) if 'colors' in columns else None
+    return product, fields, sizes, colors
+
+
+def replace_links(link_model, field, links):
+    """
+    Replace the M2M links of the products in ``links`` ({product_id: [related ids]}).
+    """
+    link_model.objects.filter(product_id__in=list(links)).delete()
+    link_model.objects.bulk_create(
+        [link_model(product_id=product_id, **{field: related_id})
+         for product_id, related_ids in links.items() for related_id in dict.fromkeys(related_ids)],
+        batch_size=1000,
+    )
+
+
+def import_batch(rows, lookups, errors):
+    """
+    Write one batch: new products with ``bulk_create`` (allocating missing style codes), products whose
+    style_code already exists with one ``bulk_update`` per set of filled columns, and their sizes and colors
+    straight into the M2M through tables.
+
+    Returns ``(created, updated)``.
+    """
+    given = [code for code in (row_style_code(row) for _, row in rows) if code]
+    existing = dict(Product.objects.filter(style_code__in=given).values_list('style_code', 'id'))
+
+    built = []
+    seen_codes = set()
+    for line, row in rows:
+        try:
+            product, fields, sizes, colors = build_product(row, lookups, existing.get(row_style_code(row)))
+        except CatalogImportError as e:
+            errors.append((line, str(e)))
+            continue
+        if product.style_code:
+            if product.style_code in seen_codes:
+                errors.append((line, f"style_code '{product.style_code}' appears twice in the same batch"))
+                continue
+            seen_codes.add(product.style_code)
+        built.append((product, fields, sizes, colors))
+
+    to_create = [product for product, _, _, _ in built if product.id is None]
+    to_update = defaultdict(list)
+    for product, fields, _, _ in built:
+        if product.id is not None and fields:
+            to_update[tuple(fields)].append(product)
+
+    with transaction.atomic():
+        bulk_create_products(to_create, exclude=given)
+        for fields, products in to_update.items():
+            Product.objects.bulk_update(products, fields, batch_size=1000)
+        replace_links(Product.available_sizes.through, 'size_id',
+                      {product.id: sizes for product, _, sizes, _ in built if sizes is not None})
+        replace_links(Product.available_colors.through, 'color_id',
+                      {product.id: colors for product, _, _, colors in built if colors is not None})
+        # Bulk writes send no signals, so the listing cards are rebuilt here.
+        schedule_card_rebuild([product.id for product, _, _, _ in built])
+    return len(to_create), len(built) - len(to_create)
+
+
+def import_catalog(path, fmt=None, batch_size=1000, create_missing=False, progress=None):
+    """
+    Import products from ``path`` in batches of ``batch_size`` rows, each written in its own transaction.
+
+    Rows whose ``style_code`` already exists update that product's filled columns; other rows create
+    products with freshly allocated style codes. Invalid rows are skipped and returned as ``(line, message)`` errors.
+    """
+    lookups = CatalogLookups(create_missing=create_missing)
+    totals = {'rows': 0, 'created': 0, 'updated': 0}
+    errors = []
+    for rows in batched(read_rows(path, fmt), batch_size):
+        created, updated = import_batch(rows, lookups, errors)
+        totals['rows'] += len(rows)
+        totals['created'] += created
+        totals['updated'] += updated
+        if progress:
+            progress(totals, errors)
+    return totals, errors
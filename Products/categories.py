@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+from Zentoria.routers import primary_database
+from .models import Category, SubCategory
+from .serializers import CategorySerializer, SubCategorySerializer
+
+CATEGORY_TREE_CACHE_KEY = 'category-tree'
+
+
+def build_category_tree():
+    """
+    Nest every category under its parent, with its subcategories attached, using two queries.
+    """
+    nodes = {}
+    roots = []
+    for category in CategorySerializer(Category.objects.order_by('path'), many=True).data:
+        node = {**category, 'children': [], 'subcategories': []}
+        nodes[node['id']] = node
+        parent = nodes.get(node['parent_category'])
+        (parent['children'] if parent else roots).append(node)
+
+    for subcategory in SubCategorySerializer(SubCategory.objects.all(), many=True).data:
+        node = nodes.get(subcategory['parent_category'])
+        if node is not None:
+            node['subcategories'].append(dict(subcategory))
+
+    return roots
+
+
+def get_category_tree():
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        with primary_database():
+            tree = build_category_tree()
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, settings.CATEGORY_TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
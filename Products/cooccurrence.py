@@ -0,0 +1,140 @@
+from collections import Counter
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
+from store.models import OrderItem
+from .models import IndexWatermark, ProductCooccurrence
+
+WATERMARK_NAME = 'product-cooccurrence'
+
+# Orders with more distinct products than this are ignored (bulk or test orders).
+MAX_BASKET_SIZE = 50
+
+# Pairs held in memory before they are added to the table.
+FLUSH_PAIRS = 50000
+
+
+def order_pairs(items, watermark):
+    """
+    Product pairs an order contributes once the items above ``watermark`` are added to it.
+
+    Items already counted pair only with the new products, so re-reading an order never counts
+    a pair twice, and a product bought twice in one order counts once.
+    """
+    old_products, new_products = set(), set()
+    for item_id, product_id in items:
+        (new_products if item_id > watermark else old_products).add(product_id)
+    new_products -= old_products
+
+    if not new_products or len(old_products) + len(new_products) > MAX_BASKET_SIZE:
+        return
+    for a in new_products:
+        for b in old_products:
+            yield a, b
+            yield b, a
+        for b in new_products:
+            if a != b:
+                yield a, b
+
+
+def flush_pairs(pairs):
+    """
+    Add the counted pairs to the stored counts.
+    """
+    products = list({a for a, _ in pairs})
+    for start in range(0, len(products), 500):
+        existing = ProductCooccurrence.objects.select_for_update().filter(product_id__in=products[start:start + 500])
+        for product_id, other_id, count in existing.values_list('product_id', 'other_id', 'count'):
+            if (product_id, other_id) in pairs:
+                pairs[product_id, other_id] += count
+    ProductCooccurrence.objects.bulk_create(
+        [ProductCooccurrence(product_id=a, other_id=b, count=count) for (a, b), count in pairs.items()],
+        batch_size=1000, update_conflicts=True, unique_fields=['product', 'other'], update_fields=['count'],
+    )
+
+
+def prune(product_ids, top_n):
+    """
+    Keep only the ``top_n`` most frequent pairs of each product in ``product_ids``.
+    """
+    product_ids = list(product_ids)
+    for start in range(0, len(product_ids), 500):
+        ranked = ProductCooccurrence.objects.filter(product_id__in=product_ids[start:start + 500]).annotate(
+            position=Window(RowNumber(), partition_by=[F('product_id')], order_by=[F('count').desc(), F('id')]),
+        )
+        stale = [pk for pk, position in ranked.values_list('pk', 'position') if position > top_n]
+        for offset in range(0, len(stale), 500):
+            ProductCooccurrence.objects.filter(pk__in=stale[offset:offset + 500]).delete()
+
+
+def update_cooccurrence_index(rebuild=False, top_n=None, chunk_size=2000, progress=None):
+    """
+    Fold the order items added since the last run into the co-occurrence counts.
+
+    Order items are streamed in order id order with ``.iterator()``, so memory holds one order and
+    at most about ``FLUSH_PAIRS`` pending pairs. Orders that gained items since the watermark are re-read
+    in full, but only pairs involving the new items are counted. Products whose counts changed are
+    pruned to their ``top_n`` pairs; a pruned pair that shows up again restarts from its new orders.
+
+    Returns ``(orders, pairs)`` processed.
+    """
+    top_n = top_n or settings.COOCCURRENCE_TOP_N
+    with transaction.atomic():
+        # The counts and the watermark move together, so a failed run never counts an order twice.
+        watermark, _ = IndexWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+        if rebuild:
+            ProductCooccurrence.objects.all().delete()
+            watermark.position = 0
+
+        high = OrderItem.objects.aggregate(high=Max('id'))['high'] or 0
+        if high <= watermark.position:
+            watermark.save()
+            return 0, 0
+
+        new_items = OrderItem.objects.filter(id__gt=watermark.position, id__lte=high)
+        items = (
+            OrderItem.objects.filter(order_id__in=new_items.values('order_id'), id__lte=high)
+            .order_by('order_id', 'id')
+            .values_list('order_id', 'id', 'product_id')
+        )
+
+        pending = Counter()
+        touched = set()
+        orders = total_pairs = 0
+        for _, order_items in groupby(items.iterator(chunk_size=chunk_size), key=lambda row: row[0]):
+            for pair in order_pairs(((item_id, product_id) for _, item_id, product_id in order_items),
+                                    watermark.position):
+                pending[pair] += 1
+            orders += 1
+            if len(pending) >= FLUSH_PAIRS:
+                touched.update(a for a, _ in pending)
+                total_pairs += len(pending)
+                flush_pairs(pending)
+                pending = Counter()
+                if progress:
+                    progress(orders, total_pairs)
+
+        if pending:
+            touched.update(a for a, _ in pending)
+            total_pairs += len(pending)
+            flush_pairs(pending)
+        prune(touched, top_n)
+
+        watermark.position = high
+        watermark.save()
+    return orders, total_pairs
+
+
+def get_bought_together(product_id, limit):
+    """
+    Products most often ordered with ``product_id``, most frequent first.
+    """
+    pairs = (
+        ProductCooccurrence.objects.filter(product_id=product_id)
+        .select_related('other__style')
+        .order_by('-count', 'id')[:limit]
+    )
+    return [(pair.other, pair.count) for pair in pairs]
@@ -0,0 +1,60 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from Zentoria.routers import primary_database
+from .models import FavouriteProduct
+
+
+def favourites_cache_key(user_id):
+    return f'favourites:{user_id}'
+
+
+def get_favourite_ids(user):
+    """
+    The set of product ids the user has favourited.
+
+    Cached per user as the concatenated 16-byte UUIDs, roughly a fifth of the size of a pickled set
+    of UUID objects, and rebuilt with one query on a miss.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    key = favourites_cache_key(user.pk)
+    packed = cache.get(key)
+    if packed is None:
+        # Cached for an hour, so never from a replica that may not have the latest change yet.
+        with primary_database():
+            product_ids = FavouriteProduct.objects.filter(user=user).values_list('product_id', flat=True)
+            packed = b''.join(sorted(product_id.bytes for product_id in product_ids))
+        cache.set(key, packed, settings.FAVOURITES_CACHE_TIMEOUT)
+    return frozenset(uuid.UUID(bytes=packed[i:i + 16]) for i in range(0, len(packed), 16))
+
+
+def is_favourite(user, product_ids):
+    """
+    ``{product_id: bool}`` for a whole listing, answered from one cached set.
+    """
+    favourite_ids = get_favourite_ids(user)
+    return {product_id: uuid.UUID(str(product_id)) in favourite_ids for product_id in product_ids}
+
+
+def add_favourite(user, product_id):
+    """
+    Favourite a product; adding one that is already a favourite is a no-op.
+
+    Returns ``(favourite, created)``.
+    """
+    return FavouriteProduct.objects.get_or_create(user=user, product_id=product_id)
+
+
+def remove_favourite(user, product_id):
+    """
+    Unfavourite a product; removing one that is not a favourite is a no-op. Returns whether a row was deleted.
+    """
+    deleted, _ = FavouriteProduct.objects.filter(user=user, product_id=product_id).delete()
+    return bool(deleted)
+
+
+def invalidate_favourites(user_id):
+    cache.delete(favourites_cache_key(user_id))
@@ -0,0 +1,111 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from imaging import FORMATS, load_image, render_variant
+from Zentoria.background import run_in_background
+from .models import Product
+
+_eviction_lock = threading.Lock()
+
+
+def available_formats():
+    return [fmt for fmt in settings.PRODUCT_IMAGE_FORMATS if fmt in FORMATS]
+
+
+def derivative_path(digest, width, fmt):
+    return os.path.join(settings.PRODUCT_IMAGE_CACHE_DIR, digest[:2], digest, f'{width}.{fmt}')
+
+
+def derivative_url(digest, width, fmt):
+    return reverse('product-image', kwargs={'digest': digest, 'width': width, 'fmt': fmt})
+
+
+def get_derivative(digest, width, fmt):
+    """
+    Return the cached file for a product image variant, rendering it on first request.
+
+    Returns ``None`` when no product has an image with this digest.
+    """
+    path = derivative_path(digest, width, fmt)
+    if os.path.exists(path):
+        # The modification time doubles as the last-access time for LRU eviction.
+        os.utime(path)
+        return path
+
+    product = Product.objects.filter(image_digest=digest).only('image').first()
+    if product is None or not product.image:
+        return None
+
+    with product.image.open('rb') as original:
+        image = load_image(original)
+    write_derivative(path, render_variant(image, width, fmt))
+    run_in_background(evict_derivatives)
+    return path
+
+
+def write_derivative(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as tmp:
+        tmp.write(data)
+    os.replace(tmp_path, path)
+
+
+def generate_derivatives(product_id):
+    product = Product.objects.filter(pk=product_id).only('image', 'image_digest').first()
+    if product is None or not product.image:
+        return
+
+    with product.image.open('rb') as original:
+        image = load_image(original)
+    for width in settings.PRODUCT_IMAGE_WIDTHS:
+        for fmt in available_formats():
+            path = derivative_path(product.image_digest, width, fmt)
+            if not os.path.exists(path):
+                write_derivative(path, render_variant(image, width, fmt))
+    evict_derivatives()
+
+
+def schedule_derivatives(product):
+    product_id = product.pk
+    transaction.on_commit(lambda: run_in_background(generate_derivatives, product_id))
+
+
+def evict_derivatives():
+    """
+    Delete the least recently used variants until the cache is back under ``PRODUCT_IMAGE_CACHE_MAX_BYTES``.
+    """
+    if not _eviction_lock.acquire(blocking=False):
+        return
+    try:
+        files = []
+        total = 0
+        for root, _, names in os.walk(settings.PRODUCT_IMAGE_CACHE_DIR):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= settings.PRODUCT_IMAGE_CACHE_MAX_BYTES:
+            return
+
+        # Evict down to 90% so the next few writes do not trigger another walk.
+        target = settings.PRODUCT_IMAGE_CACHE_MAX_BYTES * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    finally:
+        _eviction_lock.release()
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Products.cooccurrence import update_cooccurrence_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Count how often products are ordered together, folding in only the order items added since "
+        "the last run. Run it before refresh_similar_products, which reads the counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Drop the counts and rescan every order.")
+        parser.add_argument('--top-n', type=int, help="Pairs kept per product.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Order items fetched per round trip.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(orders, pairs):
+            self.stdout.write(f"  {orders} orders, {pairs} pairs ({time.perf_counter() - start:.1f}s)")
+
+        orders, pairs = update_cooccurrence_index(
+            rebuild=options['rebuild'], top_n=options['top_n'], chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {orders} orders, {pairs} pair updates in {time.perf_counter() - start:.1f}s"
+        ))
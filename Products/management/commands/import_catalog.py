@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from Products.catalog import import_catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import products from a CSV (header row) or NDJSON file with the columns name, description, "
+        "price, quantity, category, subcategory, style, sizes, colors, image, specification and style_code. "
+        "Sizes and colors are separated by '|' or ','. Rows with an existing style_code update that product's "
+        "non-blank columns; new products need a name, price, category and image."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--create-missing', action='store_true',
+                            help="Create unknown categories, subcategories and styles instead of rejecting the row.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(totals, errors):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"  {totals['rows']} rows: {totals['created']} created, {totals['updated']} updated, "
+                f"{len(errors)} rejected ({totals['rows'] / elapsed:.0f} rows/s)"
+            )
+
+        try:
+            totals, errors = import_catalog(
+                options['path'], fmt=options['format'], batch_size=options['batch_size'],
+                create_missing=options['create_missing'], progress=progress,
+            )
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        for line, message in errors:
+            self.stderr.write(f"line {line}: {message}")
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created'] + totals['updated']} of {totals['rows']} rows in {elapsed:.1f}s "
+            f"({totals['rows'] / max(elapsed, 1e-9):.0f} rows/s)"
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Products.cards import rebuild_product_cards
+from Products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encode the listing card of every product. Signals keep the cards current; run this after "
+        "writes that bypass them, such as raw SQL or queryset.update()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Products encoded per round trip.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        product_ids = list(Product.objects.values_list('pk', flat=True))
+        documents = rebuild_product_cards(product_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(documents)} product cards in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Products.recommendations import refresh_similar_products
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the most similar products of every product from category, style, colors, sizes, "
+        "price band and co-purchases (from build_cooccurrence_index). Only products whose inputs changed are "
+        "revisited unless --full is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute the neighbours of every product.")
+        parser.add_argument('--top-k', type=int, help="Neighbours stored per product.")
+        parser.add_argument('--batch-size', type=int,
+                            help="Products scored per matrix multiplication (default: from the memory budget).")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        changed, rewritten = refresh_similar_products(
+            full=options['full'], k=options['top_k'], batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{changed} products changed, neighbours rewritten for {rewritten} "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
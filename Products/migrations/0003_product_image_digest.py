@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:03
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_image_digests(apps, schema_editor):
+    Product = apps.get_model('Products', 'Product')
+    for product in Product.objects.exclude(image='').only('image').iterator():
+        digest = hashlib.sha256()
+        try:
+            with product.image.open('rb') as image:
+                for chunk in image.chunks():
+                    digest.update(chunk)
+        except (FileNotFoundError, OSError):
+            continue
+        Product.objects.filter(pk=product.pk).update(image_digest=digest.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Products', '0002_alter_size_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_digest',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_image_digests, migrations.RunPython.noop),
+    ]
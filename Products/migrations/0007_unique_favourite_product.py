@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:14
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_favourites(apps, schema_editor):
+    # Keep the earliest favourite of each (user, product) pair so the unique constraint can be added.
+    FavouriteProduct = apps.get_model('Products', 'FavouriteProduct')
+    duplicates = (
+        FavouriteProduct.objects.values('user_id', 'product_id')
+        .annotate(count=Count('id'), keep=Min('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        FavouriteProduct.objects.filter(
+            user_id=duplicate['user_id'], product_id=duplicate['product_id'],
+        ).exclude(id=duplicate['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Products', '0006_cooccurrence_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_favourites, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favouriteproduct',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_favourite_product'),
+        ),
+    ]
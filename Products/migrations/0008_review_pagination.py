@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+STAR_FIELDS = ('one_star', 'two_stars', 'three_stars', 'four_stars', 'five_stars')
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    ProductReview = apps.get_model('Products', 'ProductReview')
+    ProductRatingSummary = apps.get_model('Products', 'ProductRatingSummary')
+    counts = ProductReview.objects.values('product_id').annotate(
+        **{field: Count('id', filter=Q(rating=stars)) for stars, field in enumerate(STAR_FIELDS, start=1)}
+    ).order_by()
+    ProductRatingSummary.objects.bulk_create(
+        [ProductRatingSummary(**row) for row in counts.iterator()], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Products', '0007_unique_favourite_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='Products.product')),
+                ('one_star', models.PositiveIntegerField(default=0)),
+                ('two_stars', models.PositiveIntegerField(default=0)),
+                ('three_stars', models.PositiveIntegerField(default=0)),
+                ('four_stars', models.PositiveIntegerField(default=0)),
+                ('five_stars', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'review_date', 'id'], name='review_product_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'rating', 'review_date', 'id'], name='review_product_rating_idx'),
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
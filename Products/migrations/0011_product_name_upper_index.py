@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:30
+
+from django.db import migrations
+
+INDEX_NAME = 'product_name_upper_like_idx'
+
+
+def create_upper_name_index(apps, schema_editor):
+    # The admin's case-insensitive prefix search is UPPER(name) LIKE UPPER('term%'); only PostgreSQL needs,
+    # and only its pattern operator class allows, an index for it.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('Products', 'Product')._meta.db_table
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {quote(INDEX_NAME)} ON {quote(table)} (UPPER({quote("name")}) text_pattern_ops)'
+    )
+
+
+def drop_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(INDEX_NAME)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Products', '0010_product_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_upper_name_index, drop_upper_name_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Products', '0011_product_name_upper_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productfeaturesignature',
+            name='neighbour_count',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
@@ -1,9 +1,13 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 #from accounts.models import User
-import random
-import string
 import uuid
 
+from imaging import file_digest
+from .style_codes import STYLE_CODE_RETRIES, style_code_allocator, taken_style_codes
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -11,6 +15,9 @@ class Category(models.Model):
     parent_category = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
                                         related_name='subcategories_of')
     description = models.TextField(null=True, blank=True)
+    # Materialized path of primary keys from the root, e.g. "1/4/9/", so a subtree is one prefix match.
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name = "Category"
@@ -19,6 +26,39 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            # Read both paths from the database; in-memory instances go stale when an ancestor moves.
+            rows = Category.objects.select_for_update().filter(pk__in=[self.pk, self.parent_category_id])
+            paths = dict(rows.values_list('pk', 'path'))
+            old_path = paths.get(self.pk, '')
+            parent_path = paths.get(self.parent_category_id, '')
+            if old_path and parent_path.startswith(old_path):
+                raise ValidationError("A category cannot be moved under itself or one of its descendants.")
+
+            # Write back the stored path; it only changes below, together with the subtree.
+            self.path, self.depth = old_path, max(old_path.count('/') - 1, 0)
+            super().save(*args, **kwargs)
+
+            new_path = f"{parent_path}{self.pk}/"
+            if new_path == old_path:
+                return
+
+            new_depth = new_path.count('/') - 1
+            Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+            if old_path:
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (new_depth - self.depth),
+                )
+            self.path, self.depth = new_path, new_depth
+
+    def descendants(self, include_self=False):
+        categories = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            categories = categories.exclude(pk=self.pk)
+        return categories
+
 
 class Style(models.Model):
     style = models.CharField(max_length=100, unique=True)
@@ -89,9 +129,18 @@ class Color(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def in_category_tree(self, category):
+        """
+        Products in ``category`` or any of its descendants, as a single indexed prefix match on the path.
+        """
+        return self.filter(category__path__startswith=category.path)
+
+
 class Product(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    name = models.CharField(max_length=100)
+    # The admin's case-insensitive prefix search uses an UPPER(name) pattern index on PostgreSQL (migration 0011).
+    name = models.CharField(max_length=100, db_index=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     quantity = models.PositiveIntegerField()
@@ -99,24 +148,59 @@ class Product(models.Model):
     subcategory = models.ForeignKey(SubCategory, on_delete=models.CASCADE, null=True, blank=True,
                                     related_name='products')
     image = models.ImageField(upload_to='product_images/')
+    image_digest = models.CharField(max_length=64, blank=True, default='', db_index=True, editable=False)
     specification = models.CharField(max_length=100, blank=True, null=True)
     style = models.ForeignKey(Style, on_delete=models.SET_NULL, null=True)
     style_code = models.CharField(max_length=10, blank=True, null=True, unique=True)
     available_sizes = models.ManyToManyField(Size)
     available_colors = models.ManyToManyField(Color)
 
+    objects = ProductQuerySet.as_manager()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Read from __dict__ so a deferred image column is not loaded just to be remembered.
+        self._loaded_image_name = str(self.__dict__.get('image') or '')
+        self.image_changed = False
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
-        if not self.style_code:
-            code_length = 10
-            alphanumeric_characters = string.ascii_letters + string.digits
-            self.style_code = ''.join(random.choice(alphanumeric_characters) for _ in range(code_length))
-        super().save(*args, **kwargs)
+        generated_style_code = not self.style_code
+        if generated_style_code:
+            self.style_code = style_code_allocator.allocate()
+
+        update_fields = kwargs.get('update_fields')
+        if 'image' in self.__dict__ and (update_fields is None or 'image' in update_fields):
+            # Only a new upload or a new file name is hashed; an unchanged image keeps its digest, blank or not.
+            self.image_changed = bool(self.image) and (
+                not self.image._committed or self.image.name != self._loaded_image_name
+            )
+            if self.image_changed:
+                try:
+                    self.image_digest = file_digest(self.image)
+                except OSError:
+                    # Missing, or outside MEDIA_ROOT: saved without derivatives rather than failing the save.
+                    self.image_digest = ''
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'image_digest'}
+
+        if not generated_style_code:
+            super().save(*args, **kwargs)
+        else:
+            for attempt in range(STYLE_CODE_RETRIES):
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                    break
+                except IntegrityError:
+                    # Another writer took the code between reservation and insert; draw a new one.
+                    if attempt == STYLE_CODE_RETRIES - 1 or not taken_style_codes([self.style_code]):
+                        raise
+                    self.style_code = style_code_allocator.allocate()
+        if 'image' in self.__dict__:
+            self._loaded_image_name = self.image.name or ''
 
 
 class ProductReview(models.Model):
@@ -127,14 +211,136 @@ class ProductReview(models.Model):
     review_date = models.DateTimeField(auto_now_add=True)
     review_image = models.ImageField(upload_to='review_images/', null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a product's reviews by date and by rating.
+            models.Index(fields=['product', 'review_date', 'id'], name='review_product_date_idx'),
+            models.Index(fields=['product', 'rating', 'review_date', 'id'], name='review_product_rating_idx'),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Remembered so moving a review to another product also refreshes the old product's summary.
+        self._loaded_product_id = self.__dict__.get('product_id')
+
     def __str__(self):
         return f"Review for {self.product.name} by {self.user.username}"
 
 
+class ProductRatingSummary(models.Model):
+    """
+    Per-product review counts by star rating, kept in step with ``ProductReview`` by signals.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+    one_star = models.PositiveIntegerField(default=0)
+    two_stars = models.PositiveIntegerField(default=0)
+    three_stars = models.PositiveIntegerField(default=0)
+    four_stars = models.PositiveIntegerField(default=0)
+    five_stars = models.PositiveIntegerField(default=0)
+
+    STAR_FIELDS = ('one_star', 'two_stars', 'three_stars', 'four_stars', 'five_stars')
+
+    def __str__(self):
+        return f"Ratings for {self.product_id}"
+
+    @property
+    def histogram(self):
+        return {stars: getattr(self, field) for stars, field in enumerate(self.STAR_FIELDS, start=1)}
+
+    @property
+    def total_reviews(self):
+        return sum(self.histogram.values())
+
+    @property
+    def average_rating(self):
+        total = self.total_reviews
+        if not total:
+            return 0
+        return sum(stars * count for stars, count in self.histogram.items()) / total
+
+
+class ProductCard(models.Model):
+    """
+    A product's listing card pre-encoded as JSON, rebuilt by signals whenever anything on it changes
+    (see ``Products.cards``).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Card for {self.product_id}"
+
+
 class FavouriteProduct(models.Model):
     user = models.ForeignKey("accounts.User", on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='favorites')
     date_added = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_favourite_product'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Favourite: {self.product.name}"
+
+
+class SimilarProduct(models.Model):
+    """
+    Precomputed nearest neighbours of a product, written by the ``refresh_similar_products`` command.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_products')
+    similar = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_similar_product_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.similar_id} is #{self.rank + 1} like {self.product_id}"
+
+
+class ProductFeatureSignature(models.Model):
+    # Hash of the inputs the neighbours were computed from, so a refresh only revisits changed products.
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='feature_signature')
+    signature = models.CharField(max_length=40)
+    # Neighbours stored by the last recompute; a list can be complete with fewer than k when few products score.
+    neighbour_count = models.PositiveSmallIntegerField(null=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+
+class ProductCooccurrence(models.Model):
+    """
+    Number of orders containing both products, stored in both directions and pruned to the
+    top pairs per product by the ``build_cooccurrence_index`` command.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='cooccurrences')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'other'], name='unique_product_cooccurrence'),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-count'], name='cooccurrence_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.other_id}: {self.count}"
+
+
+class IndexWatermark(models.Model):
+    # Highest source row id already folded into an incrementally built index.
+    name = models.CharField(max_length=50, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
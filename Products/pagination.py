@@ -0,0 +1,68 @@
+"""
+Keyset (cursor) pagination: each page is a range scan from the last row of the previous one.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """
+    Opaque, URL-safe cursor for the ordering values of the last row on a page.
+
+    Datetimes keep their microseconds, unlike ``DjangoJSONEncoder``, so equal timestamps compare equal.
+    """
+    values = [
+        value.isoformat() if isinstance(value, (date, datetime))
+        else str(value) if isinstance(value, (uuid.UUID, Decimal))
+        else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=20):
+    """
+    Return ``(items, next_cursor)`` for one page of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` is a list of field names (``-`` for descending) whose last field is unique, e.g.
+    ``['-review_date', '-id']``. The cursor holds the last row's values, so the next page is a range
+    scan on an index over those fields rather than an ``OFFSET`` that reads every skipped row.
+    Raises ``ValueError`` for a malformed cursor.
+    """
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    if cursor:
+        values = decode_cursor(cursor, len(fields))
+        after = Q()
+        for i, (name, descending) in enumerate(fields):
+            condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+            for (previous, _), value in zip(fields[:i], values):
+                condition &= Q(**{previous: value})
+            after |= condition
+        try:
+            queryset = queryset.filter(after)
+        except ValidationError:
+            raise ValueError("Invalid cursor")
+
+    items = list(queryset.order_by(*ordering)[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor([getattr(items[-1], name) for name, _ in fields])
+    return items, next_cursor
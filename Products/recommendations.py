@@ -0,0 +1,353 @@
+import hashlib
+import math
+from collections import defaultdict
+from typing import TYPE_CHECKING, NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from .models import Product, ProductCooccurrence, ProductFeatureSignature, SimilarProduct
+
+# numpy is imported by the functions that use it: only the refresh command needs it, and importing it would
+# add about 100 ms to every cold start of a server that only reads the stored neighbours.
+if TYPE_CHECKING:
+    import numpy
+
+# Relative weight of each attribute block in the cosine similarity.
+FEATURE_WEIGHTS = {
+    'category': 3.0,
+    'style': 2.0,
+    'colors': 1.0,
+    'sizes': 1.0,
+    'price': 1.5,
+}
+
+# Prices fall into logarithmic bands, each PRICE_BAND_RATIO times the previous; bands are fixed so a new
+# product does not shift every other product's band.
+PRICE_BAND_RATIO = 1.5
+
+# Number of shared orders at which the co-purchase boost reaches its full weight.
+CO_PURCHASE_SATURATION = 20
+
+# If more than this share of the catalog changed, recomputing everything is cheaper than merging.
+FULL_REFRESH_RATIO = 0.5
+
+
+class Catalog(NamedTuple):
+    ids: list
+    vectors: 'numpy.ndarray'
+    co_purchases: dict
+    signatures: list
+
+
+def category_features(path):
+    """
+    The product's own category at full weight and each ancestor at half the weight of its child,
+    so products in sibling categories are still somewhat similar.
+    """
+    category_ids = [segment for segment in path.split('/') if segment]
+    return {category_id: 0.5 ** depth for depth, category_id in enumerate(reversed(category_ids))}
+
+
+def price_features(price):
+    if not price or price <= 0:
+        return {}
+    band = math.floor(math.log(float(price), PRICE_BAND_RATIO))
+    return {band: 1.0, band - 1: 0.5, band + 1: 0.5}
+
+
+def feature_block(features, weight):
+    """
+    Encode one attribute as a dense block whose rows have an L2 norm of ``sqrt(weight)``
+    (or zero when the product has no value for it).
+    """
+    import numpy as np
+
+    vocabulary = {}
+    for row in features:
+        for token in row:
+            vocabulary.setdefault(token, len(vocabulary))
+
+    block = np.zeros((len(features), max(len(vocabulary), 1)), dtype=np.float32)
+    for i, row in enumerate(features):
+        for token, value in row.items():
+            block[i, vocabulary[token]] = value
+
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    np.divide(block, norms, out=block, where=norms > 0)
+    return block * np.float32(math.sqrt(weight))
+
+
+def load_co_purchase_counts(index):
+    """
+    Shared order counts per product pair, read from the co-occurrence index built from orders.
+    """
+    counts = defaultdict(dict)
+    pairs = ProductCooccurrence.objects.values_list('product_id', 'other_id', 'count').order_by()
+    for product_id, other_id, count in pairs.iterator(chunk_size=5000):
+        if product_id in index and other_id in index:
+            counts[index[product_id]][index[other_id]] = count
+    return counts
+
+
+def build_catalog():
+    """
+    Load every product's attributes and co-purchase counts with five queries and turn them into
+    unit-length feature vectors.
+    """
+    import numpy as np
+
+    products = list(Product.objects.order_by('id').values_list('id', 'category__path', 'style_id', 'price'))
+    ids = [product[0] for product in products]
+    index = {product_id: i for i, product_id in enumerate(ids)}
+
+    colors = defaultdict(list)
+    for product_id, color_id in Product.available_colors.through.objects.values_list('product_id', 'color_id'):
+        colors[product_id].append(color_id)
+    sizes = defaultdict(list)
+    for product_id, size_id in Product.available_sizes.through.objects.values_list('product_id', 'size_id'):
+        sizes[product_id].append(size_id)
+
+    features = {
+        'category': [category_features(path or '') for _, path, _, _ in products],
+        'style': [{style_id: 1.0} if style_id else {} for _, _, style_id, _ in products],
+        'colors': [dict.fromkeys(colors[product_id], 1.0) for product_id in ids],
+        'sizes': [dict.fromkeys(sizes[product_id], 1.0) for product_id in ids],
+        'price': [price_features(price) for _, _, _, price in products],
+    }
+    vectors = np.hstack([feature_block(features[name], weight) for name, weight in FEATURE_WEIGHTS.items()])
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    counts = load_co_purchase_counts(index)
+    weight = settings.SIMILAR_PRODUCTS_CO_PURCHASE_WEIGHT
+    co_purchases = {
+        i: {j: weight * min(1.0, math.log1p(count) / math.log1p(CO_PURCHASE_SATURATION))
+            for j, count in neighbours.items()}
+        for i, neighbours in counts.items()
+    }
+
+    signatures = []
+    for i, (product_id, path, style_id, price) in enumerate(products):
+        inputs = (
+            path, style_id, sorted(colors[product_id]), sorted(sizes[product_id]), sorted(features['price'][i]),
+            sorted((str(ids[j]), count) for j, count in counts.get(i, {}).items()),
+        )
+        signatures.append(hashlib.sha1(repr(inputs).encode()).hexdigest())
+
+    return Catalog(ids, vectors, co_purchases, signatures)
+
+
+def batch_rows(product_count, batch_size=None):
+    """
+    Products scored per batch: ``batch_size`` when given, otherwise as many as fit one float32 score row
+    per catalog product into ``SIMILAR_PRODUCTS_MEMORY_BUDGET`` bytes.
+    """
+    if batch_size:
+        return batch_size
+    return max(1, settings.SIMILAR_PRODUCTS_MEMORY_BUDGET // (4 * max(product_count, 1)))
+
+
+def batch_scores(catalog, rows):
+    """
+    Similarity of each product in ``rows`` to every product, with a product never similar to itself.
+    """
+    import numpy as np
+
+    scores = catalog.vectors[rows] @ catalog.vectors.T
+    for r, i in enumerate(rows):
+        for j, boost in catalog.co_purchases.get(i, {}).items():
+            scores[r, j] += boost
+        scores[r, i] = -np.inf
+    return scores
+
+
+def top_k(scores, k):
+    """
+    Column indices and scores of the ``k`` best entries per row, best first.
+
+    ``scores`` is negated in place and partitioned a row at a time, so a batch needs no copy of its scores
+    and no index array of the same size.
+    """
+    import numpy as np
+
+    k = min(k, scores.shape[1])
+    np.negative(scores, out=scores)
+    indices = np.empty((scores.shape[0], k), dtype=np.intp)
+    for r, row in enumerate(scores):
+        indices[r] = np.argpartition(row, k - 1)[:k]
+    top = np.take_along_axis(scores, indices, axis=1)
+    order = np.argsort(top, axis=1, kind='stable')
+    return np.take_along_axis(indices, order, axis=1), -np.take_along_axis(top, order, axis=1)
+
+
+def store_neighbours(catalog, neighbours):
+    """
+    Replace the stored neighbours of the products in ``neighbours`` ({row: [(row, score), ...]}).
+    """
+    product_ids = [catalog.ids[i] for i in neighbours]
+    rows = [
+        SimilarProduct(product_id=catalog.ids[i], similar_id=catalog.ids[j], rank=rank, score=score)
+        for i, scored in neighbours.items()
+        for rank, (j, score) in enumerate(scored)
+    ]
+    counts = [
+        ProductFeatureSignature(product_id=catalog.ids[i], signature=catalog.signatures[i], neighbour_count=len(scored))
+        for i, scored in neighbours.items()
+    ]
+    with transaction.atomic():
+        SimilarProduct.objects.filter(product_id__in=product_ids).delete()
+        SimilarProduct.objects.bulk_create(rows, batch_size=1000)
+        ProductFeatureSignature.objects.bulk_create(
+            counts, batch_size=1000,
+            update_conflicts=True, unique_fields=['product'], update_fields=['neighbour_count'],
+        )
+
+
+def recompute(catalog, rows, k, batch_size):
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        indices, scores = top_k(batch_scores(catalog, chunk), k)
+        store_neighbours(catalog, {
+            i: [(int(j), float(score)) for j, score in zip(indices[r], scores[r]) if score > 0]
+            for r, i in enumerate(chunk)
+        })
+
+
+def best_changed_neighbours(catalog, changed, k, batch_size):
+    """
+    For every product, the ``k`` most similar products among ``changed``, streamed batch by batch.
+    """
+    import numpy as np
+
+    best_ids = np.full((len(catalog.ids), k), -1, dtype=np.int64)
+    best_scores = np.full((len(catalog.ids), k), -np.inf, dtype=np.float32)
+    for start in range(0, len(changed), batch_size):
+        chunk = changed[start:start + batch_size]
+        indices, scores = top_k(batch_scores(catalog, chunk).T, k)
+        ids = np.concatenate([best_ids, np.asarray(chunk)[indices]], axis=1)
+        selected, best_scores = top_k(np.concatenate([best_scores, scores], axis=1), k)
+        best_ids = np.take_along_axis(ids, selected, axis=1)
+    return best_ids, best_scores
+
+
+def products_listing(product_ids):
+    """
+    Products whose stored neighbours include any of ``product_ids``.
+    """
+    product_ids = list(product_ids)
+    listing = set()
+    for start in range(0, len(product_ids), 500):
+        listing.update(
+            SimilarProduct.objects.filter(similar_id__in=product_ids[start:start + 500])
+            .values_list('product_id', flat=True).distinct()
+        )
+    return listing
+
+
+def incomplete_products(k):
+    """
+    Products whose neighbour list lost entries because a neighbour was deleted and its rows cascaded away:
+    a hole in the ranks, or fewer rows than the last recompute stored.
+
+    A list computed with fewer than ``k`` neighbours is complete: it is only revisited when the product's
+    inputs change, or merged into when a changed product scores against it. Lists stored before the count
+    was recorded fall back to ``count < k``. After raising ``k``, run a full refresh.
+    """
+    expected = Max('product__feature_signature__neighbour_count')
+    short = set(
+        SimilarProduct.objects.values('product_id')
+        .annotate(count=Count('id'), last_rank=Max('rank'), expected=expected)
+        .filter(
+            Q(last_rank__gte=F('count')) | Q(count__lt=F('expected'))
+            | Q(expected__isnull=True, count__lt=k)
+        )
+        .values_list('product_id', flat=True)
+    )
+    emptied = ProductFeatureSignature.objects.filter(
+        neighbour_count__gt=0, product__similar_products__isnull=True,
+    ).values_list('product_id', flat=True)
+    return short.union(emptied)
+
+
+def merge_changed_neighbours(catalog, rows, best_ids, best_scores, k):
+    """
+    Fold the changed products into the stored neighbours of the unchanged ``rows``, rewriting only
+    the products whose top ``k`` actually moves.
+    """
+    kth_scores = dict(
+        SimilarProduct.objects.filter(rank=k - 1).values_list('product_id', 'score')
+    )
+    candidates = [
+        i for i in rows
+        if best_scores[i, 0] > 0 and best_scores[i, 0] > kth_scores.get(catalog.ids[i], 0)
+    ]
+    index = {product_id: i for i, product_id in enumerate(catalog.ids)}
+    for start in range(0, len(candidates), 500):
+        chunk = candidates[start:start + 500]
+        scored = defaultdict(dict)
+        stored = SimilarProduct.objects.filter(product_id__in=[catalog.ids[i] for i in chunk])
+        for product_id, similar_id, score in stored.values_list('product_id', 'similar_id', 'score'):
+            scored[index[product_id]][index[similar_id]] = score
+        for i in chunk:
+            for j, score in zip(best_ids[i], best_scores[i]):
+                if score > 0:
+                    scored[i][int(j)] = float(score)
+        store_neighbours(catalog, {
+            i: sorted(scored[i].items(), key=lambda item: -item[1])[:k] for i in chunk
+        })
+    return len(candidates)
+
+
+def refresh_similar_products(full=False, k=None, batch_size=None):
+    """
+    Recompute the stored neighbours of products whose attributes or co-purchases changed since the last
+    refresh, and of products whose neighbour lists referenced them. Unchanged products are only rewritten
+    when a changed product now ranks in their top ``k``.
+
+    Returns ``(changed, rewritten)`` product counts.
+    """
+    k = k or settings.SIMILAR_PRODUCTS_TOP_K
+    catalog = build_catalog()
+    if not catalog.ids:
+        return 0, 0
+    batch_size = batch_rows(len(catalog.ids), batch_size or settings.SIMILAR_PRODUCTS_BATCH_SIZE)
+
+    stored = dict(ProductFeatureSignature.objects.values_list('product_id', 'signature'))
+    changed = [i for i, product_id in enumerate(catalog.ids) if stored.get(product_id) != catalog.signatures[i]]
+    full = full or len(changed) > FULL_REFRESH_RATIO * len(catalog.ids)
+
+    if full:
+        changed = list(range(len(catalog.ids)))
+        recompute(catalog, changed, k, batch_size)
+        rewritten = len(changed)
+    else:
+        changed_set = set(changed)
+        listing = products_listing(catalog.ids[i] for i in changed) | incomplete_products(k)
+        affected = [i for i, product_id in enumerate(catalog.ids) if product_id in listing and i not in changed_set]
+        recompute(catalog, changed + affected, k, batch_size)
+        rewritten = len(changed) + len(affected)
+
+        if changed:
+            skip = changed_set.union(affected)
+            unchanged = [i for i in range(len(catalog.ids)) if i not in skip]
+            best_ids, best_scores = best_changed_neighbours(catalog, changed, k, batch_size)
+            rewritten += merge_changed_neighbours(catalog, unchanged, best_ids, best_scores, k)
+
+    ProductFeatureSignature.objects.bulk_create(
+        [ProductFeatureSignature(product_id=catalog.ids[i], signature=catalog.signatures[i]) for i in changed],
+        batch_size=1000, update_conflicts=True, unique_fields=['product'], update_fields=['signature', 'computed_at'],
+    )
+    return len(changed), rewritten
+
+
+def get_similar_products(product_id, limit):
+    """
+    The precomputed neighbours of a product, best first, as one indexed lookup on ``(product, rank)``.
+    """
+    neighbours = (
+        SimilarProduct.objects.filter(product_id=product_id, rank__lt=limit)
+        .select_related('similar__style')
+        .order_by('rank')
+    )
+    return [neighbour.similar for neighbour in neighbours]
@@ -0,0 +1,47 @@
+from django.db.models import Count, Q
+from .models import Product, ProductRatingSummary, ProductReview
+from .pagination import keyset_page
+
+STAR_FIELDS = dict(enumerate(ProductRatingSummary.STAR_FIELDS, start=1))
+
+# Keyset orderings for review pages; each ends in ``id`` so the position of every row is unique.
+REVIEW_ORDERINGS = {
+    'newest': ['-review_date', '-id'],
+    'oldest': ['review_date', 'id'],
+    'highest': ['-rating', '-review_date', '-id'],
+    'lowest': ['rating', 'review_date', 'id'],
+}
+
+
+def refresh_rating_summary(product_id):
+    """
+    Recount a product's reviews per star rating into its summary row.
+    """
+    if not Product.objects.filter(pk=product_id).exists():
+        return
+    counts = ProductReview.objects.filter(product_id=product_id).aggregate(
+        **{field: Count('id', filter=Q(rating=stars)) for stars, field in STAR_FIELDS.items()}
+    )
+    ProductRatingSummary.objects.update_or_create(product_id=product_id, defaults=counts)
+
+
+def get_rating_summary(product_id):
+    summary = ProductRatingSummary.objects.filter(product_id=product_id).first()
+    if summary is None:
+        summary = ProductRatingSummary(product_id=product_id)
+    return {
+        "average_rating": summary.average_rating,
+        "total_reviews": summary.total_reviews,
+        "histogram": summary.histogram,
+    }
+
+
+def get_review_page(reviews, sort='newest', cursor=None, page_size=20):
+    """
+    One page of ``reviews`` in the given sort order and the cursor of the next page (``None`` on the last).
+
+    Raises ``ValueError`` for an unknown sort or a malformed cursor.
+    """
+    if sort not in REVIEW_ORDERINGS:
+        raise ValueError(f"sort must be one of {', '.join(REVIEW_ORDERINGS)}")
+    return keyset_page(reviews, REVIEW_ORDERINGS[sort], cursor, page_size)
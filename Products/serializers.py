@@ -1,4 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
+from Zentoria.serializers import DynamicFieldsMixin
+from .images import available_formats, derivative_url
 from .models import Category, Style, SubCategory, Product, ProductReview, FavouriteProduct, Size, Color
 
 
@@ -31,14 +34,32 @@ class SubCategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     style = StyleSerializer()
     reviews = ProductReviewSerializer(many=True)
+    image_variants = serializers.SerializerMethodField()
+    is_favourite = serializers.SerializerMethodField()
+
+    # Reviews are paginated separately; ?expand=reviews embeds them anyway.
+    expandable_fields = ('reviews',)
+    field_sources = {'image_variants': ['image_digest'], 'is_favourite': ['id']}
 
     class Meta:
         model = Product
         fields = '__all__'
 
+    def get_image_variants(self, product):
+        if not product.image_digest:
+            return {}
+        return {
+            width: {fmt: derivative_url(product.image_digest, width, fmt) for fmt in available_formats()}
+            for width in settings.PRODUCT_IMAGE_WIDTHS
+        }
+
+    def get_is_favourite(self, product):
+        # Views pass the user's favourite ids in the context, so a whole listing costs one lookup.
+        return product.id in self.context.get('favourite_ids', ())
+
 
 class FavouriteProductSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,86 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .cards import schedule_card_rebuild
+from .categories import invalidate_category_tree
+from .favourites import invalidate_favourites
+from .images import schedule_derivatives
+from .models import (
+    Category, Color, FavouriteProduct, Product, ProductRatingSummary, ProductReview, Size, Style, SubCategory,
+)
+from .reviews import refresh_rating_summary
+
+
+@receiver(post_save, sender=Product)
+def render_product_image_derivatives(sender, instance, **kwargs):
+    if settings.PRODUCT_IMAGE_EAGER and instance.image_changed and instance.image_digest:
+        schedule_derivatives(instance)
+
+
+@receiver(post_delete, sender=Category)
+def reroot_orphaned_categories(sender, instance, **kwargs):
+    # SET_NULL detaches the children without calling save(), so strip the deleted prefix here.
+    if instance.path:
+        Category.objects.filter(path__startswith=instance.path).update(
+            path=Substr('path', len(instance.path) + 1),
+            depth=F('depth') - (instance.depth + 1),
+        )
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SubCategory)
+def invalidate_cached_category_tree(sender, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver([post_save, post_delete], sender=FavouriteProduct)
+def invalidate_cached_favourites(sender, instance, **kwargs):
+    invalidate_favourites(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=ProductReview)
+def refresh_product_rating_summary(sender, instance, **kwargs):
+    # After commit, so a product deleted together with its reviews is gone before its summary is touched.
+    for product_id in {instance.product_id, instance._loaded_product_id} - {None}:
+        transaction.on_commit(partial(refresh_rating_summary, product_id))
+    instance._loaded_product_id = instance.product_id
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductRatingSummary)
+def rebuild_product_card(sender, instance, **kwargs):
+    # A rating summary's primary key is its product's.
+    schedule_card_rebuild([instance.pk])
+
+
+@receiver(post_save, sender=Style)
+@receiver(pre_delete, sender=Style)
+@receiver(post_save, sender=Color)
+@receiver(post_save, sender=Size)
+def rebuild_cards_showing(sender, instance, **kwargs):
+    # Before a style is deleted, since SET_NULL then detaches its products without sending signals.
+    if sender is Style:
+        products = Product.objects.filter(style=instance)
+    else:
+        products = instance.product_set.all()
+    schedule_card_rebuild(list(products.values_list('pk', flat=True)))
+
+
+@receiver(m2m_changed, sender=Product.available_sizes.through)
+@receiver(m2m_changed, sender=Product.available_colors.through)
+def rebuild_cards_of_changed_choices(sender, instance, action, reverse, pk_set, **kwargs):
+    # The related managers run these inside a transaction, so even pre_clear rebuilds after the change.
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        product_ids = [instance.pk]
+    elif action == 'pre_clear':
+        product_ids = list(instance.product_set.values_list('pk', flat=True))
+    else:
+        product_ids = pk_set
+    schedule_card_rebuild(product_ids)
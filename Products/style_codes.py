@@ -0,0 +1,95 @@
+import secrets
+import string
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+STYLE_CODE_LENGTH = 10
+STYLE_CODE_ALPHABET = string.ascii_letters + string.digits
+STYLE_CODE_SPACE = len(STYLE_CODE_ALPHABET) ** STYLE_CODE_LENGTH
+
+# Attempts before a style code collision is reported as an IntegrityError.
+STYLE_CODE_RETRIES = 5
+
+
+def generate_style_code():
+    """
+    A random code from the OS CSPRNG, drawn as one integer below 62**10 and written in base 62.
+    Collisions are rare but possible.
+    """
+    number = secrets.randbelow(STYLE_CODE_SPACE)
+    digits = []
+    for _ in range(STYLE_CODE_LENGTH):
+        number, digit = divmod(number, len(STYLE_CODE_ALPHABET))
+        digits.append(STYLE_CODE_ALPHABET[digit])
+    return ''.join(digits)
+
+
+def taken_style_codes(codes):
+    Product = apps.get_model('Products', 'Product')
+    return set(Product.objects.filter(style_code__in=list(codes)).values_list('style_code', flat=True))
+
+
+class StyleCodeAllocator:
+    """
+    Hands out style codes from blocks that were checked against the database with one query each.
+
+        - ``allocate()`` serves single saves from the process-wide block and refills it when it runs dry,
+          so a thousand saves cost one lookup instead of one per save.
+
+        - ``allocate_many(n)`` reserves exactly ``n`` codes for bulk paths that bypass ``save()``.
+
+    A reserved code is only checked, not locked: two processes can still draw the same code, so writers
+    retry on IntegrityError (see ``Product.save`` and ``bulk_create_products``).
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size
+        self.block = []
+        self.lock = threading.Lock()
+
+    def reserve(self, count, exclude=()):
+        if not isinstance(exclude, (set, frozenset)):
+            exclude = set(exclude)
+        codes = set()
+        while len(codes) < count:
+            candidates = {generate_style_code() for _ in range(count - len(codes))} - exclude - codes
+            codes |= candidates - taken_style_codes(candidates)
+        return list(codes)
+
+    def allocate(self):
+        with self.lock:
+            if not self.block:
+                self.block = self.reserve(self.block_size or settings.STYLE_CODE_BLOCK_SIZE)
+            return self.block.pop()
+
+    def allocate_many(self, count, exclude=()):
+        return self.reserve(count, exclude) if count else []
+
+
+style_code_allocator = StyleCodeAllocator()
+
+
+def bulk_create_products(products, batch_size=1000, exclude=()):
+    """
+    ``bulk_create`` products, giving every product without a style code a reserved one, and
+    reallocating the codes that collided if another writer took them in the meantime.
+    """
+    Product = apps.get_model('Products', 'Product')
+    missing = [product for product in products if not product.style_code]
+    for product, code in zip(missing, style_code_allocator.allocate_many(len(missing), exclude)):
+        product.style_code = code
+
+    for attempt in range(STYLE_CODE_RETRIES):
+        try:
+            with transaction.atomic():
+                return Product.objects.bulk_create(products, batch_size=batch_size)
+        except IntegrityError:
+            taken = taken_style_codes(product.style_code for product in missing)
+            if not taken or attempt == STYLE_CODE_RETRIES - 1:
+                raise
+            collided = [product for product in missing if product.style_code in taken]
+            for product, code in zip(collided, style_code_allocator.allocate_many(len(collided), exclude)):
+                product.style_code = code
@@ -1,3 +1,487 @@
+import json
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+from .cards import get_card_documents, schedule_card_rebuild
+from .catalog import import_catalog
+from .models import (
+    Category, Color, FavouriteProduct, Product, ProductCard, ProductCooccurrence, ProductReview, SimilarProduct,
+    Size,
+)
+from .pagination import encode_cursor
+from .recommendations import refresh_similar_products
+from .style_codes import STYLE_CODE_RETRIES, StyleCodeAllocator, bulk_create_products
+
+
+class ProductImageDigestTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.category = Category.objects.create(name='Shoes')
+
+    def create_product(self, image):
+        return Product.objects.create(name='Runner', description='', price=10, quantity=1, category=self.category,
+                                      image=image)
+
+    def test_missing_image_leaves_digest_blank(self):
+        product = self.create_product('product_images/missing.jpg')
+
+        self.assertEqual(Product.objects.get(pk=product.pk).image_digest, '')
+
+    def test_only_a_new_image_is_hashed(self):
+        product = self.create_product(SimpleUploadedFile('runner.jpg', b'image bytes'))
+        self.assertEqual(len(product.image_digest), 64)
+
+        with mock.patch('Products.models.file_digest') as file_digest:
+            product = Product.objects.get(pk=product.pk)
+            product.quantity = 2
+            product.save()
+        file_digest.assert_not_called()
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        self.clothing = Category.objects.create(name='Clothing')
+        self.shoes = Category.objects.create(name='Shoes')
+        self.tops = Category.objects.create(name='Tops', parent_category=self.clothing)
+        self.shirts = Category.objects.create(name='Shirts', parent_category=self.tops)
+
+    def assertPath(self, category, *ancestors):
+        category.refresh_from_db()
+        self.assertEqual(category.path, ''.join(f'{node.pk}/' for node in (*ancestors, category)))
+        self.assertEqual(category.depth, len(ancestors))
+
+    def test_path_and_depth(self):
+        self.assertPath(self.clothing)
+        self.assertPath(self.tops, self.clothing)
+        self.assertPath(self.shirts, self.clothing, self.tops)
+
+    def test_move_updates_the_subtree(self):
+        self.tops.parent_category = self.shoes
+        self.tops.save()
+
+        self.assertPath(self.tops, self.shoes)
+        self.assertPath(self.shirts, self.shoes, self.tops)
+        self.assertEqual(list(self.clothing.descendants()), [])
+
+        self.tops.parent_category = None
+        self.tops.save()
+
+        self.assertPath(self.tops)
+        self.assertPath(self.shirts, self.tops)
+
+    def test_cycles_are_rejected(self):
+        for parent in [self.clothing, self.shirts]:
+            self.clothing.parent_category = parent
+            with self.assertRaises(ValidationError):
+                self.clothing.save()
+
+        self.assertPath(self.clothing)
+        self.assertPath(self.shirts, self.clothing, self.tops)
+
+    def test_saving_a_stale_instance_keeps_its_moved_path(self):
+        stale_shirts = Category.objects.get(pk=self.shirts.pk)
+        self.tops.parent_category = self.shoes
+        self.tops.save()
+
+        stale_shirts.name = 'Shirts & blouses'
+        stale_shirts.save()
+
+        self.assertPath(self.shirts, self.shoes, self.tops)
+        self.assertEqual(stale_shirts.path, self.shirts.path)
+
+    def test_moving_a_stale_instance_moves_its_current_subtree(self):
+        stale_tops = Category.objects.get(pk=self.tops.pk)
+        self.clothing.parent_category = self.shoes
+        self.clothing.save()
+
+        stale_tops.parent_category = None
+        stale_tops.save()
+
+        self.assertPath(self.tops)
+        self.assertPath(self.shirts, self.tops)
+        self.assertEqual(list(self.clothing.descendants()), [])
+
+
+class CatalogImportTests(TestCase):
+    HEADER = 'name,description,price,quantity,category,sizes,colors,image,style_code\n'
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Shoes')
+        Size.objects.bulk_create([Size(name='M'), Size(name='L')])
+        Color.objects.bulk_create([Color(name='red'), Color(name='blue')])
+
+    def import_csv(self, *lines):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f'{directory}/catalog.csv'
+        with open(path, 'w') as file:
+            file.write(self.HEADER + ''.join(f'{line}\n' for line in lines))
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_catalog(path)
+
+    def test_creates_products(self):
+        totals, errors = self.import_csv('Runner,Light,25.50,3,shoes,M|L,red,product_images/runner.jpg,RUNNER0001')
+
+        self.assertEqual((totals, errors), ({'rows': 1, 'created': 1, 'updated': 0}, []))
+        product = Product.objects.get(style_code='RUNNER0001')
+        self.assertEqual((product.name, product.price, product.category), ('Runner', Decimal('25.50'), self.category))
+        self.assertEqual(sorted(product.available_sizes.values_list('name', flat=True)), ['L', 'M'])
+
+    def test_new_products_need_an_image(self):
+        totals, errors = self.import_csv('Runner,,25,3,shoes,,,,', 'Boot,,40,1,shoes,,,product_images/boot.jpg,')
+
+        self.assertEqual(totals['created'], 1)
+        self.assertEqual(errors, [(2, 'image is required')])
+        self.assertEqual(list(Product.objects.values_list('name', flat=True)), ['Boot'])
+
+    def test_blank_columns_keep_existing_values(self):
+        self.import_csv('Runner,Light,25,3,shoes,M|L,red,product_images/runner.jpg,RUNNER0001')
+
+        totals, errors = self.import_csv(',,30,,,,,,RUNNER0001')
+
+        self.assertEqual((totals['updated'], errors), (1, []))
+        product = Product.objects.get(style_code='RUNNER0001')
+        self.assertEqual((product.name, product.description, product.price, product.quantity),
+                         ('Runner', 'Light', 30, 3))
+        self.assertEqual(product.image.name, 'product_images/runner.jpg')
+        self.assertEqual(product.category, self.category)
+        self.assertEqual(product.available_sizes.count(), 2)
+        self.assertEqual(list(product.available_colors.values_list('name', flat=True)), ['red'])
+
+    def test_filled_link_columns_replace_the_links(self):
+        self.import_csv('Runner,Light,25,3,shoes,M|L,red,product_images/runner.jpg,RUNNER0001')
+
+        self.import_csv(',,,,,L,blue,,RUNNER0001')
+
+        product = Product.objects.get(style_code='RUNNER0001')
+        self.assertEqual(list(product.available_sizes.values_list('name', flat=True)), ['L'])
+        self.assertEqual(list(product.available_colors.values_list('name', flat=True)), ['blue'])
+
+    def test_invalid_rows_are_reported(self):
+        totals, errors = self.import_csv(
+            'Runner,,abc,3,shoes,,,product_images/runner.jpg,',
+            'Runner,,25,3,hats,,,product_images/runner.jpg,',
+            'Runner,,25,3,shoes,S,,product_images/runner.jpg,',
+        )
+
+        self.assertEqual(totals['created'], 0)
+        self.assertEqual(errors, [
+            (2, 'price must be a number'), (3, "unknown category 'hats'"), (4, "unknown size 'S'"),
+        ])
+
+
+class StyleCodeTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Shoes')
+
+    def product(self, **fields):
+        return Product(name='Runner', description='', price=10, quantity=1, category=self.category,
+                       image='product_images/runner.jpg', **fields)
+
+    def test_two_allocators_never_store_the_same_code(self):
+        # Two processes whose blocks were both checked against the database before either of them wrote.
+        allocators = [StyleCodeAllocator(block_size=3), StyleCodeAllocator(block_size=3)]
+        codes = iter(['AAAAAAAAAA', 'BBBBBBBBBB', 'CCCCCCCCCC'] * 2 + [f'D{i:09d}' for i in range(20)])
+        with mock.patch('Products.style_codes.generate_style_code', side_effect=lambda: next(codes)):
+            for allocator in allocators:
+                allocator.block = allocator.reserve(3)
+            self.assertEqual(allocators[0].block, allocators[1].block)
+
+            for _ in range(3):
+                for allocator in allocators:
+                    with mock.patch('Products.models.style_code_allocator', allocator):
+                        self.product().save()
+
+        self.assertEqual(Product.objects.values('style_code').distinct().count(), 6)
+
+    def test_bulk_create_reallocates_codes_taken_meanwhile(self):
+        self.product(style_code='AAAAAAAAAA').save()
+        products = [self.product(), self.product()]
+
+        # The first reservation predates the other writer's insert of AAAAAAAAAA.
+        with mock.patch('Products.style_codes.style_code_allocator.allocate_many',
+                        side_effect=[['AAAAAAAAAA', 'BBBBBBBBBB'], ['CCCCCCCCCC']]) as allocate_many:
+            bulk_create_products(products)
+
+        self.assertEqual(allocate_many.call_args.args[0], 1)
+        self.assertEqual(sorted(product.style_code for product in products), ['BBBBBBBBBB', 'CCCCCCCCCC'])
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_bulk_create_gives_up_after_the_retries(self):
+        self.product(style_code='AAAAAAAAAA').save()
+
+        with mock.patch('Products.style_codes.style_code_allocator.allocate_many',
+                        return_value=['AAAAAAAAAA']) as allocate_many:
+            with self.assertRaises(IntegrityError):
+                bulk_create_products([self.product()])
+
+        # The first allocation and one per retry but the last, which gives up.
+        self.assertEqual(allocate_many.call_count, STYLE_CODE_RETRIES)
+        self.assertEqual(Product.objects.count(), 1)
+
+
+class ProductCardTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Shoes')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products = [
+                Product.objects.create(name=f'Runner {i}', description='', price=10 + i, quantity=i,
+                                       category=category, image=f'product_images/runner{i}.jpg')
+                for i in range(3)
+            ]
+
+    def test_rebuilds_in_a_transaction_are_batched(self):
+        with mock.patch('Products.cards.rebuild_product_cards') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                schedule_card_rebuild([1])
+                schedule_card_rebuild([2, 3])
+                self.assertFalse(rebuild.called)
+
+        self.assertEqual(len(callbacks), 1)
+        rebuild.assert_called_once_with({1, 2, 3})
+
+    def test_rolled_back_rebuild_is_dropped(self):
+        with mock.patch('Products.cards.rebuild_product_cards') as rebuild:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertRaises(ZeroDivisionError):
+                    with transaction.atomic():
+                        schedule_card_rebuild([1])
+                        1 / 0
+                schedule_card_rebuild([2])
+
+        self.assertEqual(len(callbacks), 1)
+        rebuild.assert_called_once_with({2})
+
+    def test_saves_rebuild_the_card_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].name = 'Trail runner'
+            self.products[0].save()
+
+        document = json.loads(ProductCard.objects.get(product=self.products[0]).document)
+        self.assertEqual((document['name'], document['in_stock']), ('Trail runner', False))
+
+    def test_missing_cards_are_built_on_read(self):
+        # As for products written by raw SQL.
+        ProductCard.objects.all().delete()
+
+        documents = get_card_documents(Product.objects.order_by('price'))
+
+        self.assertEqual([json.loads(document)['name'] for document in documents],
+                         ['Runner 0', 'Runner 1', 'Runner 2'])
+        self.assertEqual(ProductCard.objects.count(), 3)
+
+        ProductCard.objects.filter(product=self.products[1]).update(document='{"stored":true}')
+        self.assertEqual(get_card_documents(Product.objects.filter(pk=self.products[1].pk)), ['{"stored":true}'])
+
+
+class SimilarProductsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Shoes')
+        self.products = [
+            Product.objects.create(name=f'Runner {i}', description='', price=10 + i, quantity=1, category=category,
+                                   image=f'product_images/runner{i}.jpg')
+            for i in range(4)
+        ]
+        refresh_similar_products(full=True, batch_size=3)
+        self.assertEqual(SimilarProduct.objects.filter(product=self.products[0]).count(), 3)
+
+    def similar(self, **params):
+        return self.client.get(reverse('similar-products', args=[self.products[0].pk]), params)
+
+    def test_limit(self):
+        response = self.similar(limit=2)
+
+        self.assertEqual(response.status_code, 200)
+        similar_ids = [product['id'] for product in response.data['data']['similar_products']]
+        self.assertEqual(len(similar_ids), 2)
+        self.assertNotIn(str(self.products[0].pk), similar_ids)
+
+    def test_limit_below_one_returns_one_product(self):
+        for limit in [0, -1]:
+            response = self.similar(limit=limit)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['data']['similar_products']), 1)
+
+    def test_non_numeric_limit_is_rejected(self):
+        self.assertEqual(self.similar(limit='abc').status_code, 400)
+
+    def test_short_lists_are_not_recomputed_until_they_lose_a_neighbour(self):
+        # Three neighbours each, below the default k, is all this catalog has.
+        self.assertEqual(refresh_similar_products(batch_size=3), (0, 0))
+
+        self.products[3].delete()
+
+        self.assertEqual(refresh_similar_products(batch_size=3), (0, 3))
+        self.assertEqual(SimilarProduct.objects.filter(product=self.products[0]).count(), 2)
+        self.assertEqual(refresh_similar_products(batch_size=3), (0, 0))
+
+
+class BoughtTogetherTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Shoes')
+        self.product, *others = [
+            Product.objects.create(name=f'Runner {i}', description='', price=10, quantity=1, category=category,
+                                   image=f'product_images/runner{i}.jpg')
+            for i in range(3)
+        ]
+        for count, other in enumerate(others, start=1):
+            ProductCooccurrence.objects.create(product=self.product, other=other, count=count)
+        self.most_bought = others[-1]
+
+    def bought_together(self, **params):
+        return self.client.get(reverse('product-bought-together', args=[self.product.pk]), params)
+
+    def test_limit_below_one_returns_the_top_product(self):
+        for limit in [0, -1]:
+            response = self.bought_together(limit=limit)
+            self.assertEqual(response.status_code, 200)
+            bought_together = response.data['data']['bought_together']
+            self.assertEqual([product['id'] for product in bought_together], [str(self.most_bought.pk)])
+            self.assertEqual(bought_together[0]['orders_together'], 2)
+
+    def test_non_numeric_limit_is_rejected(self):
+        self.assertEqual(self.bought_together(limit='abc').status_code, 400)
+
+
+class FavouriteToggleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='ada@example.com', username='ada')
+        self.product = Product.objects.create(name='Runner', description='', price=10, quantity=1,
+                                              category=Category.objects.create(name='Shoes'),
+                                              image='product_images/runner.jpg')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('favorite-product-toggle', args=[self.product.pk])
+
+    def is_favourite(self):
+        response = self.client.get(reverse('favorite-product-status'), {'ids': str(self.product.pk)})
+        return response.data['data']['favourites'][str(self.product.pk)]
+
+    def test_put_is_idempotent(self):
+        for _ in range(2):
+            response = self.client.put(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIs(response.data['data']['is_favourite'], True)
+
+        self.assertEqual(FavouriteProduct.objects.filter(user=self.user, product=self.product).count(), 1)
+        self.assertIs(self.is_favourite(), True)
+
+    def test_delete_is_idempotent(self):
+        self.client.put(self.url)
+        self.assertIs(self.is_favourite(), True)
+
+        for _ in range(2):
+            response = self.client.delete(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIs(response.data['data']['is_favourite'], False)
+
+        self.assertFalse(FavouriteProduct.objects.filter(user=self.user).exists())
+        self.assertIs(self.is_favourite(), False)
+
+    def test_unknown_product(self):
+        response = self.client.put(reverse('favorite-product-toggle', args=['00000000-0000-0000-0000-000000000000']))
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductReviewPageTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='ada@example.com', username='ada')
+        self.product = Product.objects.create(name='Runner', description='', price=10, quantity=1,
+                                              category=Category.objects.create(name='Shoes'),
+                                              image='product_images/runner.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            for rating in [5, 3, 4]:
+                ProductReview.objects.create(product=self.product, user=user, rating=rating, review_text='')
+        self.url = reverse('product-reviews', args=[self.product.pk])
+
+    def test_cursor_walks_every_review_once(self):
+        response = self.client.get(self.url, {'page_size': 2, 'sort': 'highest'})
+        first_page = response.data['data']['reviews']
+        response = self.client.get(self.url, {'page_size': 2, 'sort': 'highest',
+                                               'cursor': response.data['data']['next_cursor']})
+
+        self.assertEqual([review['rating'] for review in first_page + response.data['data']['reviews']], [5, 4, 3])
+        self.assertIsNone(response.data['data']['next_cursor'])
+        self.assertEqual(response.data['data']['rating_summary']['total_reviews'], 3)
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ['not a cursor', encode_cursor(['2024-01-01T00:00:00']), encode_cursor(['yesterday', 1])]:
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_unknown_sort_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'sort': 'random'}).status_code, 400)
+
+
+class ProductPayloadTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='ada@example.com', username='ada')
+        self.category = Category.objects.create(name='Shoes')
+        self.product = Product.objects.create(name='Runner', description='', price=10, quantity=1,
+                                              category=self.category, image='product_images/runner.jpg')
+        ProductReview.objects.create(product=self.product, user=user, rating=5, review_text='Comfortable')
+
+    def listed_product(self, **params):
+        response = self.client.get(reverse('product-list-category', args=[self.category.pk]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['data']['products'][0]
+
+    def test_listings_embed_reviews_by_default(self):
+        product = self.listed_product()
+
+        self.assertEqual([review['review_text'] for review in product['reviews']], ['Comfortable'])
+        self.assertIn('description', product)
+
+    def test_fields_leave_reviews_out_unless_expanded(self):
+        self.assertEqual(set(self.listed_product(fields='name,price')), {'id', 'name', 'price'})
+        self.assertEqual(len(self.listed_product(fields='name', expand='reviews')['reviews']), 1)
+
+    def test_detail_embeds_the_first_review_page(self):
+        response = self.client.get(reverse('product-detail', args=[self.product.pk]))
+        details = response.data['data']['data']
+
+        self.assertNotIn('reviews', details['product'])
+        self.assertEqual(len(details['reviews']), 1)
+        self.assertIsNone(details['reviews_next_cursor'])
+
+
+class ProductAdminSearchTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser(email='admin@example.com', password='secret', username='admin')
+        self.client.force_login(admin)
+        category = Category.objects.create(name='Clothing')
+        self.shirt = Product.objects.create(name='Blue Shirt', description='', price=10, quantity=1,
+                                            category=category, image='product_images/shirt.jpg')
+
+    def search(self, term):
+        response = self.client.get(reverse('admin:Products_product_changelist'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['cl'].result_list)
+
+    def test_name_prefix_in_any_case(self):
+        for term in ['Blue', 'blue sh', 'BLUE SHIRT']:
+            self.assertEqual(self.search(term), [self.shirt], term)
+
+    def test_exact_style_code(self):
+        self.assertEqual(self.search(self.shirt.style_code), [self.shirt])
 
-# Create your tests here.
+    def test_no_substring_match(self):
+        self.assertEqual(self.search('shirt'), [])
@@ -1,10 +1,15 @@
 from django.urls import path
-from .views import ProductListCategory, ProductListSubCategory, CategoryList, SubCategoryList, ProductDetail,\
-    SimilarProductRecommendation, FavouriteProductList, FavouriteProductDetail, ProductSearch, \
-    ProductReviewList, ProductReviewDetail, ProductFilter
+from .views import ProductListCategory, ProductListSubCategory, CategoryList, SubCategoryList, CategoryTree, \
+    ProductDetail, SimilarProductRecommendation, FavouriteProductList, FavouriteProductDetail, ProductSearch, \
+    ProductReviewList, ProductReviewDetail, ProductFilter, ProductImageView, FrequentlyBoughtTogether, \
+    FavouriteProductToggle, FavouriteProductStatus, ProductReviews
 urlpatterns = [
     path('categories/', CategoryList.as_view(), name='category-list'),
+    path('categories/tree/', CategoryTree.as_view(), name='category-tree'),
     path('products/<uuid:product_id>', ProductDetail.as_view(), name='product-detail'),
+    path('products/<uuid:product_id>/bought-together/', FrequentlyBoughtTogether.as_view(),
+         name='product-bought-together'),
+    path('products/<uuid:product_id>/reviews/', ProductReviews.as_view(), name='product-reviews'),
     path('subcategories/', SubCategoryList.as_view(), name='subcategory-list'),
     path('category/<int:category_id>/', ProductListCategory.as_view(), name='product-list-category'),
     path('subcategory/<int:subcategory_id>/', ProductListSubCategory.as_view(), name='product-list-subcategory'),
@@ -13,7 +18,11 @@ urlpatterns = [
     path('favorite-products/', FavouriteProductList.as_view(), name='favorite-product-list'),
     path('favorite-products/<int:favorite_product_id>/', FavouriteProductDetail.as_view(),
          name='favorite-product-detail'),
+    path('favorite-products/status/', FavouriteProductStatus.as_view(), name='favorite-product-status'),
+    path('favorite-products/product/<uuid:product_id>/', FavouriteProductToggle.as_view(),
+         name='favorite-product-toggle'),
     path('product-reviews/', ProductReviewList.as_view(), name='product-review-list'),
     path('product-reviews/<int:review_id>/', ProductReviewDetail.as_view(), name='product-review-detail'),
     path('product-filter/', ProductFilter.as_view(), name='product-filter'),
+    path('images/<slug:digest>/<int:width>.<str:fmt>', ProductImageView.as_view(), name='product-image'),
 ]
@@ -1,14 +1,96 @@
 from rest_framework import status
-from utils import custom_response
+from imaging import content_type_for
+from utils import custom_json_response, custom_response
+from Zentoria.media import file_response
+from Zentoria.serializers import requested_fields
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.db.models import QuerySet, prefetch_related_objects
 from django.shortcuts import get_object_or_404
 from .models import Category, SubCategory, Product, FavouriteProduct, Color, Size, ProductReview
 from .serializers import (
     CategorySerializer, SubCategorySerializer, ProductSerializer, FavouriteProductSerializer, ColorSerializer,
     SizeSerializer, ProductReviewSerializer
 )
+from .cards import encode_card_list, get_card_documents
+from .categories import get_category_tree
+from .cooccurrence import get_bought_together
+from .favourites import add_favourite, get_favourite_ids, is_favourite, remove_favourite
+from .images import available_formats, get_derivative
 from .permissions import IsAuthorOrReadOnly
+from .recommendations import get_similar_products
+from .reviews import get_rating_summary, get_review_page
+
+
+def include_descendants(request):
+    return request.query_params.get('descendants', '').lower() in ('1', 'true')
+
+
+def review_page_params(request):
+    try:
+        page_size = int(request.query_params.get('page_size', settings.REVIEW_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.REVIEW_PAGE_SIZE
+    page_size = max(1, min(page_size, settings.REVIEW_MAX_PAGE_SIZE))
+    return request.query_params.get('sort', 'newest'), request.query_params.get('cursor'), page_size
+
+
+def result_limit(request, maximum, default=4):
+    """
+    ``?limit=`` clamped to ``1..maximum``; raises ``ValueError`` when it is not a whole number.
+    """
+    try:
+        limit = int(request.query_params.get('limit', default))
+    except ValueError:
+        raise ValueError("limit must be a whole number")
+    return max(1, min(limit, maximum))
+
+
+def favourites_context(request):
+    return {'favourite_ids': get_favourite_ids(request.user)}
+
+
+def product_serializer(request, products, many=True):
+    """
+    ``ProductSerializer`` shaped by ``?fields=`` and ``?expand=``, with the favourite flags in its context.
+    Lists embed reviews unless ``?fields=`` is given; a single product only with ``?expand=reviews``.
+
+    Querysets are narrowed to the columns and relations the kept fields read; lists of instances get
+    whatever prefetches they are still missing.
+    """
+    fields, expand = requested_fields(request)
+    if many and fields is None:
+        # Listings have always embedded each product's reviews; only clients shaping the payload opt out.
+        expand = [*expand, 'reviews']
+    if isinstance(products, QuerySet):
+        products = ProductSerializer.optimize(products, fields, expand)
+    elif many:
+        _, _, prefetch = ProductSerializer.related_lookups(fields, expand)
+        prefetch_related_objects(products, *prefetch)
+    return ProductSerializer(products, many=many, fields=fields, expand=expand, context=favourites_context(request))
+
+
+def wants_cards(request):
+    return request.query_params.get('view') == 'card'
+
+
+def cards_data(products):
+    """
+    The stored listing cards of ``products`` as an encoded ``{"products": [...]}`` payload, and their count.
+    """
+    documents = get_card_documents(products)
+    return f'{{"products":{encode_card_list(documents)}}}', len(documents)
+
+
+def in_category_tree(products, category_id):
+    category = Category.objects.filter(id=category_id).only('path').first()
+    if category is None:
+        return products.none()
+    return products.in_category_tree(category)
 
 
 class ProductListCategory(APIView):
@@ -16,6 +98,11 @@ class ProductListCategory(APIView):
     API endpoint for retrieving a list of products by category.
 
         - Allows users to get a list of products based on the specified category.
+        - With ``?descendants=true`` the products of every descendant category are included.
+        - Each product embeds its reviews unless ``?fields=`` limits it to the listed fields
+          (``?expand=reviews`` keeps them).
+        - ``?view=card`` returns the precomputed listing cards instead (id, name, price, thumbnail, style,
+          colors, sizes, rating and stock flag), served without serializing the products.
 
     Handles GET requests for retrieving products by category ID.
 
@@ -27,10 +114,19 @@ class ProductListCategory(APIView):
             Response: JSON response containing a list of products in the specified category.
 
     """
+    read_replica = True
+
     def get(self, request, category_id):
         try:
-            products = Product.objects.filter(category=category_id)
-            serializer = ProductSerializer(products, many=True)
+            if include_descendants(request):
+                products = in_category_tree(Product.objects.all(), category_id)
+            else:
+                products = Product.objects.filter(category=category_id)
+            if wants_cards(request):
+                data, count = cards_data(products)
+                message = "List of Products by Category" if count else "No products found"
+                return custom_json_response(data, message, status.HTTP_200_OK, "success")
+            serializer = product_serializer(request, products)
             data = {
                 "products": serializer.data
             }
@@ -50,6 +146,8 @@ class ProductListSubCategory(APIView):
     API endpoint for retrieving a list of products by subcategory.
 
         - Allows users to get a list of products based on the specified subcategory.
+        - Each product embeds its reviews unless ``?fields=`` limits it to the listed fields
+          (``?expand=reviews`` keeps them).
 
     Handles GET requests for retrieving products by subcategory ID.
 
@@ -61,10 +159,12 @@ class ProductListSubCategory(APIView):
             Response: JSON response containing a list of products in the specified subcategory.
 
     """
+    read_replica = True
+
     def get(self, request, subcategory_id):
         try:
             products = Product.objects.filter(subcategory=subcategory_id)
-            serializer = ProductSerializer(products, many=True)
+            serializer = product_serializer(request, products)
             data = {
                 "products": serializer.data
             }
@@ -94,6 +194,8 @@ class CategoryList(APIView):
             Response: JSON response containing a list of available categories.
 
     """
+    read_replica = True
+
     def get(self, request):
         try:
             categories = Category.objects.all()
@@ -126,6 +228,8 @@ class SubCategoryList(APIView):
             Response: JSON response containing a list of available subcategories.
 
     """
+    read_replica = True
+
     def get(self, request):
         try:
             subcategories = SubCategory.objects.all()
@@ -143,11 +247,47 @@ class SubCategoryList(APIView):
             return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
 
+class CategoryTree(APIView):
+    """
+    API endpoint for retrieving the full category tree.
+
+        - Returns every top-level category with its child categories and subcategories nested inside,
+          replacing separate calls to the category and subcategory lists.
+        - Served from the cache and rebuilt after any category or subcategory change.
+
+    Handles GET requests for retrieving the category tree.
+
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Response: JSON response containing the nested category tree.
+
+    """
+    read_replica = True
+
+    def get(self, request):
+        try:
+            data = {
+                "categories": get_category_tree()
+            }
+            return custom_response(data, "Category tree", status.HTTP_200_OK, "success")
+        except Exception as e:
+            data = {
+                "error_message": f"An error occurred while retrieving the category tree: {str(e)}",
+            }
+            return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
+
+
 class ProductDetail(APIView):
     """
     API endpoint for retrieving detailed information about a specific product.
 
         - Allows users to get details about a product, including its reviews, ratings, colors, and sizes.
+        - Only the newest page of reviews is embedded, with ``reviews_next_cursor`` for the rest
+          (see the product reviews endpoint); ``?lite=true`` leaves reviews out entirely.
+        - The rating average and 1-5 star histogram come from the per-product summary table.
+        - ``?fields=`` limits the product to the listed fields and ``?expand=reviews`` embeds all of its reviews.
 
     Handles GET requests for retrieving product details.
 
@@ -159,10 +299,14 @@ class ProductDetail(APIView):
             Response: JSON response containing detailed information about the requested product.
 
     """
+    read_replica = True
+
     def get(self, request, product_id):
         try:
-            product = get_object_or_404(Product, id=product_id)
-            serializer = ProductSerializer(product)
+            fields, expand = requested_fields(request)
+            products = ProductSerializer.optimize(Product.objects.all(), fields, expand)
+            product = get_object_or_404(products, id=product_id)
+            serializer = product_serializer(request, product, many=False)
 
             colors = product.available_colors.all()
             sizes = product.available_sizes.all()
@@ -170,26 +314,23 @@ class ProductDetail(APIView):
             color_serializer = ColorSerializer(colors, many=True)
             size_serializer = SizeSerializer(sizes, many=True)
 
-            product_reviews = product.reviews.all()
-            product_review_serializer = ProductReviewSerializer(product_reviews, many=True)
-
-            total_reviews = product_reviews.count()
-            if total_reviews > 0:
-                total_rating = sum(review.rating for review in product_reviews)
-                average_rating = total_rating / total_reviews
-            else:
-                average_rating = 0
+            rating_summary = get_rating_summary(product.id)
+            details = {
+                "product": serializer.data,
+                "colors": color_serializer.data,
+                "sizes": size_serializer.data,
+                "average_rating": rating_summary["average_rating"],
+                "rating_summary": rating_summary,
+            }
+            if request.query_params.get('lite', '').lower() not in ('1', 'true'):
+                reviews, next_cursor = get_review_page(product.reviews.all(), page_size=settings.REVIEW_PAGE_SIZE)
+                details["reviews"] = ProductReviewSerializer(reviews, many=True).data
+                details["reviews_next_cursor"] = next_cursor
 
             response_data = {
                 "status_code": 200,
                 "message": "Product details",
-                "data": {
-                    "product": serializer.data,
-                    "colors": color_serializer.data,
-                    "sizes": size_serializer.data,
-                    "reviews": product_review_serializer.data,
-                    "average_rating": average_rating,
-                },
+                "data": details,
             }
             return custom_response(response_data, "Product details retrieved successfully", status.HTTP_200_OK,
                                    "success")
@@ -206,6 +347,10 @@ class SimilarProductRecommendation(APIView):
     API endpoint for recommending similar products based on a given product.
 
        - Allows users to get recommendations for products similar to the specified product.
+       - Neighbours are precomputed by the ``refresh_similar_products`` command, so this is a single
+         indexed lookup; ``?limit=`` (default 4) is clamped to ``1..SIMILAR_PRODUCTS_TOP_K``.
+       - Each product embeds its reviews unless ``?fields=`` limits it to the listed fields
+         (``?expand=reviews`` keeps them).
 
     Handles GET requests for recommending similar products.
 
@@ -217,22 +362,26 @@ class SimilarProductRecommendation(APIView):
            Response: JSON response containing a list of recommended similar products.
 
     """
-    def get(self, request, product_id):
-        try:
-            current_product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            return custom_response({}, "Product not found", status.HTTP_200_OK, "success")
+    read_replica = True
 
+    def get(self, request, product_id):
         try:
-            similar_products = Product.objects.filter(
-                category = current_product,
-                is_deleted='active',
-                admin_status='approved',
-            ).exclude(id=product_id)
-
-            recommended_products = similar_products[:4]
-
-            serializer = ProductSerializer(recommended_products, many=True)
+            try:
+                limit = result_limit(request, settings.SIMILAR_PRODUCTS_TOP_K)
+            except ValueError as e:
+                return custom_response({"error_message": str(e)}, "Bad request", status.HTTP_400_BAD_REQUEST, "error")
+
+            recommended_products = get_similar_products(product_id, limit)
+            if not recommended_products:
+                # Not refreshed yet (e.g. a new product): fall back to the rest of its category.
+                current_product = Product.objects.filter(id=product_id).only('category_id').first()
+                if current_product is None:
+                    return custom_response({}, "Product not found", status.HTTP_200_OK, "success")
+                recommended_products = (
+                    Product.objects.filter(category_id=current_product.category_id).exclude(id=product_id)[:limit]
+                )
+
+            serializer = product_serializer(request, recommended_products)
 
             data = {
                 "similar_products": serializer.data
@@ -246,11 +395,58 @@ class SimilarProductRecommendation(APIView):
             return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
 
+class FrequentlyBoughtTogether(APIView):
+    """
+    API endpoint for the products most often ordered together with a given product.
+
+       - Reads the co-occurrence index built from orders by the ``build_cooccurrence_index`` command,
+         most frequent first, each with the number of orders the two products shared.
+       - ``?limit=`` (default 4) is clamped to ``1..COOCCURRENCE_TOP_N``.
+       - Each product embeds its reviews unless ``?fields=`` limits it to the listed fields
+         (``?expand=reviews`` keeps them).
+
+    Handles GET requests for frequently bought together products.
+
+       Args:
+           request: The HTTP request object.
+           product_id: The ID of the product whose companions are requested.
+
+       Returns:
+           Response: JSON response containing the products bought together with the given product.
+
+    """
+    read_replica = True
+
+    def get(self, request, product_id):
+        try:
+            try:
+                limit = result_limit(request, settings.COOCCURRENCE_TOP_N)
+            except ValueError as e:
+                return custom_response({"error_message": str(e)}, "Bad request", status.HTTP_400_BAD_REQUEST, "error")
+
+            bought_together = get_bought_together(product_id, limit)
+            products = product_serializer(request, [product for product, _ in bought_together]).data
+
+            data = {
+                "bought_together": [
+                    {**product, "orders_together": count} for product, (_, count) in zip(products, bought_together)
+                ]
+            }
+            return custom_response(data, "Frequently bought together", status.HTTP_200_OK, "success")
+        except Exception as e:
+            data = {
+                "error_message": f"An error occurred while retrieving frequently bought together products: {str(e)}",
+            }
+            return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
+
+
 class ProductSearch(APIView):
     """
     API endpoint for searching products based on a provided query.
 
         - Allows users to search for products by name using a search query.
+        - Each product embeds its reviews unless ``?fields=`` limits it to the listed fields
+          (``?expand=reviews`` keeps them).
 
     Handles GET requests for searching products.
 
@@ -261,11 +457,13 @@ class ProductSearch(APIView):
             Response: JSON response containing a list of products matching the search query.
 
     """
+    read_replica = True
+
     def get(self, request):
         search_query = request.query_params.get('search', '')
         try:
             products = Product.objects.filter(name__icontains=search_query)
-            serializer = ProductSerializer(products, many=True)
+            serializer = product_serializer(request, products)
             data = {
                 "products": serializer.data
             }
@@ -284,6 +482,11 @@ class ProductFilter(APIView):
     API endpoint for filtering products based on various criteria.
 
        - Allows users to filter products by category, subcategory, price range, and other parameters.
+       - With ``?descendants=true`` the category filter covers the category's whole subtree.
+       - Each product embeds its reviews unless ``?fields=`` limits it to the listed fields
+         (``?expand=reviews`` keeps them).
+       - ``?view=card`` returns the precomputed listing cards instead (id, name, price, thumbnail, style,
+         colors, sizes, rating and stock flag), served without serializing the products.
 
     Handles GET requests for filtering products.
 
@@ -294,6 +497,8 @@ class ProductFilter(APIView):
            Response: JSON response containing a list of filtered products.
 
     """
+    read_replica = True
+
     def get(self, request):
         try:
             category_id = request.query_params.get('category_id')
@@ -307,7 +512,9 @@ class ProductFilter(APIView):
 
             products = Product.objects.all()
 
-            if category_id:
+            if category_id and include_descendants(request):
+                products = in_category_tree(products, category_id)
+            elif category_id:
                 products = products.filter(category=category_id)
 
             if subcategory_id:
@@ -331,7 +538,13 @@ class ProductFilter(APIView):
             if show_only:
                 products = products.filter(show_only=show_only)
 
-            serializer = ProductSerializer(products, many=True)
+            if wants_cards(request):
+                data, count = cards_data(products)
+                if not count:
+                    return custom_json_response(data, "No products found", status.HTTP_404_NOT_FOUND, "error")
+                return custom_json_response(data, "Filtered Products", status.HTTP_200_OK, "success")
+
+            serializer = product_serializer(request, products)
 
             data = {
                 "products": serializer.data
@@ -350,6 +563,9 @@ class ProductFilter(APIView):
 
 
 class FavouriteProductList(APIView):
+    read_replica = True
+    permission_classes = [IsAuthenticated]
+
     def get(self, request):
         """
         API endpoint for retrieving a list of favorite products for the authenticated user.
@@ -384,6 +600,7 @@ class FavouriteProductList(APIView):
         API endpoint for adding a product to the user's favorites.
 
             - Allows users to add a product to their list of favorite products.
+            - Idempotent: adding a product that is already a favourite returns the existing favourite with 200.
 
         Handles POST requests for adding a favorite product.
 
@@ -394,17 +611,18 @@ class FavouriteProductList(APIView):
                 Response: JSON response indicating the success or failure of adding a favorite product.
 
         """
-        data = request.data
-        data['user'] = request.user  # Set the current user as the owner
-        serializer = FavouriteProductSerializer(data=data)
+        serializer = FavouriteProductSerializer(data={'product': request.data.get('product'), 'user': request.user.pk})
         try:
-            if serializer.is_valid():
-                serializer.save()
-                data = {
-                    "favorite_product": serializer.data
-                }
+            if not serializer.is_valid():
+                return custom_response(serializer.errors, "Bad request", status.HTTP_400_BAD_REQUEST, "error")
+
+            favourite, created = add_favourite(request.user, serializer.validated_data['product'].pk)
+            data = {
+                "favorite_product": FavouriteProductSerializer(favourite).data
+            }
+            if created:
                 return custom_response(data, "Favorite product added", status.HTTP_201_CREATED, "success")
-            return custom_response(serializer.errors, "Bad request", status.HTTP_400_BAD_REQUEST, "error")
+            return custom_response(data, "Product is already a favorite", status.HTTP_200_OK, "success")
         except Exception as e:
             data = {
                 "error_message": f"An error occurred while adding a favorite product: {str(e)}",
@@ -417,6 +635,7 @@ class FavouriteProductDetail(APIView):
     API endpoint for managing individual favorite products.
 
         - Allows users to add or remove products from their favorites.
+        - Idempotent: removing a favourite that does not exist (or was already removed) also succeeds.
 
     Handles DELETE requests for removing a favorite product.
 
@@ -428,11 +647,14 @@ class FavouriteProductDetail(APIView):
             Response: JSON response indicating the success or failure of removing a favorite product.
 
     """
+    read_replica = True
+    permission_classes = [IsAuthenticated]
+
     def delete(self, request, favorite_product_id):
         user = request.user
         try:
-            favorite_product = get_object_or_404(FavouriteProduct, id=favorite_product_id, user=user)
-            favorite_product.delete()
+            for favorite_product in FavouriteProduct.objects.filter(id=favorite_product_id, user=user):
+                favorite_product.delete()
             return custom_response({}, "Favorite product removed", status.HTTP_204_NO_CONTENT, "success")
         except Exception as e:
             data = {
@@ -441,11 +663,104 @@ class FavouriteProductDetail(APIView):
             return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
 
+class FavouriteProductToggle(APIView):
+    """
+    API endpoint for adding or removing a favourite by product ID.
+
+        - PUT marks the product as a favourite and DELETE unmarks it; both are idempotent, so clients can
+          send the desired state without knowing the current one.
+
+    Handles PUT and DELETE requests for a product's favourite state.
+
+        Args:
+            request: The HTTP request object.
+            product_id: The ID of the product to favourite or unfavourite.
+
+        Returns:
+            Response: JSON response with the product's favourite state.
+
+    """
+    read_replica = True
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, product_id):
+        try:
+            if not Product.objects.filter(id=product_id).exists():
+                return custom_response({}, "Product not found", status.HTTP_404_NOT_FOUND, "error")
+            add_favourite(request.user, product_id)
+            data = {
+                "product": str(product_id),
+                "is_favourite": True,
+            }
+            return custom_response(data, "Favorite product added", status.HTTP_200_OK, "success")
+        except Exception as e:
+            data = {
+                "error_message": f"An error occurred while adding a favorite product: {str(e)}",
+            }
+            return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
+
+    def delete(self, request, product_id):
+        try:
+            remove_favourite(request.user, product_id)
+            data = {
+                "product": str(product_id),
+                "is_favourite": False,
+            }
+            return custom_response(data, "Favorite product removed", status.HTTP_200_OK, "success")
+        except Exception as e:
+            data = {
+                "error_message": f"An error occurred while removing a favorite product: {str(e)}",
+            }
+            return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
+
+
+class FavouriteProductStatus(APIView):
+    """
+    API endpoint for checking which of a set of products the user has favourited.
+
+        - Answers a whole listing page (``?ids=<uuid>,<uuid>,...``, at most 100) from one cached lookup.
+        - Anonymous users get ``false`` for every product.
+
+    Handles GET requests for bulk favourite checks.
+
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Response: JSON response mapping each product ID to whether it is a favourite.
+
+    """
+    read_replica = True
+
+    def get(self, request):
+        try:
+            product_ids = [product_id for product_id in request.query_params.get('ids', '').split(',') if product_id]
+            if len(product_ids) > 100:
+                return custom_response({}, "At most 100 ids can be checked at once", status.HTTP_400_BAD_REQUEST,
+                                       "error")
+            try:
+                favourites = is_favourite(request.user, product_ids)
+            except ValueError:
+                return custom_response({}, "ids must be product UUIDs", status.HTTP_400_BAD_REQUEST, "error")
+
+            data = {
+                "favourites": favourites
+            }
+            return custom_response(data, "Favourite status", status.HTTP_200_OK, "success")
+        except Exception as e:
+            data = {
+                "error_message": f"An error occurred while checking favorite products: {str(e)}",
+            }
+            return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
+
+
 class ProductReviewList(APIView):
     """
     API endpoint for retrieving a list of product reviews.
 
-        - Allows users to get a list of reviews for products.
+        - Allows users to get a list of reviews for products, optionally only those of ``?product=``.
+        - Paginated by cursor: pass ``next_cursor`` back as ``?cursor=``; ``?sort=`` is one of newest
+          (default), oldest, highest or lowest, and ``?page_size=`` is capped at ``REVIEW_MAX_PAGE_SIZE``.
 
     Handles GET requests for retrieving product reviews.
 
@@ -455,13 +770,22 @@ class ProductReviewList(APIView):
         Returns:
             Response: JSON response containing a list of product reviews.
     """
+    read_replica = True
     permission_classes = [IsAuthorOrReadOnly]
     def get(self, request):
         try:
             product_reviews = ProductReview.objects.all()
+            sort, cursor, page_size = review_page_params(request)
+            try:
+                if request.query_params.get('product'):
+                    product_reviews = product_reviews.filter(product_id=request.query_params['product'])
+                product_reviews, next_cursor = get_review_page(product_reviews, sort, cursor, page_size)
+            except (ValueError, ValidationError) as e:
+                return custom_response({"error_message": str(e)}, "Bad request", status.HTTP_400_BAD_REQUEST, "error")
             serializer = ProductReviewSerializer(product_reviews, many=True)
             data = {
-                "product_reviews": serializer.data
+                "product_reviews": serializer.data,
+                "next_cursor": next_cursor,
             }
             return custom_response(data, "List of Product Reviews", status.HTTP_200_OK, "success")
 
@@ -472,6 +796,51 @@ class ProductReviewList(APIView):
             return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
 
+class ProductReviews(APIView):
+    """
+    API endpoint for paging through the reviews of one product.
+
+        - Reviews are paginated by cursor on the ``(product, review_date)`` and ``(product, rating)`` indexes:
+          pass ``next_cursor`` back as ``?cursor=`` to get the next page.
+        - ``?sort=`` is one of newest (default), oldest, highest or lowest; ``?page_size=`` defaults to
+          ``REVIEW_PAGE_SIZE``.
+        - Includes the product's rating summary (average, total and 1-5 star histogram).
+
+    Handles GET requests for retrieving a product's reviews.
+
+        Args:
+            request: The HTTP request object.
+            product_id: The ID of the product whose reviews are requested.
+
+        Returns:
+            Response: JSON response containing a page of reviews and the rating summary.
+
+    """
+    read_replica = True
+
+    def get(self, request, product_id):
+        try:
+            sort, cursor, page_size = review_page_params(request)
+            try:
+                reviews, next_cursor = get_review_page(
+                    ProductReview.objects.filter(product_id=product_id), sort, cursor, page_size,
+                )
+            except (ValueError, ValidationError) as e:
+                return custom_response({"error_message": str(e)}, "Bad request", status.HTTP_400_BAD_REQUEST, "error")
+
+            data = {
+                "reviews": ProductReviewSerializer(reviews, many=True).data,
+                "next_cursor": next_cursor,
+                "rating_summary": get_rating_summary(product_id),
+            }
+            return custom_response(data, "Product reviews", status.HTTP_200_OK, "success")
+        except Exception as e:
+            data = {
+                "error_message": f"An error occurred while retrieving product reviews: {str(e)}",
+            }
+            return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
+
+
 class ProductReviewDetail(APIView):
     """
     API endpoint for managing individual product reviews.
@@ -487,6 +856,8 @@ class ProductReviewDetail(APIView):
             Response: JSON response containing information about the requested product review operation.
 
     """
+    read_replica = True
+
     def post(self, request):
         """
         Add a new product review.
@@ -592,3 +963,44 @@ class ProductReviewDetail(APIView):
             }
             return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
+
+
+class ProductImageView(APIView):
+    """
+    API endpoint for serving resized and format-converted product images.
+
+        - Variants are rendered on first request and kept in an LRU-bounded disk cache.
+        - URLs contain the SHA-256 of the original image, so responses are cached by clients forever.
+
+    Handles GET requests for a product image variant.
+
+        Args:
+            request: The HTTP request object.
+            digest: The SHA-256 digest of the original product image.
+            width: One of the widths in ``PRODUCT_IMAGE_WIDTHS``.
+            fmt: One of the available formats (webp, jpeg, and avif when the codec is installed).
+
+        Returns:
+            Response: The encoded image, or 404 if the digest, width or format is unknown.
+
+    """
+    read_replica = True
+    authentication_classes = []
+
+    def get(self, request, digest, width, fmt):
+        if width not in settings.PRODUCT_IMAGE_WIDTHS or fmt not in available_formats():
+            return custom_response({}, "Image variant not found", status.HTTP_404_NOT_FOUND, "error")
+
+        etag = f'"{digest}-{width}-{fmt}"'
+        cache_control = f'public, max-age={settings.PRODUCT_IMAGE_MAX_AGE}, immutable'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            path = get_derivative(digest, width, fmt)
+            if path is None:
+                return custom_response({}, "Image variant not found", status.HTTP_404_NOT_FOUND, "error")
+            response = file_response(request, path, content_type=content_type_for(fmt), etag=etag)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
@@ -0,0 +1,32 @@
+"""
+Shared by the apps' ``ModelAdmin`` classes.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    ``Paginator`` for admin change lists over large tables.
+
+    An unfiltered list takes its count from PostgreSQL's planner estimate (``pg_class.reltuples``, kept current
+    by autovacuum) once that passes ``ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows, instead of a ``COUNT(*)`` that
+    reads the whole table on every page. Filtered and searched lists, small tables and other databases are
+    counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                               [connection.ops.quote_name(queryset.model._meta.db_table)])
+                row = cursor.fetchone()
+            # -1 until the table is first vacuumed or analyzed.
+            if row and row[0] >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return int(row[0])
+        return super().count
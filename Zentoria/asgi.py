@@ -3,6 +3,15 @@ ASGI config for Zentoria project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This entry point is opt-in. The procfile and Vercel deployments serve ``Zentoria.wsgi`` and should keep doing
+so unless most of the traffic goes to the async endpoints (payments, Google sign-in, registration mail):
+
+    gunicorn Zentoria.asgi -k uvicorn.workers.UvicornWorker -w 2
+
+Views built on ``Zentoria.views.AsyncAPIView`` wait on the network on the event loop there, but every sync
+view, the whole catalog included, is handed to a thread. In benchmarks/async_views.py on one CPU, payments
+went from 6 to 44 requests/s while the category list fell from 229 to 102 requests/s.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -14,3 +23,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Zentoria.settings')
 
 application = get_asgi_application()
+
+# Imported once the apps are loaded. Every request of a worker runs on one event loop here, so outgoing HTTP
+# calls share a client and its connections.
+from Zentoria.http import share_http_clients  # noqa: E402
+
+share_http_clients()
@@ -0,0 +1,46 @@
+"""
+A per-process thread pool for work that should not hold up the response (image variants, cache eviction).
+
+    BACKGROUND_WORKERS  threads in the pool
+
+Tasks are lost if the process exits or is frozen first, so anything a response depends on must run inline.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _run_task(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, '__name__', func))
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            # Two requests may race to the first task; only one of them creates the pool.
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.BACKGROUND_WORKERS, thread_name_prefix='background')
+    return _executor
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run ``func`` on the shared worker pool, off the request thread.
+
+    The pool has ``BACKGROUND_WORKERS`` threads per process; each task closes its own database connections.
+    """
+    return get_executor().submit(_run_task, func, *args, **kwargs)
@@ -0,0 +1,47 @@
+"""
+Outgoing HTTP calls from async views (payment gateway, Google), through ``httpx.AsyncClient``.
+"""
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+_share_http_clients = False
+_http_clients = weakref.WeakKeyDictionary()
+
+
+def share_http_clients():
+    """
+    Called by the ASGI entry point, where one event loop serves every request of a worker, so ``http_client``
+    can keep one client per loop and calls to the same service reuse their connections.
+    """
+    global _share_http_clients
+    _share_http_clients = True
+
+
+@asynccontextmanager
+async def http_client():
+    """
+    An ``httpx.AsyncClient`` for the duration of the block::
+
+        async with http_client() as client:
+            response = await client.get(url)
+
+    Under ASGI it is the running loop's shared client. Under WSGI Django runs each async view in an event loop
+    of its own that is discarded afterwards, so the client is opened for the block and closed with it.
+    """
+    # Imported here rather than at startup, where httpx and anyio cost about 50 ms to a process that may
+    # never call out.
+    import httpx
+
+    if not _share_http_clients:
+        async with httpx.AsyncClient(timeout=settings.HTTP_CLIENT_TIMEOUT) as client:
+            yield client
+        return
+
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        client = _http_clients[loop] = httpx.AsyncClient(timeout=settings.HTTP_CLIENT_TIMEOUT)
+    yield client
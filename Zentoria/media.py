@@ -0,0 +1,140 @@
+"""
+Media files (product images, profile pictures and their variants) with cache validators, byte ranges and, behind
+nginx or Apache, zero-copy delivery by the web server instead of Django.
+
+    MEDIA_SENDFILE               '' to send the file from Django, where gunicorn still uses sendfile() for whole
+                                 files and open-ended ranges; 'nginx' for X-Accel-Redirect; 'apache' for X-Sendfile
+    MEDIA_ACCEL_REDIRECT_PREFIX  internal nginx location aliased to MEDIA_ROOT (default /protected-media/)
+    MEDIA_MAX_AGE                seconds clients may reuse a media file before revalidating it
+
+With MEDIA_SENDFILE=nginx, next to the location proxying to the app:
+
+    location /protected-media/ {
+        internal;
+        alias /path/to/media/;
+    }
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+_byte_range = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        # Weak comparison, as for GET in RFC 9110.
+        etag = etag.removeprefix('W/')
+        return any(tag == '*' or tag.removeprefix('W/') == etag for tag in parse_etags(if_none_match))
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def requested_range(request, etag, size):
+    """
+    ``(start, end)`` of a single satisfiable byte range, ``None`` for the whole file, or ``False`` when the range
+    cannot be satisfied. Several ranges in one request are answered with the whole file.
+    """
+    header = request.headers.get('Range')
+    if not header or size == 0:
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range is not None and if_range != etag:
+        return None
+    match = _byte_range.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def sendfile_response(path, content_type):
+    """
+    An empty response telling the web server to send ``path`` itself, or ``None`` when it cannot.
+    """
+    if settings.MEDIA_SENDFILE == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+    if settings.MEDIA_SENDFILE == 'nginx':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        if relative.startswith(os.pardir):
+            return None
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + relative.replace(os.sep, '/')
+        return response
+    return None
+
+
+def file_response(request, path, content_type=None, etag=None):
+    """
+    Serve ``path`` with ETag and Last-Modified validators and single byte ranges.
+
+    Raises ``FileNotFoundError`` when the file is gone.
+    """
+    stat = os.stat(path)
+    etag = etag or file_etag(stat)
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponse(status=304)
+    else:
+        # The web server answers conditional and range requests itself.
+        response = sendfile_response(path, content_type)
+    if response is None:
+        byte_range = requested_range(request, etag, stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+        elif byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            file = open(path, 'rb')
+            file.seek(start)
+            if end == stat.st_size - 1:
+                # Streams from the offset to the end, which gunicorn still hands to sendfile().
+                response = FileResponse(file, content_type=content_type, status=206)
+            else:
+                with file:
+                    response = HttpResponse(file.read(end - start + 1), content_type=content_type, status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file under ``MEDIA_ROOT``, replacing ``django.conf.urls.static``, which only serves media in DEBUG.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        if not os.path.isfile(full_path):
+            raise FileNotFoundError(full_path)
+        response = file_response(request, full_path)
+    except (SuspiciousFileOperation, FileNotFoundError):
+        raise Http404("Media file not found")
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+from social_django.middleware import SocialAuthExceptionMiddleware as BaseSocialAuthExceptionMiddleware
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .routers import allow_replica_reads, routing_state
+
+logger = logging.getLogger(__name__)
+
+# "IN (%s, %s, %s)" and "VALUES (%s, %s), (%s, %s)" fingerprint the same whatever the number of values.
+_repeated_placeholders = re.compile(r'(%s|\(%s(?:, %s)*\))(?:, \1)+')
+
+# The recorder of the request being served. Context variables follow the request into sync_to_async threads,
+# so concurrent requests on one event loop each count their own queries.
+_query_recorder = ContextVar('query_recorder', default=None)
+
+
+def sticky_cache_key(request):
+    # API clients authenticate with a bearer token and often drop cookies, so the token identifies them too.
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        return None
+    return 'primary-until:' + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+class HybridMiddleware(ABC):
+    """
+    Base for middleware that runs in a sync or an async chain, whichever the next handler is.
+
+    One sync-only middleware makes Django run the rest of the chain, async views included, in a thread with an
+    event loop of its own per request. Subclasses implement both entry points below.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @abstractmethod
+    def __call__(self, request):
+        """
+        Handle a request in a sync chain; in an async chain, return ``self.__acall__(request)``.
+        """
+
+    @abstractmethod
+    async def __acall__(self, request):
+        """
+        Handle a request in an async chain.
+        """
+
+
+class StaticFilesMiddleware(HybridMiddleware):
+    """
+    Serves static files with WhiteNoise in a sync or an async chain.
+
+    WhiteNoise 6.5 is sync-only, so under ASGI its lookup runs through ``sync_to_async`` and a miss continues
+    down the chain on the event loop.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Only asked for static files: its get_response answers None, so a miss comes back here.
+        self.whitenoise = WhiteNoiseMiddleware(lambda request: None)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.whitenoise(request)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        response = await sync_to_async(self.whitenoise, thread_sensitive=False)(request)
+        return response if response is not None else await self.get_response(request)
+
+
+class SocialAuthExceptionMiddleware(BaseSocialAuthExceptionMiddleware):
+    """
+    social_django's ``SocialAuthExceptionMiddleware`` that also runs in an async chain (see ``HybridMiddleware``).
+    It only acts through ``process_exception``, which Django calls either way.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Lets safe requests to views marked ``read_replica = True`` read from a replica.
+
+        - A request that writes (any unsafe method, or a safe one that saved something) makes the same
+          client read from the primary for ``REPLICA_STICKY_SECONDS``, so it sees its own writes despite
+          replication lag. The window travels in a cookie and, for token-authenticated clients, in the cache.
+
+        - Function views opt in with a ``read_replica`` attribute, class-based views with a class attribute.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routing_state() as state:
+            response = self.get_response(request)
+            if state.wrote or request.method not in SAFE_METHODS:
+                self.stick_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        with routing_state() as state:
+            response = await self.get_response(request)
+            if state.wrote or request.method not in SAFE_METHODS:
+                await sync_to_async(self.stick_to_primary)(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        if getattr(view, 'read_replica', False) and request.method in SAFE_METHODS and not self.is_sticky(request):
+            allow_replica_reads()
+
+    def is_sticky(self, request):
+        try:
+            until = float(request.COOKIES.get(settings.REPLICA_STICKY_COOKIE, 0))
+        except ValueError:
+            until = 0
+        if until > time.time():
+            return True
+        key = sticky_cache_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def stick_to_primary(self, request, response):
+        seconds = settings.REPLICA_STICKY_SECONDS
+        if not settings.REPLICA_DATABASES or not seconds:
+            return
+        response.set_cookie(
+            settings.REPLICA_STICKY_COOKIE, str(int(time.time() + seconds)), max_age=seconds,
+            httponly=True, samesite='Lax', secure=request.is_secure(),
+        )
+        key = sticky_cache_key(request)
+        if key is not None:
+            cache.set(key, 1, seconds)
+
+
+class QueryRecorder:
+    """
+    ``execute_wrapper`` that counts queries and their time, keyed by their SQL with repeated placeholders folded.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[_repeated_placeholders.sub(r'\1, ...', sql)] += 1
+
+    def repeated(self, threshold):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _query_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recording():
+    """
+    Put ``record_query`` under the execute wrappers of the current thread's connections, once per connection.
+
+    It goes first in the list: ``execute_wrapper()`` blocks remove the last entry on exit, so they never take it.
+    """
+    for alias in connections:
+        wrappers = connections[alias].execute_wrappers
+        if record_query not in wrappers:
+            wrappers.insert(0, record_query)
+
+
+class QueryInstrumentationMiddleware(HybridMiddleware):
+    """
+    Records the queries of a sample of requests on every database connection, under WSGI and ASGI alike.
+
+        - ``QUERY_INSTRUMENTATION_SAMPLE_RATE`` of requests are recorded; the others only pay for one
+          random number.
+
+        - Recorded requests get a ``Server-Timing`` header with the database time and query count, and one
+          JSON log line.
+
+        - A request that runs the same statement ``QUERY_DUPLICATE_THRESHOLD`` times or more, the usual
+          shape of an N+1, is logged as a warning with the repeated statements.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.QUERY_INSTRUMENTATION_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        token = _query_recorder.set(recorder)
+        try:
+            install_query_recording()
+            response = self.get_response(request)
+        finally:
+            _query_recorder.reset(token)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.QUERY_INSTRUMENTATION_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        token = _query_recorder.set(recorder)
+        try:
+            # Connections are per thread, and the request's queries run in its sync thread, not on the loop.
+            await sync_to_async(install_query_recording)()
+            response = await self.get_response(request)
+        finally:
+            _query_recorder.reset(token)
+        return self.report(request, response, recorder, time.perf_counter() - start)
+
+    def report(self, request, response, recorder, duration):
+        repeated = recorder.repeated(settings.QUERY_DUPLICATE_THRESHOLD)
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+            f'total;dur={duration * 1000:.1f}'
+        )
+        match = getattr(request, 'resolver_match', None)
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 1),
+            'total_ms': round(duration * 1000, 1),
+        }
+        if repeated:
+            entry['repeated'] = [
+                {'fingerprint': hashlib.sha1(sql.encode()).hexdigest()[:12], 'count': count, 'sql': sql[:300]}
+                for sql, count in repeated[:5]
+            ]
+            logger.warning("possible N+1 %s", json.dumps(entry))
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info("queries %s", json.dumps(entry))
+        return response
@@ -0,0 +1,86 @@
+"""
+PostgreSQL backend whose connections come from an in-process pool shared by a worker's threads.
+
+Django opens and closes connections as usual (``CONN_MAX_AGE = 0``), but closing one hands it back to
+the pool, so a request only pays for the TLS handshake and authentication when the pool is empty.
+An idle connection is pinged with ``SELECT 1`` before it is handed out and discarded if that fails, e.g.
+after the server or a proxy dropped it.
+Sized by ``DATABASES[alias]['POOL']``; see ``Zentoria.db``.
+"""
+import queue
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, max_size=4, timeout=10, max_idle=240):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    def get(self, connect):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise OperationalError(f"No database connection became free within {self.timeout}s")
+        try:
+            while True:
+                try:
+                    connection, returned_at = self.idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if time.monotonic() - returned_at < self.max_idle and self.is_usable(connection):
+                    return connection
+                connection.close()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    @staticmethod
+    def is_usable(connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except base.Database.Error:
+            return False
+        return True
+
+    def put(self, connection):
+        try:
+            if not connection.closed and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            if not connection.closed:
+                self.idle.put((connection, time.monotonic()))
+        except base.Database.Error:
+            connection.close()
+        finally:
+            self.slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_pool(self, conn_params):
+        # One pool per process and set of connection parameters, so a test database gets its own.
+        key = (self.alias, tuple(sorted((name, str(value)) for name, value in conn_params.items())))
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(**self.settings_dict.get('POOL', {}))
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        return self.pool.get(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.put(self.connection)
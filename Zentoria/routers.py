@@ -0,0 +1,71 @@
+"""
+Routing between the primary database and its read replicas.
+
+Reads go to a replica only while a request to a view with ``read_replica = True`` is being handled (see
+``Zentoria.middleware.ReplicaRoutingMiddleware``), and only until that request writes something. Everything
+else, including management commands and background tasks, uses the primary.
+"""
+import random
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+
+_state = Local()
+
+
+def replica_reads_allowed():
+    return getattr(_state, 'replica', False) and not getattr(_state, 'pinned', False)
+
+
+def allow_replica_reads():
+    _state.replica = True
+
+
+@contextmanager
+def routing_state():
+    """
+    Fresh routing state for one request: primary only until ``allow_replica_reads()``, and again after a write.
+    """
+    previous = getattr(_state, 'replica', False), getattr(_state, 'pinned', False), getattr(_state, 'wrote', False)
+    _state.replica, _state.pinned, _state.wrote = False, False, False
+    try:
+        yield _state
+    finally:
+        _state.replica, _state.pinned, _state.wrote = previous
+
+
+@contextmanager
+def primary_database():
+    """
+    Read from the primary inside the block, e.g. to fill a cache that must not hold a lagging replica's rows.
+    """
+    previous = getattr(_state, 'pinned', False)
+    _state.pinned = True
+    try:
+        yield
+    finally:
+        _state.pinned = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.REPLICA_DATABASES and replica_reads_allowed():
+            return random.choice(settings.REPLICA_DATABASES)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes: the rest of the request reads from the primary too.
+        _state.pinned = _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,109 @@
+"""
+The OpenAPI schema, generated once instead of on every request.
+
+``SpectacularAPIView`` introspects every view and serializer each time it is asked for the schema, and the Swagger
+UI at ``/`` asks on every page load. ``build.sh`` writes the schema to ``OPENAPI_SCHEMA_FILE``:
+
+    python manage.py spectacular --format openapi-json --file openapi.json
+
+``CachedSpectacularAPIView`` loads it from there, or generates it on the first request when the file is missing
+(or in DEBUG, where it would go stale), then renders and gzips each format once and serves it with an ETag.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from drf_spectacular.views import SpectacularAPIView
+
+
+class RenderedSchema(NamedTuple):
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+_schema = None
+_rendered = {}
+_lock = threading.Lock()
+
+
+def load_schema(generator):
+    path = settings.OPENAPI_SCHEMA_FILE
+    if path and os.path.exists(path) and not settings.DEBUG:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    # What the spectacular command writes: the public schema, not one filtered for the requesting user.
+    return generator.get_schema(request=None, public=True)
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an ``Accept-Encoding`` header allows gzip: named, or covered by ``*``, with a q-value above zero.
+    """
+    qvalues = {}
+    for coding in accept_encoding.split(','):
+        name, *params = coding.split(';')
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[name.strip().lower()] = qvalue
+    return qvalues.get('gzip', qvalues.get('*', 0.0)) > 0
+
+
+def rendered_schema(renderer, generator):
+    global _schema
+    rendered = _rendered.get(renderer.media_type)
+    if rendered is None:
+        # One thread renders; the others wait for it instead of introspecting the API in parallel.
+        with _lock:
+            rendered = _rendered.get(renderer.media_type)
+            if rendered is None:
+                if _schema is None:
+                    _schema = load_schema(generator)
+                body = renderer.render(_schema, renderer_context={})
+                rendered = _rendered[renderer.media_type] = RenderedSchema(
+                    body, gzip.compress(body, mtime=0), f'W/"{hashlib.sha256(body).hexdigest()[:32]}"',
+                )
+    return rendered
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    ``SpectacularAPIView`` serving the schema built at deploy time, or the first time it is requested.
+
+        - YAML or JSON by content negotiation, as before; each is rendered once per process.
+        - Gzipped for clients that accept it, with an ETag so a revisit gets 304 Not Modified.
+
+    """
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        rendered = rendered_schema(
+            request.accepted_renderer,
+            self.generator_class(urlconf=self.urlconf, api_version=version, patterns=self.patterns),
+        )
+
+        if rendered.etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=304)
+        elif accepts_gzip(request.headers.get('Accept-Encoding', '')):
+            response = HttpResponse(rendered.gzipped, content_type=request.accepted_renderer.media_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(rendered.body, content_type=request.accepted_renderer.media_type)
+
+        response['ETag'] = rendered.etag
+        response['Cache-Control'] = f'public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}'
+        response['Vary'] = 'Accept, Accept-Encoding'
+        response['Content-Disposition'] = f'inline; filename="{self._get_filename(request, version)}"'
+        return response
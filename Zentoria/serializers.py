@@ -0,0 +1,90 @@
+"""
+Per-request response shaping for serializers: ``?fields=`` keeps only the listed fields and ``?expand=``
+adds nested relations, with the queryset narrowed to match.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import BaseSerializer
+
+
+def requested_fields(request):
+    """
+    ``(fields, expand)`` from ``?fields=a,b&expand=c``; ``fields`` is ``None`` when not given.
+    """
+    def parse(name):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        return [field.strip() for field in value.split(',') if field.strip()]
+
+    return parse('fields'), parse('expand') or []
+
+
+class DynamicFieldsMixin:
+    """
+    Lets a ``ModelSerializer`` shape its output per request.
+
+        - ``fields=[...]`` keeps only the listed fields; the primary key is always kept.
+
+        - Fields named in ``expandable_fields`` (usually nested relations) are left out unless named in
+          ``expand=[...]``.
+
+        - ``optimize(queryset, fields, expand)`` narrows the queryset to what the kept fields read:
+          ``only()`` their columns, ``select_related`` nested forward relations and ``prefetch_related``
+          many-to-many and reverse relations. Method fields declare the model fields they read in
+          ``field_sources``; a field with an unknown source leaves the columns un-narrowed.
+    """
+    expandable_fields = ()
+    field_sources = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = set(expand or ())
+        for name in self.expandable_fields:
+            if name not in expand:
+                self.fields.pop(name, None)
+        if fields is not None:
+            keep = set(fields) | (expand & set(self.expandable_fields)) | {self.Meta.model._meta.pk.name}
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    @classmethod
+    def related_lookups(cls, fields=None, expand=None):
+        """
+        ``(only, select_related, prefetch_related)`` for the fields a serializer would render;
+        ``only`` is ``None`` when the columns cannot be narrowed.
+        """
+        model = cls.Meta.model
+        only, select, prefetch = {model._meta.pk.name}, [], []
+        for name, field in cls(fields=fields, expand=expand).fields.items():
+            sources = cls.field_sources.get(name)
+            if sources is None:
+                if field.source == '*':
+                    only = None
+                    continue
+                sources = [field.source.split('.')[0]]
+            for source in sources:
+                try:
+                    model_field = model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    only = None
+                    continue
+                if model_field.many_to_many or model_field.one_to_many:
+                    prefetch.append(source)
+                elif model_field.concrete:
+                    if only is not None:
+                        only.add(source)
+                    if model_field.is_relation and isinstance(field, BaseSerializer):
+                        select.append(source)
+        return only, select, prefetch
+
+    @classmethod
+    def optimize(cls, queryset, fields=None, expand=None):
+        only, select, prefetch = cls.related_lookups(fields, expand)
+        if only is not None:
+            queryset = queryset.only(*only)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
@@ -14,18 +14,19 @@ from datetime import timedelta
 from pathlib import Path
 import os
 
-from django.template.context_processors import media
 #from django.template.context_processors import static
 from dotenv import load_dotenv
 
 #from rest_framework import authtoken
 
+from .db import database_settings, replica_settings
 from .jazzmin import JAZZMIN_SETTINGS
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+load_dotenv()
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -78,8 +79,20 @@ REST_FRAMEWORK = {
 
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "social_core.backends.google.GoogleOAuth2",
     ],
+
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted for the client address
+    # (1 behind Vercel or a single load balancer). With 0 the throttles key on REMOTE_ADDR and ignore the header,
+    # which a client can set to anything.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 0)),
+
+    # Token-bucket rates for accounts.throttling, keyed per IP, email and user.
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "10/min",
+        "otp": "5/min",
+        "verification": "10/min",
+        "change_email": "5/min",
+    },
 }
 
 
@@ -97,18 +110,25 @@ SPECTACULAR_SETTINGS = {
     "DISABLE_ERRORS_AND_WARNINGS": True,
 }
 
+# Written by build.sh and served by Zentoria.schema; generated on the first request when missing.
+OPENAPI_SCHEMA_FILE = os.getenv('OPENAPI_SCHEMA_FILE', os.path.join(BASE_DIR, 'openapi.json'))
+# Seconds browsers and CDNs keep the schema and the docs pages before revalidating with the ETag.
+OPENAPI_SCHEMA_MAX_AGE = int(os.getenv('OPENAPI_SCHEMA_MAX_AGE', 600))
+
 MIDDLEWARE = [
+    'Zentoria.middleware.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'Zentoria.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
-    'social_django.middleware.SocialAuthExceptionMiddleware',
+    'Zentoria.middleware.SocialAuthExceptionMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Zentoria.middleware.ReplicaRoutingMiddleware',
 ]
 
 CORS_ORIGIN_WHITELIST = (
@@ -145,8 +165,9 @@ SITE_ID = 1
 
 WSGI_APPLICATION = 'Zentoria.wsgi.application'
 
+# allauth's backend is left out: its views are not routed, and USERNAME_FIELD is the email, so ModelBackend already
+# covers email logins. Listing both made every failed password check run the hasher twice.
 AUTHENTICATION_BACKENDS = (
-    'allauth.account.auth_backends.AuthenticationBackend',
     'social_core.backends.google.GoogleOAuth2',
     'django.contrib.auth.backends.ModelBackend',
 )
@@ -155,18 +176,19 @@ AUTHENTICATION_BACKENDS = (
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Configured from DATABASE_URL and the DB_* variables documented in Zentoria/db.py.
 DATABASES = {
-  'default': {
-    'ENGINE': 'django.db.backends.postgresql',
-    'NAME': 'neondb',
-    'USER': 'adedolapovictoria927',
-    'PASSWORD': '4aYKfmhLsn8A',
-    'HOST': 'ep-morning-sun-07860737.us-east-2.aws.neon.tech',
-    'PORT': '5432',
-    'OPTIONS': {'sslmode': 'require'},
-  }
+    'default': database_settings(BASE_DIR, DEBUG),
+    **replica_settings(),
 }
 
+# Safe requests to views with read_replica = True read from a replica (Zentoria.middleware); a client that
+# writes reads from the primary for REPLICA_STICKY_SECONDS afterwards.
+DATABASE_ROUTERS = ['Zentoria.routers.ReplicaRouter']
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+REPLICA_STICKY_COOKIE = 'primary_until'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -185,6 +207,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# The first hasher is used for new passwords. Hashes made by any other hasher, or with other cost
+# parameters, are upgraded transparently the next time the user logs in successfully.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'scrypt')
+
+PASSWORD_HASHER_PARAMS = {
+    'scrypt': {
+        'work_factor': int(os.getenv('SCRYPT_WORK_FACTOR', 2 ** 14)),
+        'block_size': int(os.getenv('SCRYPT_BLOCK_SIZE', 8)),
+        'parallelism': int(os.getenv('SCRYPT_PARALLELISM', 1)),
+    },
+    'argon2': {
+        'time_cost': int(os.getenv('ARGON2_TIME_COST', 2)),
+        'memory_cost': int(os.getenv('ARGON2_MEMORY_COST', 102400)),
+        'parallelism': int(os.getenv('ARGON2_PARALLELISM', 8)),
+    },
+}
+
+_TUNED_HASHERS = {
+    'scrypt': 'accounts.hashers.TunedScryptPasswordHasher',
+    'argon2': 'accounts.hashers.TunedArgon2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_TUNED_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _TUNED_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
 
 
 
@@ -211,7 +263,26 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # collectstatic writes content-hashed, pre-compressed copies of every asset (see Zentoria.storage).
+    'staticfiles': {'BACKEND': 'Zentoria.storage.StaticFilesStorage'},
+}
+
+# Media is served by Zentoria.media: with validators and byte ranges, and by the web server itself when
+# MEDIA_SENDFILE is 'nginx' (X-Accel-Redirect to MEDIA_ACCEL_REDIRECT_PREFIX) or 'apache' (X-Sendfile).
+MEDIA_SENDFILE = os.getenv('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+MEDIA_MAX_AGE = int(os.getenv('MEDIA_MAX_AGE', 60 * 60 * 24))
+
+# Product image derivatives (Products.images). Variants are rendered on first request, or right after
+# upload when PRODUCT_IMAGE_EAGER is set, and evicted least-recently-used past the size limit.
+PRODUCT_IMAGE_WIDTHS = (160, 320, 640, 1024)
+PRODUCT_IMAGE_FORMATS = ('avif', 'webp', 'jpeg')
+PRODUCT_IMAGE_EAGER = os.getenv('PRODUCT_IMAGE_EAGER', 'False') == 'True'
+PRODUCT_IMAGE_CACHE_DIR = os.getenv('PRODUCT_IMAGE_CACHE_DIR', os.path.join(MEDIA_ROOT, 'product_images', 'derived'))
+PRODUCT_IMAGE_CACHE_MAX_BYTES = int(os.getenv('PRODUCT_IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+PRODUCT_IMAGE_MAX_AGE = 60 * 60 * 24 * 365
 
 
 # Default primary key field type
@@ -223,10 +294,80 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 JAZZMIN_SETTINGS = JAZZMIN_SETTINGS
 
 
-load_dotenv()
 SOCIAL_AUTH_GOOGLE_OAUTH2_KEY = os.getenv('SOCIAL_AUTH_GOOGLE_OAUTH2_KEY')
 SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET = os.getenv('SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET')
 
+# Point at `manage.py loadtest --fake-gateway` (http://127.0.0.1:<port>/v3) when load testing checkout.
+FLUTTERWAVE_API_URL = os.getenv('FLUTTERWAVE_API_URL', 'https://api.flutterwave.com/v3')
+
+# Seconds before a call from an async view to another service (payment gateway, Google) gives up.
+HTTP_CLIENT_TIMEOUT = float(os.getenv('HTTP_CLIENT_TIMEOUT', 10))
+
+
+# Cache
+# Shared state for rate limiting and cached reads. Set REDIS_URL when running more than one process.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+PROFILE_CACHE_TIMEOUT = 60 * 15
+FAVOURITES_CACHE_TIMEOUT = 60 * 60
+REVIEW_PAGE_SIZE = 20
+REVIEW_MAX_PAGE_SIZE = 100
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 60
+
+# Listing cards (Products.cards) link one image variant; it must be one of the sizes and formats above.
+PRODUCT_CARD_THUMBNAIL_WIDTH = 320
+PRODUCT_CARD_THUMBNAIL_FORMAT = 'webp'
+
+# Similar products are precomputed by `manage.py refresh_similar_products`: the top-K neighbours per product,
+# scored a batch of products at a time. A batch holds one float32 score per catalog product per row, so its size
+# is derived from SIMILAR_PRODUCTS_MEMORY_BUDGET (bytes) unless SIMILAR_PRODUCTS_BATCH_SIZE fixes it.
+SIMILAR_PRODUCTS_TOP_K = 12
+SIMILAR_PRODUCTS_MEMORY_BUDGET = int(os.getenv('SIMILAR_PRODUCTS_MEMORY_BUDGET', 256 * 1024 * 1024))
+SIMILAR_PRODUCTS_BATCH_SIZE = int(os.getenv('SIMILAR_PRODUCTS_BATCH_SIZE', 0))
+SIMILAR_PRODUCTS_CO_PURCHASE_WEIGHT = 0.5
+
+# Pairs kept per product by `manage.py build_cooccurrence_index` (run it before refresh_similar_products).
+COOCCURRENCE_TOP_N = 20
+
+# Style codes checked against the database per lookup when products are saved one at a time.
+STYLE_CODE_BLOCK_SIZE = 500
+
+# Unfiltered admin change lists of tables past this many rows show PostgreSQL's row estimate instead of counting.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+
+# Share of requests whose queries are recorded (Server-Timing header and a JSON log line), and how many runs
+# of one statement in a request are logged as a possible N+1.
+QUERY_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('QUERY_INSTRUMENTATION_SAMPLE_RATE', 0.05))
+QUERY_DUPLICATE_THRESHOLD = int(os.getenv('QUERY_DUPLICATE_THRESHOLD', 10))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'Zentoria.middleware': {'handlers': ['console'], 'level': os.getenv('QUERY_LOG_LEVEL', 'INFO')},
+    },
+}
+
+# Threads per process for work moved off the request thread (image processing).
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+
 
 ACCOUNT_EMAIL_CONFIRMATION_EXPIRE_DAYS = 7
 
@@ -0,0 +1,46 @@
+"""
+Lean settings for serverless deployments that serve only ``/api/v1/``.
+
+The admin (with jazzmin and messages), the OpenAPI schema views, allauth, social_django and DRF's token app are
+left out, with their middleware, so a cold start imports and checks less; ``manage.py startup_profile
+Zentoria.settings Zentoria.settings_api`` shows the difference. Everything else comes from ``Zentoria.settings``.
+
+Run the admin, migrations and user deletion with the full settings: the models of the apps left out here are
+unknown to this profile, so a delete would not cascade to their rows.
+"""
+from .settings import *  # noqa: F403
+
+API_ONLY_EXCLUDED_APPS = [
+    'jazzmin',
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'drf_spectacular',
+    'allauth',
+    'allauth.account',
+    'social_django',
+    'rest_framework.authtoken',
+]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in API_ONLY_EXCLUDED_APPS]  # noqa: F405
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE  # noqa: F405
+    if middleware not in (
+        'allauth.account.middleware.AccountMiddleware',
+        'Zentoria.middleware.SocialAuthExceptionMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    )
+]
+
+TEMPLATES[0]['OPTIONS']['context_processors'] = [  # noqa: F405
+    processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']  # noqa: F405
+    if processor != 'django.contrib.messages.context_processors.messages'
+]
+
+AUTHENTICATION_BACKENDS = ('django.contrib.auth.backends.ModelBackend',)
+
+# The schema class is only used by the schema views, which this profile does not serve.
+REST_FRAMEWORK = {key: value for key, value in REST_FRAMEWORK.items() if key != 'DEFAULT_SCHEMA_CLASS'}  # noqa: F405
+
+ROOT_URLCONF = 'Zentoria.urls_api'
+WSGI_APPLICATION = 'Zentoria.wsgi_api.application'
@@ -0,0 +1,27 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Content-hashed static files with gzip and Brotli copies, served by WhiteNoise with a year-long immutable
+    Cache-Control.
+
+    A file that has not been collected, as none are in tests or a fresh checkout, is linked by its unhashed name
+    instead of failing the page that uses ``{% static %}``.
+
+    Source map comments are left as they are: jazzmin's vendored Bootstrap CSS points at a ``.map`` file it does
+    not ship, which would otherwise fail collectstatic.
+    """
+    manifest_strict = False
+
+    patterns = tuple(
+        (extension, tuple(pattern for pattern in patterns if 'sourceMappingURL' not in str(pattern)))
+        for extension, patterns in CompressedManifestStaticFilesStorage.patterns
+    )
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected, so there is nothing to hash.
+            return name
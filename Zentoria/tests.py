@@ -0,0 +1,212 @@
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from accounts.models import User
+from Products.models import Category
+
+from .schema import accepts_gzip
+from .storage import StaticFilesStorage
+
+
+class CachedSchemaTests(TestCase):
+    def setUp(self):
+        # Every test starts from a process that has not loaded or rendered the schema yet.
+        for patcher in [mock.patch('Zentoria.schema._schema', None),
+                        mock.patch.dict('Zentoria.schema._rendered', clear=True)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_file = Path(directory.name, 'openapi.json')
+        self.schema_file.write_text(json.dumps({'openapi': '3.0.3', 'info': {'title': 'From the file'}, 'paths': {}}))
+        settings_override = self.settings(OPENAPI_SCHEMA_FILE=str(self.schema_file))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, **headers):
+        return self.client.get(reverse('schema'), {'format': 'json'}, headers=headers)
+
+    def test_serves_the_schema_file(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(json.loads(response.content)['info']['title'], 'From the file')
+
+    def test_generates_the_schema_when_the_file_is_missing(self):
+        self.schema_file.unlink()
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/products/', ''.join(json.loads(response.content)['paths']))
+
+    def test_revisit_with_the_etag_is_not_modified(self):
+        etag = self.get()['ETag']
+
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(If_None_Match='W/"other"').status_code, 200)
+
+    def test_gzipped_for_clients_that_accept_it(self):
+        plain = self.get().content
+
+        response = self.get(Accept_Encoding='br, gzip;q=0.8')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_refused_with_a_zero_q_value(self):
+        response = self.get(Accept_Encoding='gzip;q=0, deflate')
+
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(json.loads(response.content)['info']['title'], 'From the file')
+
+
+class AcceptsGzipTests(SimpleTestCase):
+    def test_q_values(self):
+        for header, expected in [
+            ('', False),
+            ('gzip', True),
+            ('GZIP; Q=0.5', True),
+            ('deflate, br', False),
+            ('gzip;q=0', False),
+            ('gzip;q=0.000', False),
+            ('gzip;q=nonsense', False),
+            ('*', True),
+            ('*;q=0.1, deflate', True),
+            ('gzip;q=0, *', False),
+            ('*;q=0, gzip', True),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(accepts_gzip(header), expected)
+
+
+class StaticFilesStorageTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.static_root = Path(directory.name)
+        settings_override = self.settings(STATIC_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_collected_files_are_linked_by_their_hashed_names(self):
+        Path(self.static_root, 'app.css').write_text('body{}')
+        Path(self.static_root, 'late.css').write_text('p{}')
+        Path(self.static_root, 'staticfiles.json').write_text(json.dumps({
+            'version': '1.1', 'paths': {'app.css': 'app.0123456789ab.css'}, 'hash': '0123456789ab',
+        }))
+        storage = StaticFilesStorage()
+
+        self.assertEqual(storage.url('app.css'), '/static/app.0123456789ab.css')
+        # Collected after the manifest was written: hashed from the file itself.
+        self.assertRegex(storage.url('late.css'), r'^/static/late\.[0-9a-f]{12}\.css$')
+        self.assertEqual(storage.url('missing.css'), '/static/missing.css')
+
+    def test_uncollected_files_are_linked_by_their_names(self):
+        self.assertEqual(StaticFilesStorage().url('admin/css/base.css'), '/static/admin/css/base.css')
+
+    def test_pages_render_before_collectstatic(self):
+        admin = User.objects.create_superuser(email='admin@example.com', password='secret', username='admin')
+        Category.objects.create(name='Clothing')
+
+        self.assertEqual(self.client.get(reverse('admin:login')).status_code, 200)
+        response = self.client.get(reverse('category-list'), headers={'Accept': 'text/html'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/static/rest_framework/')
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(reverse('admin:index')).status_code, 200)
+
+
+class MediaTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        Path(directory.name, 'products').mkdir()
+        Path(directory.name, 'products', 'shirt.txt').write_bytes(b'0123456789')
+        settings_override = self.settings(MEDIA_ROOT=directory.name, MEDIA_SENDFILE='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse('media', args=['products/shirt.txt'])
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, headers=headers)
+
+    def test_whole_file_with_validators(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertIn('ETag', response)
+
+    def test_byte_ranges(self):
+        for header, content, content_range in [
+            ('bytes=2-4', b'234', 'bytes 2-4/10'),
+            ('bytes=7-', b'789', 'bytes 7-9/10'),
+            ('bytes=-3', b'789', 'bytes 7-9/10'),
+            ('bytes=8-20', b'89', 'bytes 8-9/10'),
+        ]:
+            with self.subTest(range=header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response.getvalue(), content)
+                self.assertEqual(response['Content-Range'], content_range)
+
+    def test_range_for_another_version_gets_the_whole_file(self):
+        response = self.get(Range='bytes=2-4', If_Range='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_unsatisfiable_range(self):
+        response = self.get(Range='bytes=10-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_not_modified(self):
+        first = self.get()
+
+        for headers in [{'If-None-Match': first['ETag']}, {'If-None-Match': f'W/{first["ETag"]}'},
+                        {'If-Modified-Since': first['Last-Modified']}]:
+            with self.subTest(headers=headers):
+                response = self.client.get(self.url, headers=headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], first['ETag'])
+        self.assertEqual(self.get(If_None_Match='"other"').status_code, 200)
+        self.assertEqual(self.get(If_Modified_Since=http_date(0)).status_code, 200)
+
+    @override_settings(MEDIA_SENDFILE='nginx', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_nginx_sends_the_file(self):
+        response = self.get(Range='bytes=2-4')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/products/shirt.txt')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn('ETag', response)
+
+    @override_settings(MEDIA_SENDFILE='nginx')
+    def test_nginx_revalidation_is_answered_by_django(self):
+        response = self.get(If_None_Match=self.get()['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('X-Accel-Redirect', response)
+
+    def test_missing_and_outside_files_are_not_found(self):
+        for path in ['products/missing.txt', 'products', '../settings.py']:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(f'/media/{path}').status_code, 404)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
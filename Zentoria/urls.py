@@ -16,25 +16,23 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.conf import settings
-from django.conf.urls.static import static
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from django.views.decorators.cache import cache_control
+from drf_spectacular.views import SpectacularSwaggerView, SpectacularRedocView
 
-urlpatterns_v1 = [
-    path('accounts/', include('accounts.urls')),
-    path("products/", include("Products.urls")),
-    path("store/", include("store.urls")),
-]
+from .schema import CachedSpectacularAPIView
+from .urls_api import urlpatterns_media, urlpatterns_v1
+
+# The docs pages only change with a deploy; crawlers hit the Swagger UI at the root URL.
+docs_cache = cache_control(public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
-    path("", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path("schema/", CachedSpectacularAPIView.as_view(), name="schema"),
+    path("", docs_cache(SpectacularSwaggerView.as_view(url_name="schema")), name="swagger-ui"),
+    path('api/schema/redoc/', docs_cache(SpectacularRedocView.as_view(url_name='schema')), name='redoc'),
     path("api/v1/", include(urlpatterns_v1)),
     #path("api/v1/", include('Products.urls')),
     #path("api/v1/", include('store.urls')),
+    *urlpatterns_media,
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
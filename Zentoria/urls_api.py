@@ -0,0 +1,23 @@
+"""
+URL configuration of the API alone, for ``Zentoria.settings_api``: no admin site and no schema views.
+"""
+from django.conf import settings
+from django.urls import path, include
+
+from .media import serve_media
+
+urlpatterns_v1 = [
+    path('accounts/', include('accounts.urls')),
+    path("products/", include("Products.urls")),
+    path("store/", include("store.urls")),
+]
+
+# Product images, profile pictures and their variants, in production as well as DEBUG.
+urlpatterns_media = [
+    path(settings.MEDIA_URL.lstrip('/') + '<path:path>', serve_media, name='media'),
+]
+
+urlpatterns = [
+    path("api/v1/", include(urlpatterns_v1)),
+    *urlpatterns_media,
+]
@@ -0,0 +1,45 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    ``APIView`` whose handlers are coroutines, for endpoints that spend most of their time waiting on other
+    services (payment gateway, Google, SMTP).
+
+        - Authentication, permissions and throttling read the database, so they run in the request's thread;
+          the handler runs on the event loop and uses the async ORM or ``sync_to_async`` for the rest.
+
+        - Under ASGI (opt-in, see ``Zentoria.asgi``) a request waiting on the network holds neither a worker
+          nor a thread. Under WSGI, the default, Django runs the handler in an event loop of its own, so the
+          same views serve both deployments.
+    """
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            # OPTIONS is answered by the inherited, synchronous handler.
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
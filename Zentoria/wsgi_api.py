@@ -0,0 +1,16 @@
+"""
+WSGI entry point of the serverless deployment, serving the API with the lean ``Zentoria.settings_api``.
+
+``vercel.json`` sends the admin, the Swagger UI at ``/`` and the schema views to ``Zentoria/wsgi.py`` (full
+settings) and ``/static/`` to the collectstatic output; every other path comes here.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Zentoria.settings_api')
+
+application = get_wsgi_application()
+
+app = application
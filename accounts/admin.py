@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from Zentoria.admin import EstimatedCountPaginator
 from .models import User, Profile
 
 
@@ -19,10 +20,15 @@ class UserAdmin(BaseUserAdmin):
          ),
     )
     ordering = ['email']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'phone_number', 'address')
+    list_select_related = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = ('user__email', 'phone_number', 'address')
 
 
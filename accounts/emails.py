@@ -1,4 +1,5 @@
 from django.template.loader import render_to_string
+from django.contrib.auth import get_user_model
 from django.core.mail import send_mail, BadHeaderError
 from django.utils.html import strip_tags
 
@@ -15,12 +16,12 @@ def send_verification_code_email(user: User, verification_code: str) -> None:
         print(f"Error occurred while sending verification email: {e}")
 
 
-def send_otp_email(user, otp, template='email_change_verification.html'):
+def send_otp_email(user, otp, template='email_change_verification.html', email=None):
     subject = 'OTP Verification'
     message_html = render_to_string(template, {'user': user, 'otp': otp})
     message_plain = strip_tags(message_html)
     from_email = 'zentoria@admin.com'
-    recipient_list = [user.email]
+    recipient_list = [email or user.email]
     try:
         send_mail(subject, message_plain, from_email, recipient_list, html_message=message_html)
     except BadHeaderError as e:
@@ -1,15 +1,41 @@
-from google.auth.transport import requests
-from google.oauth2 import id_token
+import time
+
+from Zentoria.http import http_client
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+
+# Google rotates its signing keys every few days and says in Cache-Control how long to keep them,
+# so a sign-in verifies the token locally instead of downloading the keys again.
+_certs = {'keys': None, 'expires': 0.0}
+
+
+def max_age(cache_control, default=3600):
+    for directive in cache_control.split(','):
+        name, _, value = directive.strip().partition('=')
+        if name == 'max-age' and value.isdigit():
+            return int(value)
+    return default
+
+
+async def google_certs():
+    if _certs['keys'] is None or time.monotonic() >= _certs['expires']:
+        async with http_client() as client:
+            response = await client.get(GOOGLE_CERTS_URL)
+        response.raise_for_status()
+        _certs['keys'] = response.json()
+        _certs['expires'] = time.monotonic() + max_age(response.headers.get('Cache-Control', ''))
+    return _certs['keys']
 
 
 class Google:
 
     @staticmethod
-    def validate(auth_token):
+    async def validate(auth_token):
+        # google-auth pulls in cryptography, which would cost every cold start about 50 ms for one endpoint.
+        from google.auth import jwt
 
         try:
-            idinfo = id_token.verify_oauth2_token(
-                auth_token, requests.Request())
+            idinfo = jwt.decode(auth_token, certs=await google_certs())
 
             if 'accounts.google.com' in idinfo['iss']:
                 return idinfo
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt with the cost parameters from ``PASSWORD_HASHER_PARAMS['scrypt']``.
+
+    Hashes made with other parameters are rehashed on the next successful login.
+    """
+    work_factor = settings.PASSWORD_HASHER_PARAMS['scrypt']['work_factor']
+    block_size = settings.PASSWORD_HASHER_PARAMS['scrypt']['block_size']
+    parallelism = settings.PASSWORD_HASHER_PARAMS['scrypt']['parallelism']
+    # OpenSSL refuses to use more than 32 MiB unless told otherwise.
+    maxmem = 2 * 128 * work_factor * block_size * parallelism
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the cost parameters from ``PASSWORD_HASHER_PARAMS['argon2']``. Requires ``argon2-cffi``.
+
+    Hashes made with other parameters are rehashed on the next successful login.
+    """
+    time_cost = settings.PASSWORD_HASHER_PARAMS['argon2']['time_cost']
+    memory_cost = settings.PASSWORD_HASHER_PARAMS['argon2']['memory_cost']
+    parallelism = settings.PASSWORD_HASHER_PARAMS['argon2']['parallelism']
@@ -0,0 +1,51 @@
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from imaging import load_image, render_variant
+from Zentoria.background import run_in_background
+from .models import User
+from .profiles import invalidate_profile
+
+PROFILE_PICTURE_SIZES = (48, 96, 256)
+PROFILE_PICTURE_FORMATS = ('webp', 'jpeg')
+
+
+def variant_path(user_id, name, size, fmt):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f'profile_pics/variants/{user_id}/{stem}_{size}.{fmt}'
+
+
+def process_profile_picture(user_id):
+    """
+    Render the fixed-size variants of a user's profile picture.
+
+    The variant paths are stored on the user only if the picture was not replaced in the meantime.
+    """
+    user = User.objects.filter(pk=user_id).only('profile_picture').first()
+    if user is None or not user.profile_picture:
+        return
+
+    name = user.profile_picture.name
+    with user.profile_picture.open('rb') as picture:
+        image = load_image(picture)
+
+    variants = {}
+    for size in PROFILE_PICTURE_SIZES:
+        for fmt in PROFILE_PICTURE_FORMATS:
+            path = variant_path(user_id, name, size, fmt)
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            variants.setdefault(str(size), {})[fmt] = default_storage.save(
+                path, ContentFile(render_variant(image, size, fmt, square=True))
+            )
+
+    if User.objects.filter(pk=user_id, profile_picture=name).update(profile_picture_variants=variants):
+        invalidate_profile(user_id)
+
+
+def schedule_profile_picture_processing(user_id):
+    transaction.on_commit(lambda: run_in_background(process_profile_picture, user_id))
+
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from .models import Profile
+from .serializers import ProfileSerializer
+
+PUBLIC_PROFILE_FIELDS = ('username', 'full_name', 'profile_picture', 'profile_picture_variants')
+
+
+def profile_cache_key(user_id):
+    return f'profile:{user_id}'
+
+
+def get_cached_profiles(user_ids):
+    """
+    Return ``{user_id: serialized profile}`` for the given users.
+
+    Hits are served with one ``get_many``; misses are loaded together with their user in a single
+    ``select_related`` query and written back to the cache.
+    """
+    keys = {profile_cache_key(user_id): user_id for user_id in user_ids}
+    profiles = {keys[key]: data for key, data in cache.get_many(keys).items()}
+
+    missing = [user_id for user_id in keys.values() if user_id not in profiles]
+    if missing:
+        loaded = {
+            profile.user_id: dict(ProfileSerializer(profile).data)
+            for profile in Profile.objects.select_related('user').filter(user_id__in=missing)
+        }
+        cache.set_many({profile_cache_key(user_id): data for user_id, data in loaded.items()},
+                       settings.PROFILE_CACHE_TIMEOUT)
+        profiles.update(loaded)
+
+    return profiles
+
+
+def get_cached_profile(user_id):
+    return get_cached_profiles([user_id]).get(user_id)
+
+
+def get_public_profiles(user_ids):
+    return {
+        user_id: {field: profile.get(field) for field in PUBLIC_PROFILE_FIELDS}
+        for user_id, profile in get_cached_profiles(user_ids).items()
+    }
+
+
+def invalidate_profile(user_id):
+    cache.delete(profile_cache_key(user_id))
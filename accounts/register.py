@@ -1,19 +1,58 @@
 
+import re
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
 from .models import User
 import os
-import random
 from rest_framework.exceptions import AuthenticationFailed
 
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+USERNAME_SUFFIX_DIGITS = 6
+USERNAME_RETRIES = 5
+
+
+def pick_free_username(base, taken):
+    """
+    Return ``base`` or ``base`` followed by the smallest free numeric suffix.
+
+    ``taken`` is every existing username that starts with ``base``.
+    """
+    suffixes = set()
+    for username in taken:
+        suffix = username[len(base):]
+        if suffix == '':
+            suffixes.add(0)
+        elif suffix.isdigit() and suffix[0] != '0':
+            suffixes.add(int(suffix))
+
+    if 0 not in suffixes:
+        return base
+
+    suffix = 1
+    while suffix in suffixes:
+        suffix += 1
+    return f"{base}{suffix}"
+
 
 def generate_username(name):
+    base = "".join(name.split(' ')).lower()[:USERNAME_MAX_LENGTH - USERNAME_SUFFIX_DIGITS]
+    taken = User.objects.filter(
+        username__startswith=base,
+        username__regex=r'^%s[0-9]*$' % re.escape(base),
+    ).values_list('username', flat=True)
+    return pick_free_username(base, taken)
 
-    username = "".join(name.split(' ')).lower()
-    if not User.objects.filter(username=username).exists():
-        return username
-    else:
-        random_username = username + str(random.randint(0, 1000))
-        return generate_username(random_username)
+
+def create_social_user(name, email, password):
+    # Two sign-ups with the same name can pick the same suffix; the unique
+    # constraint catches it and the loser retries with a fresh lookup.
+    for attempt in range(USERNAME_RETRIES):
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(username=generate_username(name), email=email, password=password)
+        except IntegrityError:
+            if attempt == USERNAME_RETRIES - 1 or User.objects.filter(email=email).exists():
+                raise
 
 
 def register_social_user(provider, user_id, email, name):
@@ -36,10 +75,7 @@ def register_social_user(provider, user_id, email, name):
                 detail='Please continue your login using ' + filtered_user_by_email[0].auth_provider)
 
     else:
-        user = {
-            'username': generate_username(name), 'email': email,
-            'password': os.environ.get('SOCIAL_SECRET')}
-        user = User.objects.create_user(**user)
+        user = create_social_user(name, email, os.environ.get('SOCIAL_SECRET'))
         user.is_verified = True
         user.auth_provider = provider
         user.save()
@@ -50,4 +86,4 @@ def register_social_user(provider, user_id, email, name):
             'email': new_user.email,
             'username': new_user.username,
             'tokens': new_user.tokens()
-        }
\ No newline at end of file
+        }
@@ -6,9 +6,11 @@ from .validators import (
     validate_code, validate_email_format, validate_phone_number, validate_image_size
 )
 import pyotp
+from imaging import strip_metadata
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.core.mail import send_mail
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from . import google
 from .register import register_social_user
 import os
 from rest_framework.exceptions import AuthenticationFailed
@@ -56,18 +58,53 @@ class ProfileSerializer(serializers.Serializer):
     full_name = serializers.CharField(source="user.fullname")
     gender = serializers.ChoiceField(choices=User.GENDER_CHOICES, source="user.gender")
     birthday = serializers.DateField(source="user.birthday")
-    phone_number = serializers.CharField
+    phone_number = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     profile_picture = serializers.ImageField(source="user.profile_picture")
-    address = serializers.CharField
+    profile_picture_variants = serializers.SerializerMethodField()
+    address = serializers.CharField(required=False, allow_blank=True)
+
+    def get_profile_picture_variants(self, profile):
+        return {
+            size: {fmt: default_storage.url(path) for fmt, path in formats.items()}
+            for size, formats in profile.user.profile_picture_variants.items()
+        }
 
     def validate_phone_number(self, value):
         validate_phone_number(value)
         return value
 
-    def validate_profile_picture(self, attrs):
-        picture = attrs.get('profile_picture')
-        validate_image_size(picture)
-        return attrs
+    def validate_profile_picture(self, value):
+        validate_image_size(value)
+        return value
+
+    def update(self, instance, validated_data):
+        user_data = validated_data.pop('user', {})
+        user = instance.user
+        for field, value in user_data.items():
+            setattr(user, field, value)
+        if 'profile_picture' in user_data:
+            # Metadata is stripped before the upload is stored; only the variants are rendered later.
+            user.profile_picture = strip_metadata(user_data['profile_picture'])
+            replaced_variants = [
+                path for formats in user.profile_picture_variants.values() for path in formats.values()
+            ]
+
+            def delete_replaced_variants():
+                for path in replaced_variants:
+                    default_storage.delete(path)
+
+            transaction.on_commit(delete_replaced_variants)
+            user.profile_picture_variants = {}
+        user.save()
+
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save()
+        return instance
+
+
+class ProfileBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=100)
 
 
 class RegisterSerializer(serializers.Serializer):
@@ -215,8 +252,10 @@ class VerifySerializer(serializers.Serializer):
 class GoogleSocialAuthSerializer(serializers.Serializer):
     auth_token = serializers.CharField()
 
-    def validate_auth_token(self, auth_token):
-        user_data = google.Google.validate(auth_token)
+    def social_user(self, user_data):
+        """
+        Log in or register the owner of a token checked by ``google.Google.validate``, which the view awaits.
+        """
         try:
             user_data['sub']
         except:
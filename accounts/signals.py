@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Profile, User
+from .profiles import invalidate_profile
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    invalidate_profile(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_profile_on_change(sender, instance, **kwargs):
+    invalidate_profile(instance.user_id)
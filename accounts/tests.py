@@ -1,3 +1,230 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from django.conf import settings
+from django.contrib.auth.hashers import ScryptPasswordHasher, identify_hasher, make_password
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Profile, User
+from .profiles import get_cached_profile, profile_cache_key
+from .register import create_social_user, generate_username
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self, email, headers=None):
+        return self.client.post(reverse('user-login'), {'email': email, 'password': 'wrong-password'}, headers=headers)
+
+    def test_empty_bucket_returns_429_with_retry_after(self):
+        # A different email each time, so only the per-IP bucket (10/min) runs out.
+        for i in range(10):
+            self.assertNotEqual(self.login(f'user{i}@example.com').status_code, 429)
+
+        response = self.login('user10@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(response['X-RateLimit-Remaining'], '0')
+
+    def test_forwarded_for_header_does_not_reset_the_bucket(self):
+        for i in range(10):
+            self.login(f'user{i}@example.com', headers={'X-Forwarded-For': f'203.0.113.{i}'})
+
+        response = self.login('user10@example.com', headers={'X-Forwarded-For': '203.0.113.99'})
+        self.assertEqual(response.status_code, 429)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='ada@example.com', username='ada', fullname='Ada', password='secret')
+
+    def login(self, password='secret'):
+        return self.client.post(reverse('user-login'), {'email': 'ada@example.com', 'password': password})
+
+    def test_issues_tokens(self):
+        response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'], {'email': 'ada@example.com', 'fullname': 'Ada'})
+        self.assertEqual(AccessToken(response.data['tokens']['access'])['user_id'], self.user.pk)
+        self.assertIn('refresh', response.data['tokens'])
+
+    def test_last_login_follows_simple_jwt_setting(self):
+        for update_last_login in [False, True]:
+            with mock.patch.object(jwt_settings, 'UPDATE_LAST_LOGIN', update_last_login):
+                self.assertEqual(self.login().status_code, 200)
+            self.user.refresh_from_db()
+            self.assertEqual(self.user.last_login is not None, update_last_login)
+
+    def test_wrong_password(self):
+        response = self.login('wrong-password')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('tokens', response.data)
+
+    def test_failed_login_checks_the_password_once(self):
+        with mock.patch.object(User, 'check_password', autospec=True, return_value=False) as check_password:
+            self.login('wrong-password')
+
+        self.assertEqual(check_password.call_count, 1)
+
+    def assertTunedHash(self):
+        self.user.refresh_from_db()
+        hasher = identify_hasher(self.user.password)
+        self.assertEqual(hasher.algorithm, 'scrypt')
+        self.assertEqual(hasher.decode(self.user.password)['work_factor'],
+                         settings.PASSWORD_HASHER_PARAMS['scrypt']['work_factor'])
+
+    def test_tuned_hash_verifies(self):
+        self.assertTunedHash()
+
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_legacy_pbkdf2_hash_verifies_and_is_upgraded(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('secret', hasher='pbkdf2_sha256'))
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertTunedHash()
+
+    def test_scrypt_hash_with_other_parameters_verifies_and_is_rehashed(self):
+        hasher = ScryptPasswordHasher()
+        User.objects.filter(pk=self.user.pk).update(password=hasher.encode('secret', hasher.salt(), n=2 ** 12))
+
+        self.assertEqual(self.login().status_code, 200)
+        self.assertTunedHash()
+
+
+class SocialUsernameTests(TestCase):
+    def test_smallest_free_suffix(self):
+        for username in ['johnsmith', 'johnsmith1', 'johnsmith3', 'johnsmithx']:
+            User.objects.create_user(email=f'{username}@example.com', username=username)
+
+        self.assertEqual(generate_username('John Smith'), 'johnsmith2')
+
+    def test_collision_retries_with_a_fresh_lookup(self):
+        User.objects.create_user(email='first@example.com', username='johnsmith')
+
+        # The first lookup ran before the other sign-up committed, so it still offers the taken name.
+        with mock.patch('accounts.register.generate_username', side_effect=['johnsmith', 'johnsmith1']) as lookup:
+            user = create_social_user('John Smith', 'second@example.com', 'secret')
+
+        self.assertEqual(lookup.call_count, 2)
+        self.assertEqual(user.username, 'johnsmith1')
+        self.assertEqual(User.objects.filter(username__startswith='johnsmith').count(), 2)
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='ada@example.com', username='ada', fullname='Ada')
+        self.profile = Profile.objects.create(user=self.user, username='ada')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_patch_phone_number(self):
+        response = self.client.patch(reverse('user-profile'), {'phone_number': '+2348012345678'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['phone_number'], '+2348012345678')
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.phone_number, '+2348012345678')
+
+    def test_patch_invalid_phone_number(self):
+        for phone_number in ['08012345678', '+234-801']:
+            response = self.client.patch(reverse('user-profile'), {'phone_number': phone_number}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('phone_number', response.data)
+
+    def test_patch_blank_phone_number(self):
+        response = self.client.patch(reverse('user-profile'), {'phone_number': ''}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_profile_is_invalidated_on_save(self):
+        self.assertEqual(get_cached_profile(self.user.pk)['address'], '')
+        self.assertIsNotNone(cache.get(profile_cache_key(self.user.pk)))
+
+        self.profile.address = '1 Marina Road'
+        self.profile.save()
+        self.assertIsNone(cache.get(profile_cache_key(self.user.pk)))
+        self.assertEqual(self.client.get(reverse('user-profile')).data['address'], '1 Marina Road')
+
+        self.user.fullname = 'Ada Lovelace'
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('user-profile')).data['full_name'], 'Ada Lovelace')
+
+
+def photo(name='photo.jpg'):
+    """
+    A 40x20 JPEG taken by a named camera, stored rotated: its EXIF orientation turns it upright (20x40).
+    """
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera maker'
+    exif[0x0112] = 6
+    buffer = BytesIO()
+    Image.new('RGB', (40, 20), 'red').save(buffer, format='JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ProfilePictureTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+        self.user = User.objects.create_user(email='ada@example.com', username='ada', fullname='Ada')
+        Profile.objects.create(user=self.user, username='ada')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, picture):
+        return self.client.patch(reverse('user-profile'), {'profile_picture': picture}, format='multipart')
+
+    def test_metadata_is_stripped_before_the_upload_is_stored(self):
+        # Variants are rendered after the response; the stored original must already be clean.
+        with mock.patch('accounts.images.run_in_background') as run_in_background:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.upload(photo()).status_code, 200)
+        self.assertEqual(run_in_background.call_count, 1)
+
+        self.user.refresh_from_db()
+        with Image.open(self.user.profile_picture.path) as stored:
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertEqual(stored.size, (20, 40))
+            self.assertEqual(dict(stored.getexif()), {})
+
+    def test_replacing_the_picture_deletes_the_old_variants(self):
+        with mock.patch('accounts.images.run_in_background', side_effect=lambda func, *args: func(*args)):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.upload(photo('first.jpg'))
+            self.user.refresh_from_db()
+            first_variants = [path for formats in self.user.profile_picture_variants.values()
+                              for path in formats.values()]
+            self.assertEqual(len(first_variants), 6)
+            self.assertTrue(all(default_storage.exists(path) for path in first_variants))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.upload(photo('second.jpg'))
+
+        self.user.refresh_from_db()
+        self.assertFalse(any(default_storage.exists(path) for path in first_variants))
+        second_variants = [path for formats in self.user.profile_picture_variants.values()
+                           for path in formats.values()]
+        self.assertEqual(len(second_variants), 6)
+        self.assertTrue(all(default_storage.exists(path) for path in second_variants))
 
-# Create your tests here.
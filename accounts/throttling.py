@@ -0,0 +1,161 @@
+import hashlib
+import threading
+
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import SimpleRateThrottle
+
+# Refill and take a token in one step on the Redis server, so concurrent requests from every worker see each
+# other's updates. Returns {allowed, tokens left}; the tokens are a string because Redis truncates Lua numbers.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local duration = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * capacity / duration)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(duration))
+return {allowed, tostring(tokens)}
+"""
+
+# Serialises the read-modify-write on the other backends. That is atomic for LocMemCache, whose buckets are
+# per process anyway; run more than one process with REDIS_URL set.
+_bucket_lock = threading.Lock()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token-bucket throttle backed by the shared Django cache.
+
+        - Every key owns a bucket of ``num_requests`` tokens that refills continuously over ``duration``,
+          so short bursts are allowed while the sustained rate stays at the configured rate.
+
+        - The rate is looked up from ``DEFAULT_THROTTLE_RATES`` using the view's ``throttle_scope``.
+
+        - With ``LocMemCache`` the buckets are per process, with ``RedisCache`` they are shared by the cluster
+          and updated atomically by a Lua script.
+
+    Subclasses only decide what a request is keyed by (IP, email, user).
+    """
+    scope_attr = 'throttle_scope'
+    kind = None
+
+    def __init__(self):
+        # The rate depends on the view, so it is resolved in allow_request.
+        self.tokens = None
+
+    def get_ident_for(self, request, view):
+        raise NotImplementedError('.get_ident_for() must be overridden')
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_for(request, view)
+        if ident is None:
+            return None
+        return self.cache_format % {'scope': f'{self.scope}_{self.kind}', 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        if isinstance(self.cache, RedisCache):
+            allowed = self.take_token_in_redis()
+        else:
+            with _bucket_lock:
+                allowed = self.take_token()
+        self.record_limit(request)
+        return allowed
+
+    def take_token(self):
+        tokens, updated_at = self.cache.get(self.key, (self.num_requests, self.now))
+        refill = max(0.0, self.now - updated_at) * self.num_requests / self.duration
+        self.tokens = min(float(self.num_requests), tokens + refill)
+
+        allowed = self.tokens >= 1
+        if allowed:
+            self.tokens -= 1
+        self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        return allowed
+
+    def take_token_in_redis(self):
+        key = self.cache.make_and_validate_key(self.key)
+        client = self.cache._cache.get_client(key, write=True)
+        allowed, tokens = client.register_script(TOKEN_BUCKET_SCRIPT)(
+            keys=[key], args=[self.num_requests, self.duration, self.now],
+        )
+        self.tokens = float(tokens)
+        return bool(allowed)
+
+    def record_limit(self, request):
+        remaining = int(self.tokens)
+        reset = int((self.num_requests - self.tokens) * self.duration / self.num_requests)
+        current = getattr(request, 'rate_limit', None)
+        if current is None or remaining < current[1]:
+            request.rate_limit = (self.num_requests, remaining, reset)
+
+    def wait(self):
+        if self.tokens is None:
+            return None
+        return max(0.0, (1 - self.tokens) * self.duration / self.num_requests)
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """
+    Keyed by the client address: ``REMOTE_ADDR``, or the ``X-Forwarded-For`` entry added by the last of
+    ``NUM_PROXIES`` trusted proxies. With no proxies configured a client cannot pick its own address.
+    """
+    kind = 'ip'
+
+    def get_ident_for(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(TokenBucketThrottle):
+    kind = 'email'
+
+    def get_ident_for(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email:
+            return None
+        return hashlib.sha256(str(email).strip().lower().encode()).hexdigest()
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    kind = 'user'
+
+    def get_ident_for(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class RateLimitHeadersMixin:
+    """
+    Adds ``X-RateLimit-*`` headers describing the tightest bucket hit by the request.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            limit, remaining, reset = rate_limit
+            response['X-RateLimit-Limit'] = limit
+            response['X-RateLimit-Remaining'] = remaining
+            response['X-RateLimit-Reset'] = reset
+        return response
@@ -5,6 +5,7 @@ from .views import (
     RefreshTokenView,
     Logout,
     ProfileView,
+    ProfileBatchView,
     ChangePasswordView,
     RequestEmailChangeCodeView,
     ResendEmailVerificationView,
@@ -21,6 +22,7 @@ urlpatterns = [
     path('token/refresh/', RefreshTokenView.as_view(), name='token-refresh'),
     path('logout/', Logout.as_view(), name='user-logout'),
     path('profile/', ProfileView.as_view(), name='user-profile'),
+    path('profiles/', ProfileBatchView.as_view(), name='user-profile-batch'),
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
     path('request-email-change-code/', RequestEmailChangeCodeView.as_view(), name='request-email-change-code'),
     path('resend-email-verification/', ResendEmailVerificationView.as_view(), name='resend-email-verification'),
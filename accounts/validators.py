@@ -17,7 +17,9 @@ def validate_code(value):
 
 
 def validate_phone_number(value):
-    if not value.startwith('+'):
+    if not value:
+        return
+    if not value.startswith('+'):
         raise ValidationError("Phone number must start with as plus sign (+)")
     if not value[1:].isdigit():
         raise ValidationError("Phone number must only contain digits after the plus sign (+)")
@@ -3,13 +3,16 @@ import random
 from django.utils import timezone
 from datetime import timedelta
 import pyotp
+from asgiref.sync import sync_to_async
 from .utils import RequestError, ErrorCode, CustomResponse
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -21,18 +24,24 @@ from rest_framework_simplejwt.serializers import (
     TokenBlacklistSerializer
 )
 from utils import custom_response
+from Zentoria.views import AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from . import google
 from .emails import send_verification_code_email, send_otp_email
 from .models import User, Profile
 from .otp_utils import get_or_generate_otp_secret, generate_otp, validate_otp, generate_verification_code
+from .images import schedule_profile_picture_processing
+from .profiles import get_cached_profile, get_public_profiles
+from .throttling import RateLimitHeadersMixin, IPRateThrottle, EmailRateThrottle, UserRateThrottle
 from .serializers import (
     RegisterSerializer,
     ResendOTPSerializer,
     VerifySerializer,
     ResendEmailVerificationSerializer,
     ProfileSerializer,
+    ProfileBatchSerializer,
     ChangeEmailSerializer,
     ChangePasswordSerializer,
     RequestEmailChangeCodeSerializer,
@@ -42,7 +51,7 @@ from .serializers import (
 )
 
 
-class UserRegistrationView(APIView):
+class UserRegistrationView(AsyncAPIView):
     """
     API endpoint for user registration.
 
@@ -60,29 +69,34 @@ class UserRegistrationView(APIView):
 
     """
     serializer_class = RegisterSerializer
+
+    @staticmethod
     @transaction.atomic
-    def post(self, request):
+    def create_user(validated_data):
+        user = User.objects.create_user(**validated_data)
+        verification_code = generate_verification_code()
+        Profile.objects.create(user=user, verification_code=verification_code)
+        return user, verification_code
+
+    async def post(self, request):
         serializer = self.serializer_class(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
 
         validated_data = serializer.validated_data
         password = validated_data.pop('password', None)
         try:
-            user = User.objects.create_user(**validated_data)
-
-            verification_code = generate_verification_code()
-            user_profile = Profile.objects.create(user=user, verification_code=verification_code)
-
-            send_verification_code_email(user_profile, verification_code)
-
-            return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
-
+            user, verification_code = await sync_to_async(self.create_user)(validated_data)
         except IntegrityError:
             return Response({"message": "An error occurred during user creation"},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        # Sending mail touches no database, so it waits in the shared thread pool once the user is committed.
+        await sync_to_async(send_verification_code_email, thread_sensitive=False)(user, verification_code)
+
+        return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
 
-class LoginView(TokenObtainPairView):
+
+class LoginView(RateLimitHeadersMixin, TokenObtainPairView):
     """
     API endpoint for user login.
 
@@ -98,6 +112,8 @@ class LoginView(TokenObtainPairView):
 
     """
     serializer_class = TokenObtainPairSerializer
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = 'login'
 
     def post(self, request, **kwargs):
         serializer = LoginSerializer(data=request.data)
@@ -108,7 +124,10 @@ class LoginView(TokenObtainPairView):
         user = authenticate(request, email=email, password=password)
 
         if user:
-            tokens = super().post(request)
+            refresh = self.get_serializer_class().get_token(user)
+            tokens = {"refresh": str(refresh), "access": str(refresh.access_token)}
+            if jwt_settings.UPDATE_LAST_LOGIN:
+                update_last_login(None, user)
             data = {"email": user.email, "fullname": user.fullname}
 
             return custom_response(
@@ -116,7 +135,7 @@ class LoginView(TokenObtainPairView):
                 message="Logged in successfully",
                 status_code=status.HTTP_200_OK,
                 status_text="success",
-                tokens=tokens.data
+                tokens=tokens
             )
         else:
             return custom_response(
@@ -204,9 +223,10 @@ class ProfileView(APIView):
                 Response: JSON response containing the user's profile data.
 
         """
-        user_profile = Profile.objects.get(user=request.user)
-        serializer = self.serializer_class(user_profile)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        profile = get_cached_profile(request.user.pk)
+        if profile is None:
+            return Response({'message': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(profile, status=status.HTTP_200_OK)
 
     def patch(self, request):
         """
@@ -227,16 +247,48 @@ class ProfileView(APIView):
                 Response: JSON response that indicates the status of the profile update process
 
         """
-        user_profile = Profile.objects.get(user=request.user)
+        user_profile = Profile.objects.select_related('user').get(user=request.user)
         serializer = self.serializer_class(user_profile, data=request.data, partial=True)
 
         if serializer.is_valid():
             serializer.save()
+            if serializer.validated_data.get('user', {}).get('profile_picture'):
+                schedule_profile_picture_processing(request.user.pk)
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ProfileBatchView(APIView):
+    """
+    API endpoint for retrieving the public profiles of several users at once.
+
+        - Requires user authentication.
+        - Returns username, full name and profile picture for each requested user id.
+
+    Handles GET requests with a comma-separated ``ids`` query parameter (at most 100 ids).
+
+        Args:
+            request: The HTTP request object.
+
+        Returns:
+            Response: JSON response mapping each found user id to its public profile.
+
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ProfileBatchSerializer
+
+    def get(self, request):
+        ids = [user_id for user_id in request.query_params.get('ids', '').split(',') if user_id]
+        serializer = self.serializer_class(data={'ids': ids})
+        if not serializer.is_valid():
+            return custom_response(serializer.errors, "Invalid user ids", status.HTTP_400_BAD_REQUEST, "error")
+
+        profiles = get_public_profiles(serializer.validated_data['ids'])
+        return custom_response({"profiles": profiles}, "Profiles retrieved successfully", status.HTTP_200_OK,
+                               "success")
+
+
 class ChangePasswordView(APIView):
     """
     API endpoint for changing user password.
@@ -275,7 +327,7 @@ class ChangePasswordView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class RequestEmailChangeCodeView(APIView):
+class RequestEmailChangeCodeView(AsyncAPIView):
     """
     API endpoint for requesting an email change verification code.
 
@@ -294,20 +346,27 @@ class RequestEmailChangeCodeView(APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = RequestEmailChangeCodeSerializer
 
-    def post(self, request):
+    @staticmethod
+    def store_email_change_code(user):
+        otp_secret = get_or_generate_otp_secret(user)
+        otp = generate_otp(otp_secret.secret)
+
+        user.email_change_code = otp
+        user.save()
+        return otp
+
+    async def post(self, request):
         try:
             serializer = RequestEmailChangeCodeSerializer(data=request.data)
-            if serializer.is_valid():
+            if await sync_to_async(serializer.is_valid)():
                 user = request.user
                 new_email = serializer.validated_data['email']
 
-                otp_secret = get_or_generate_otp_secret(user)
-                otp = generate_otp(otp_secret.secret)
-
-                user.email_change_code = otp
-                user.save()
+                otp = await sync_to_async(self.store_email_change_code)(user)
 
-                send_otp_email(user, email=new_email, template='email_change_verification.html')
+                await sync_to_async(send_otp_email, thread_sensitive=False)(
+                    user, otp, template='email_change_verification.html', email=new_email,
+                )
 
                 return Response({'message': 'Email change code sent successfully'}, status=status.HTTP_200_OK)
 
@@ -366,7 +425,7 @@ class ResendEmailVerificationView(APIView):
             return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class SendOTPView(APIView):
+class SendOTPView(RateLimitHeadersMixin, APIView):
     """
     API endpoint for sending OTP.
 
@@ -384,6 +443,8 @@ class SendOTPView(APIView):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = SendOTPSerializer
+    throttle_classes = [IPRateThrottle, EmailRateThrottle, UserRateThrottle]
+    throttle_scope = 'otp'
 
     def post(self, request):
         try:
@@ -400,7 +461,7 @@ class SendOTPView(APIView):
             return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ResendOTPView(APIView):
+class ResendOTPView(RateLimitHeadersMixin, APIView):
     """
     API endpoint for resending a one-time password (OTP).
 
@@ -417,6 +478,8 @@ class ResendOTPView(APIView):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ResendOTPSerializer
+    throttle_classes = [IPRateThrottle, EmailRateThrottle, UserRateThrottle]
+    throttle_scope = 'otp'
 
     def post(self, request):
         try:
@@ -433,7 +496,7 @@ class ResendOTPView(APIView):
             return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ChangeEmailView(APIView):
+class ChangeEmailView(RateLimitHeadersMixin, APIView):
     """
     API endpoint for changing user email address.
 
@@ -451,6 +514,8 @@ class ChangeEmailView(APIView):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ChangeEmailSerializer
+    throttle_classes = [IPRateThrottle, UserRateThrottle]
+    throttle_scope = 'change_email'
 
     def post(self, request):
         try:
@@ -492,7 +557,7 @@ class ChangeEmailView(APIView):
             return custom_response(data, status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
 
-class VerificationView(APIView):
+class VerificationView(RateLimitHeadersMixin, APIView):
     """
     API endpoint for verifying user accounts.
 
@@ -509,6 +574,8 @@ class VerificationView(APIView):
 
     """
     serializer_class = VerifySerializer
+    throttle_classes = [IPRateThrottle, EmailRateThrottle, UserRateThrottle]
+    throttle_scope = 'verification'
 
     def post(self, request):
         try:
@@ -534,7 +601,7 @@ class VerificationView(APIView):
             return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class GoogleSocialAuthView(APIView):
+class GoogleSocialAuthView(AsyncAPIView):
     """
        API endpoint for Google social authentication.
 
@@ -551,9 +618,10 @@ class GoogleSocialAuthView(APIView):
     """
     serializer_class = GoogleSocialAuthSerializer
 
-    def post(self, request):
+    async def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        data = (serializer.validated_data['auth_token'])
+        user_data = await google.Google.validate(serializer.validated_data['auth_token'])
+        data = await sync_to_async(serializer.social_user)(user_data)
         return Response(data, status=status.HTTP_200_OK)
 
@@ -0,0 +1,39 @@
+"""
+Benchmarks for Zentoria.
+
+Each module is runnable on its own, e.g. ``python -m benchmarks.usernames``.
+Benchmarks run against a throwaway test database created from the configured
+``DATABASES['default']``, so the real data is never touched.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Zentoria.settings')
+    django.setup()
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def timer(label, count=1):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed * 1000:.1f} ms total, {elapsed * 1000 / count:.3f} ms/op over {count} ops")
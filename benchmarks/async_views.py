@@ -0,0 +1,162 @@
+"""
+Concurrent throughput of the gunicorn sync deployment (procfile) against the same app under ASGI.
+
+    python -m benchmarks.async_views --workers 2 --concurrency 50 --requests 400 --gateway-latency-ms 200
+
+Both deployments serve a throwaway SQLite database seeded with one user and an order per payment request, with
+``FLUTTERWAVE_API_URL`` pointed at the fake gateway of ``manage.py loadtest``. A sync worker is held for the
+whole gateway round trip, so payments top out near ``workers / latency`` per second; under ASGI (gunicorn with
+uvicorn workers) the async ``PaymentView`` waits on the event loop instead. The category list, a sync view
+reading the database, is the control; under ASGI it runs in a thread per request, which costs throughput.
+
+On one CPU with the defaults, payments went from about 6 to 44 requests/s, and the category list from about 230
+down to 100 requests/s.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import requests
+
+from benchmarks import setup
+
+DEPLOYMENTS = {
+    'gunicorn-sync': ['Zentoria.wsgi'],
+    'gunicorn-uvicorn': ['Zentoria.asgi', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed(orders):
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from accounts.models import User
+    from Products.models import Category
+    from store.models import Order
+
+    Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(20)])
+    user = User.objects.create_user(email='async-bench@example.com', username='asyncbench', password='x' * 12)
+    order_ids = [order.id for order in Order.objects.bulk_create([Order(user=user) for _ in range(orders)])]
+    return str(RefreshToken.for_user(user).access_token), order_ids
+
+
+def start_server(deployment, workers, env):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *DEPLOYMENTS[deployment], '-w', str(workers), '-b', f'127.0.0.1:{port}'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(f'{base_url}/api/v1/products/categories/', timeout=5)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{deployment} did not start")
+
+
+def fire(calls, concurrency):
+    """
+    Run ``calls`` (functions returning a response) ``concurrency`` at a time; returns throughput and latencies.
+    """
+    local = threading.local()
+
+    def call(make_request):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = make_request(local.session).status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        return time.perf_counter() - start, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(call, calls))
+        elapsed = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'requests_per_s': len(results) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'statuses': Counter(status for _, status in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=2, help="Worker processes per deployment.")
+    parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight.")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per endpoint and deployment.")
+    parser.add_argument('--gateway-latency-ms', type=float, default=200.0)
+    args = parser.parse_args()
+
+    # In memory where there is a tmpfs, so SQLite's fsync on every payment does not set the pace.
+    shm = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    directory = tempfile.TemporaryDirectory(prefix='async-bench-', dir=shm)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory.name, 'db.sqlite3')}"
+    setup()
+    from django.core.management import call_command
+    from store.management.commands.loadtest import FakeGatewayHandler
+
+    call_command('migrate', verbosity=0)
+    token, order_ids = seed(args.requests * len(DEPLOYMENTS))
+
+    FakeGatewayHandler.latency = args.gateway_latency_ms / 1000
+    gateway = ThreadingHTTPServer(('127.0.0.1', free_port()), FakeGatewayHandler)
+    threading.Thread(target=gateway.serve_forever, daemon=True).start()
+    env = {
+        **os.environ,
+        'FLUTTERWAVE_API_URL': f'http://127.0.0.1:{gateway.server_address[1]}/v3',
+        'QUERY_INSTRUMENTATION_SAMPLE_RATE': '0',
+    }
+    headers = {'Authorization': f'Bearer {token}'}
+    orders = iter(order_ids)
+
+    print(f"{args.workers} workers, {args.concurrency} concurrent requests, "
+          f"gateway latency {args.gateway_latency_ms:.0f} ms")
+    for deployment in DEPLOYMENTS:
+        process, base_url = start_server(deployment, args.workers, env)
+        try:
+            endpoints = {
+                'payments': [
+                    lambda session, order_id=next(orders): session.post(
+                        f'{base_url}/api/v1/store/payments/', json={'order': order_id, 'amount': 10},
+                        headers=headers, timeout=60,
+                    )
+                    for _ in range(args.requests)
+                ],
+                'categories': [
+                    lambda session: session.get(f'{base_url}/api/v1/products/categories/', timeout=60)
+                ] * args.requests,
+            }
+            for endpoint, calls in endpoints.items():
+                result = fire(calls, args.concurrency)
+                statuses = ', '.join(f'{status} x{count}' for status, count in result['statuses'].items())
+                print(f"{deployment:17} {endpoint:11} {result['requests_per_s']:8.1f} requests/s  "
+                      f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  ({statuses})")
+        finally:
+            process.terminate()
+            process.wait()
+    gateway.shutdown()
+    directory.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Request latency with a new database connection per request, persistent connections, and the in-process pool.
+
+    DATABASE_URL=postgres://... python -m benchmarks.db_connections --requests 200 --threads 4
+
+Each strategy runs in its own process with the matching DB_* variables (see ``Zentoria.db``). Requests go
+through the full middleware stack to a read-only catalog endpoint on the configured database, and the
+connections are released after every request the way the request_finished signal does in production.
+Against SQLite the three strategies cost about the same; the difference is the Postgres TLS handshake.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import setup
+
+STRATEGIES = {
+    'per-request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'},
+    'persistent': {'DB_CONN_MAX_AGE': '600', 'DB_POOL': 'False'},
+    'pooled': {'DB_POOL': 'True'},
+}
+
+
+def run(path, requests, threads):
+    setup()
+    from django.db import close_old_connections, connections
+    from django.test import Client
+
+    def request(_):
+        close_old_connections()
+        start = time.perf_counter()
+        Client().get(path)
+        elapsed = time.perf_counter() - start
+        close_old_connections()
+        return elapsed
+
+    # The test client skips close_old_connections, so the calls above stand in for the request signals.
+    request(None)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        latencies = sorted(pool.map(request, range(requests)))
+        elapsed = time.perf_counter() - start
+    connections.close_all()
+    return {
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'requests_per_s': requests / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4, help="Concurrent requests, as in a threaded worker.")
+    parser.add_argument('--path', default='/api/v1/products/categories/')
+    parser.add_argument('--strategy', choices=STRATEGIES, help="Run one strategy in this process.")
+    args = parser.parse_args()
+
+    if args.strategy:
+        print(json.dumps(run(args.path, args.requests, args.threads)))
+        return
+
+    for strategy, env in STRATEGIES.items():
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.db_connections', '--strategy', strategy, '--path', args.path,
+             '--requests', str(args.requests), '--threads', str(args.threads)],
+            env={**os.environ, **env, 'DB_POOL_MAX_SIZE': str(args.threads)},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{strategy}: p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"{result['requests_per_s']:.1f} requests/s")
+
+
+if __name__ == '__main__':
+    main()
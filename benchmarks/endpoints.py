@@ -0,0 +1,178 @@
+"""
+Latency, query count and memory allocated per request for the API endpoints, on a seeded synthetic catalog.
+
+    python -m benchmarks.endpoints --products 100000 --output bench.json
+    python -m benchmarks.endpoints --products 100000 --baseline bench.json --tolerance 0.25
+
+Each endpoint is requested through the DRF test client: a few warm-up requests, one with a query recorder on
+the connection, one under ``tracemalloc`` for allocations, then ``--iterations`` timed requests.
+
+With ``--baseline`` the run exits non-zero when an endpoint's p95 latency grew by more than ``--tolerance``
+(plus ``--slack-ms``), or its status or query count changed for the worse.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks import setup, benchmark_database
+
+# (name, method, path, data); paths are formatted with the ``Seeded`` ids.
+ENDPOINTS = [
+    ('categories', 'get', '/api/v1/products/categories/', None),
+    ('category-tree', 'get', '/api/v1/products/categories/tree/', None),
+    ('subcategories', 'get', '/api/v1/products/subcategories/', None),
+    ('products-by-category', 'get', '/api/v1/products/category/{category_id}/', None),
+    ('products-by-category-cards', 'get', '/api/v1/products/category/{category_id}/?view=card', None),
+    ('products-by-subcategory', 'get', '/api/v1/products/subcategory/{subcategory_id}/', None),
+    ('product-detail', 'get', '/api/v1/products/products/{product_id}', None),
+    ('product-reviews', 'get', '/api/v1/products/products/{product_id}/reviews/', None),
+    ('bought-together', 'get', '/api/v1/products/products/{product_id}/bought-together/', None),
+    ('similar-products', 'get', '/api/v1/products/similar-products/{product_id}/', None),
+    ('product-search', 'get', '/api/v1/products/products/search/?search=Product%201234', None),
+    ('product-filter', 'get', '/api/v1/products/product-filter/?min_price=10&max_price=20&fields=id,name,price',
+     None),
+    ('review-list', 'get', '/api/v1/products/product-reviews/?product={product_id}', None),
+    ('favourites', 'get', '/api/v1/products/favorite-products/', None),
+    ('favourite-status', 'get', '/api/v1/products/favorite-products/status/?ids={product_id}', None),
+    ('favourite-toggle', 'put', '/api/v1/products/favorite-products/product/{product_id}/', None),
+    ('profile', 'get', '/api/v1/accounts/profile/', None),
+    ('cart-detail', 'get', '/api/v1/store/carts/{cart_id}/', None),
+    ('cart-item-detail', 'get', '/api/v1/store/cart-items/{cart_item_id}/', None),
+    ('order-detail', 'get', '/api/v1/store/orders/{order_id}/', None),
+    ('order-item-detail', 'get', '/api/v1/store/order-items/{order_item_id}/', None),
+    ('payment-detail', 'get', '/api/v1/store/payments/{payment_id}/', None),
+    ('address-detail', 'get', '/api/v1/store/addresses/{address_id}/', None),
+    ('coupons', 'get', '/api/v1/store/coupons', None),
+]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(client, method, path, data, iterations, warmup):
+    from django.db import connection
+    from Zentoria.middleware import QueryRecorder
+
+    request = getattr(client, method)
+    for _ in range(warmup):
+        response = request(path, data, format='json')
+
+    queries = QueryRecorder()
+    with connection.execute_wrapper(queries):
+        response = request(path, data, format='json')
+
+    tracemalloc.start()
+    request(path, data, format='json')
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        request(path, data, format='json')
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'status': response.status_code,
+        'bytes': len(response.content),
+        'queries': queries.count,
+        'alloc_kb': round(allocated / 1024, 1),
+        'alloc_peak_kb': round(peak / 1024, 1),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+    }
+
+
+def regressions(results, baseline, tolerance, slack_ms):
+    found = []
+    for name, result in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance) + slack_ms:
+            found.append(f"{name}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        if result['status'] != before['status']:
+            found.append(f"{name}: status {before['status']} -> {result['status']}")
+        if result['queries'] > before['queries']:
+            found.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', help="Comma-separated endpoint names to run.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', help="Results JSON of an earlier run to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative p95 growth.")
+    parser.add_argument('--slack-ms', type=float, default=1.0, help="Allowed absolute p95 growth on top.")
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from rest_framework.test import APIClient
+    from accounts.models import User
+    from benchmarks.factories import seed
+
+    # Measure the views, not the sampling middleware or the replica router.
+    settings.QUERY_INSTRUMENTATION_SAMPLE_RATE = 0
+    only = set(args.only.split(',')) if args.only else None
+
+    with benchmark_database():
+        start = time.perf_counter()
+        seeded = seed(products=args.products, users=args.users, orders=args.orders, carts=args.users,
+                      seed=args.seed, progress=lambda message: print(f"  seeding: {message}", file=sys.stderr))
+        print(f"seeded in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=seeded.user_id))
+        results = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'products': args.products,
+                'users': args.users,
+                'orders': args.orders,
+                'seed': args.seed,
+                'iterations': args.iterations,
+            },
+            'endpoints': {},
+        }
+        for name, method, path, data in ENDPOINTS:
+            if only and name not in only:
+                continue
+            result = measure(client, method, path.format(**seeded._asdict()), data, args.iterations, args.warmup)
+            results['endpoints'][name] = result
+            print(f"{name:28} {result['status']} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                  f"{result['queries']:4} queries  {result['alloc_peak_kb']:9.1f} KB peak")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(results, json.load(file), args.tolerance, args.slack_ms)
+        for message in found:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
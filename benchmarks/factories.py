@@ -0,0 +1,204 @@
+"""
+Deterministic synthetic data for the benchmarks: a category tree, products with sizes and colors, reviews,
+users with favourites, carts and orders.
+
+Everything is written with ``bulk_create``, so signals do not fire; the derived tables they would keep up to
+date (rating summaries, product cards, co-occurrence counts) are built at the end.
+"""
+import random
+from collections import Counter
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+BATCH_SIZE = 5000
+
+
+class Seeded(NamedTuple):
+    # Ids of representative rows, used to fill in the benchmarked URLs.
+    category_id: int
+    subcategory_id: int
+    product_id: object
+    user_id: int
+    favourite_id: int
+    cart_id: int
+    cart_item_id: int
+    order_id: int
+    order_item_id: int
+    address_id: int
+    payment_id: int
+
+
+def seed_categories(rng, roots=20, children=5, subcategories=3):
+    from Products.models import Category, SubCategory
+
+    categories = []
+    for i in range(roots):
+        root = Category.objects.create(name=f'Category {i}')
+        categories.append(root)
+        for j in range(children):
+            categories.append(Category.objects.create(name=f'Category {i}.{j}', parent_category=root))
+    SubCategory.objects.bulk_create([
+        SubCategory(name=f'{category.name} / {k}', parent_category=category)
+        for category in categories for k in range(subcategories)
+    ])
+    subcategories_by_category = {}
+    for subcategory_id, category_id in SubCategory.objects.values_list('id', 'parent_category_id'):
+        subcategories_by_category.setdefault(category_id, []).append(subcategory_id)
+    return [category.id for category in categories], subcategories_by_category
+
+
+def seed_products(rng, count, category_ids, subcategories, progress=None):
+    from Products.models import Color, Product, Size, Style
+
+    sizes = [Size.objects.get_or_create(name=name)[0].id for name, _ in Size.SIZE_CHOICES]
+    colors = [Color.objects.get_or_create(name=name)[0].id for name, _ in Color.COLOR_CHOICES]
+    styles = [Style.objects.get_or_create(style=f'Style {i}')[0].id for i in range(30)]
+    SizeLink = Product.available_sizes.through
+    ColorLink = Product.available_colors.through
+
+    product_ids = []
+    for start in range(0, count, BATCH_SIZE):
+        products = []
+        for i in range(start, min(start + BATCH_SIZE, count)):
+            category_id = rng.choice(category_ids)
+            products.append(Product(
+                name=f'Product {i}',
+                description=f'Synthetic product {i} for benchmarks.',
+                price=round(rng.lognormvariate(3.5, 0.8), 2),
+                quantity=rng.choice([0, 1, 5, 20, 100]),
+                category_id=category_id,
+                subcategory_id=rng.choice(subcategories.get(category_id, [None])),
+                image='',
+                style_id=rng.choice(styles),
+                # Style codes are unique; these never collide with the base-62 codes the app draws.
+                style_code=f'B{i:09d}',
+            ))
+        Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+        SizeLink.objects.bulk_create([
+            SizeLink(product_id=product.id, size_id=size_id)
+            for product in products for size_id in rng.sample(sizes, rng.randint(1, 4))
+        ], batch_size=BATCH_SIZE)
+        ColorLink.objects.bulk_create([
+            ColorLink(product_id=product.id, color_id=color_id)
+            for product in products for color_id in rng.sample(colors, rng.randint(1, 3))
+        ], batch_size=BATCH_SIZE)
+        product_ids.extend(product.id for product in products)
+        if progress:
+            progress(f"{len(product_ids)} products")
+    return product_ids
+
+
+def seed_users(count):
+    from accounts.models import Profile, User
+
+    # One hash for everybody; hashing is what the login benchmark measures, not this one.
+    password = make_password('benchmark password')
+    users = User.objects.bulk_create([
+        User(email=f'user{i}@example.com', username=f'user{i}', fullname=f'User {i}', password=password)
+        for i in range(count)
+    ], batch_size=BATCH_SIZE)
+    Profile.objects.bulk_create([Profile(user=user, username=user.username) for user in users], batch_size=BATCH_SIZE)
+    return [user.id for user in users]
+
+
+def seed_reviews(rng, product_ids, user_ids, per_product):
+    from Products.models import ProductRatingSummary, ProductReview
+
+    reviews = []
+    stars = Counter()
+    for product_id in product_ids:
+        for _ in range(rng.randint(0, per_product * 2)):
+            rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0]
+            reviews.append(ProductReview(
+                product_id=product_id, user_id=rng.choice(user_ids), rating=rating, review_text='Benchmark review.',
+            ))
+            stars[product_id, rating] += 1
+    ProductReview.objects.bulk_create(reviews, batch_size=BATCH_SIZE)
+
+    fields = dict(enumerate(ProductRatingSummary.STAR_FIELDS, start=1))
+    ProductRatingSummary.objects.bulk_create([
+        ProductRatingSummary(product_id=product_id,
+                             **{field: stars[product_id, rating] for rating, field in fields.items()})
+        for product_id in product_ids
+    ], batch_size=BATCH_SIZE)
+
+
+def seed_favourites(rng, product_ids, user_ids, per_user):
+    from Products.models import FavouriteProduct
+
+    favourites = FavouriteProduct.objects.bulk_create([
+        FavouriteProduct(user_id=user_id, product_id=product_id)
+        for user_id in user_ids for product_id in rng.sample(product_ids, per_user)
+    ], batch_size=BATCH_SIZE)
+    return favourites[0].id
+
+
+def seed_store(rng, product_ids, user_ids, carts, orders, items_per_order):
+    from store.models import Cart, CartItem, CouponCode, Order, OrderItem, Payment, ShippingAddress
+
+    # The first cart and order belong to the first user, whom the benchmarks authenticate as.
+    owners = [user_ids[0]] + [rng.choice(user_ids) for _ in range(max(carts, orders))]
+    cart_rows = Cart.objects.bulk_create([Cart(user_id=owners[i]) for i in range(carts)], batch_size=BATCH_SIZE)
+    cart_items = CartItem.objects.bulk_create([
+        CartItem(cart=cart, product_id=product_id, quantity=rng.randint(1, 3))
+        for cart in cart_rows for product_id in rng.sample(product_ids, items_per_order)
+    ], batch_size=BATCH_SIZE)
+
+    order_rows = Order.objects.bulk_create([Order(user_id=owners[i]) for i in range(orders)], batch_size=BATCH_SIZE)
+    order_items = OrderItem.objects.bulk_create([
+        OrderItem(order=order, product_id=product_id, quantity=rng.randint(1, 3))
+        for order in order_rows for product_id in rng.sample(product_ids, rng.randint(1, items_per_order * 2))
+    ], batch_size=BATCH_SIZE)
+    payments = Payment.objects.bulk_create([
+        Payment(order=order, user_id=order.user_id, amount=10, payment_method=Payment.FLUTTERWAVE,
+                transaction_id=f'bench-{order.id}', payment_status='Completed')
+        for order in order_rows[::2]
+    ], batch_size=BATCH_SIZE)
+    addresses = ShippingAddress.objects.bulk_create([
+        ShippingAddress(order=order, user_id=order.user_id, street='1 Benchmark Way', city='Lagos', state='Lagos',
+                        zip_code='100001')
+        for order in order_rows
+    ], batch_size=BATCH_SIZE)
+    for i in range(10):
+        CouponCode.objects.create(price=5, expiry_date=timezone.now() + timedelta(days=30 + i))
+    return cart_rows[0], cart_items[0], order_rows[0], order_items[0], addresses[0], payments[0]
+
+
+def seed(products=100000, users=1000, reviews_per_product=2, favourites_per_user=10, carts=1000, orders=5000,
+         items_per_order=3, seed=0, progress=None):
+    """
+    Seed the current database and return a ``Seeded`` of sample ids. The same ``seed`` gives the same data.
+    """
+    from Products.cards import rebuild_product_cards
+    from Products.cooccurrence import update_cooccurrence_index
+
+    rng = random.Random(seed)
+    category_ids, subcategories = seed_categories(rng)
+    product_ids = seed_products(rng, products, category_ids, subcategories, progress)
+    user_ids = seed_users(users)
+    seed_reviews(rng, product_ids, user_ids, reviews_per_product)
+    favourite_id = seed_favourites(rng, product_ids, user_ids, favourites_per_user)
+    cart, cart_item, order, order_item, address, payment = seed_store(
+        rng, product_ids, user_ids, carts, orders, items_per_order,
+    )
+    if progress:
+        progress("store seeded, building derived tables")
+    rebuild_product_cards(product_ids)
+    update_cooccurrence_index(rebuild=True)
+
+    return Seeded(
+        category_id=category_ids[-1],
+        subcategory_id=subcategories[category_ids[-1]][0],
+        product_id=order_item.product_id,
+        user_id=user_ids[0],
+        favourite_id=favourite_id,
+        cart_id=cart.id,
+        cart_item_id=cart_item.id,
+        order_id=order.id,
+        order_item_id=order_item.id,
+        address_id=address.id,
+        payment_id=payment.id,
+    )
@@ -0,0 +1,58 @@
+"""
+Password hashing cost and login throughput on a single core.
+
+    python -m benchmarks.login --logins 20
+"""
+import argparse
+import time
+
+from benchmarks import setup, benchmark_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hashes', type=int, default=20)
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password, get_hasher, make_password
+    from rest_framework.test import APIClient
+    from accounts.models import User
+    from accounts.views import LoginView
+
+    print("hasher throughput (one core):")
+    for algorithm in ('scrypt', 'argon2', 'pbkdf2_sha256'):
+        try:
+            hasher = get_hasher(algorithm)
+            encoded = make_password('correct horse battery', hasher=hasher)
+        except (ValueError, ImportError) as exc:
+            print(f"  {algorithm}: skipped ({exc})")
+            continue
+        start = time.perf_counter()
+        for _ in range(args.hashes):
+            check_password('correct horse battery', encoded)
+        elapsed = time.perf_counter() - start
+        print(f"  {algorithm}: {args.hashes / elapsed:.1f} verifications/s, {elapsed * 1000 / args.hashes:.1f} ms each")
+
+    # Measure the login view itself, not the rate limiter in front of it.
+    LoginView.throttle_classes = []
+    preferred = settings.PASSWORD_HASHERS[0]
+    with benchmark_database():
+        User.objects.create_user(email='bench@example.com', password='correct horse battery', username='bench')
+        client = APIClient()
+        payload = {'email': 'bench@example.com', 'password': 'correct horse battery'}
+        client.post('/api/v1/accounts/login/', payload, format='json')
+
+        start = time.perf_counter()
+        for _ in range(args.logins):
+            response = client.post('/api/v1/accounts/login/', payload, format='json')
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - start
+        print(f"login view with {preferred.rsplit('.', 1)[-1]}: {args.logins / elapsed:.1f} logins/s per core, "
+              f"{elapsed * 1000 / args.logins:.1f} ms each")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Style code allocation: one query per block of codes against one query per code.
+
+    python -m benchmarks.style_codes --codes 1000000 --existing 100000
+"""
+import argparse
+
+from benchmarks import setup, benchmark_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--codes', type=int, default=1000000)
+    parser.add_argument('--existing', type=int, default=100000, help="Products seeded before allocating.")
+    parser.add_argument('--block-size', type=int, default=10000)
+    parser.add_argument('--per-code', type=int, default=10000, help="Codes allocated one query at a time.")
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from Products.models import Category, Product
+    from Products.style_codes import StyleCodeAllocator, generate_style_code, taken_style_codes
+
+    with benchmark_database():
+        category = Category.objects.create(name='Benchmark')
+        allocator = StyleCodeAllocator(block_size=args.block_size)
+        products = [
+            Product(name=f'product {i}', description='', price=1, quantity=1, category=category, image='x.jpg')
+            for i in range(args.existing)
+        ]
+        with timer(f"seed {args.existing} products", args.existing):
+            for start in range(0, len(products), args.block_size):
+                chunk = products[start:start + args.block_size]
+                for product, code in zip(chunk, allocator.allocate_many(len(chunk))):
+                    product.style_code = code
+                Product.objects.bulk_create(chunk, batch_size=5000)
+
+        with timer(f"generate {args.codes} codes (no database)", args.codes):
+            for _ in range(args.codes):
+                generate_style_code()
+
+        codes = set()
+        with CaptureQueriesContext(connection) as queries, timer(f"allocate {args.codes} codes in blocks", args.codes):
+            for start in range(0, args.codes, args.block_size):
+                codes.update(allocator.allocate_many(min(args.block_size, args.codes - start), exclude=codes))
+        print(f"  {len(codes)} unique codes, {len(queries)} queries")
+
+        with timer(f"allocate {args.per_code} codes one query each", args.per_code):
+            for _ in range(args.per_code):
+                code = generate_style_code()
+                while taken_style_codes([code]):
+                    code = generate_style_code()
+
+
+if __name__ == '__main__':
+    main()
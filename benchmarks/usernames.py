@@ -0,0 +1,44 @@
+"""
+Username generation with many users sharing one name.
+
+    python -m benchmarks.usernames --users 100000
+"""
+import argparse
+
+from benchmarks import setup, benchmark_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--name', default='John Smith')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from accounts.models import User
+    from accounts.register import generate_username
+
+    with benchmark_database():
+        base = "".join(args.name.split(' ')).lower()
+        users = [
+            User(username=base if i == 0 else f"{base}{i}", email=f"{base}{i}@example.com", password='!',
+                 fullname=args.name)
+            for i in range(args.users)
+        ]
+        with timer(f"seed {args.users} users", args.users):
+            User.objects.bulk_create(users, batch_size=5000)
+
+        with CaptureQueriesContext(connection) as queries:
+            username = generate_username(args.name)
+        print(f"next username: {username} ({len(queries)} queries)")
+
+        with timer("generate_username", args.repeat):
+            for _ in range(args.repeat):
+                generate_username(args.name)
+
+
+if __name__ == '__main__':
+    main()
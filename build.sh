@@ -1,4 +1,5 @@
 echo "  BUILD START"
 pip install -r requirements.txt
 python3.11 manage.py collectstatic --noinput --clear
+python3.11 manage.py spectacular --format openapi-json --file openapi.json
 echo "  BUILD END"
@@ -0,0 +1,86 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'image/png', {'optimize': True}),
+}
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF codec with Pillow)
+except ImportError:
+    pass
+else:
+    FORMATS['avif'] = ('AVIF', 'image/avif', {'quality': 60})
+
+
+def file_digest(file):
+    """
+    Return the SHA-256 hex digest of a Django ``File``, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def load_image(file):
+    """
+    Open an uploaded image and apply its EXIF orientation, so the EXIF block can be dropped on save.
+    """
+    image = Image.open(file)
+    original_format = image.format
+    image = ImageOps.exif_transpose(image)
+    image.format = original_format
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        image.format = original_format
+    return image
+
+
+def format_name(image):
+    fmt = (image.format or '').lower()
+    return fmt if fmt in FORMATS else None
+
+
+def render_variant(image, width, fmt, square=False):
+    """
+    Resize ``image`` to ``width`` pixels wide (cropped to a square when ``square``) and encode it as ``fmt``.
+
+    Pillow only writes EXIF when it is passed explicitly, so the returned bytes carry no metadata.
+    """
+    pil_format, _, options = FORMATS[fmt]
+    if square:
+        variant = ImageOps.fit(image, (width, width), Image.LANCZOS)
+    else:
+        variant = image.copy()
+        variant.thumbnail((width, width * 10), Image.LANCZOS)
+    if pil_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+
+    buffer = BytesIO()
+    variant.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def strip_metadata(file):
+    """
+    Re-encode an uploaded image without its metadata (camera details, GPS position), at its full size.
+
+    Returns a ``ContentFile`` to save in place of the upload. Formats Pillow cannot write back are saved as PNG.
+    """
+    image = load_image(file)
+    fmt = format_name(image)
+    name = file.name if fmt else f'{os.path.splitext(file.name)[0]}.png'
+    return ContentFile(render_variant(image, max(image.size), fmt or 'png'), name=name)
+
+
+def content_type_for(fmt):
+    return FORMATS[fmt][1]
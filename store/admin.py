@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db.models import BooleanField, DecimalField, ExpressionWrapper, F, Q, Sum
+from Zentoria.admin import EstimatedCountPaginator
 from .models import Cart, CartItem, Payment, Order, OrderItem, ShippingAddress, CouponCode
 
 # Register your models here.
@@ -19,9 +21,51 @@ class ShippingAddressInline(admin.StackedInline):
     extra = 1
 
 
+def line_total(items):
+    return Sum(ExpressionWrapper(
+        F(f'{items}__product__price') * F(f'{items}__quantity'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    ))
+
+
+def search_by_id_or_email(queryset, search_term):
+    """
+    Carts or orders by number or by the owner's exact email: one primary key or unique index lookup, where the
+    admin's default ``icontains`` would scan the table.
+    """
+    search_term = search_term.strip()
+    if not search_term:
+        return queryset
+    if search_term.isdigit():
+        return queryset.filter(id=int(search_term))
+    return queryset.filter(user__email=search_term)
+
+
 class CartAdmin(admin.ModelAdmin):
     inlines = [CartItemInline]
     list_display = ('id', 'user', 'created_at', 'total_quantity', 'calculate_total')
+    list_select_related = ('user',)
+    search_fields = ('id', 'user__email')
+    search_help_text = "Cart number or the owner's exact email."
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Totals for the whole page in the list query, rather than Cart's methods reading each cart's items.
+        return super().get_queryset(request).annotate(
+            item_quantity=Sum('cartitem__quantity'), item_total=line_total('cartitem'),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_by_id_or_email(queryset, search_term), False
+
+    @admin.display(description='Total quantity', ordering='item_quantity')
+    def total_quantity(self, cart):
+        return cart.item_quantity or 0
+
+    @admin.display(description='Total', ordering='item_total')
+    def calculate_total(self, cart):
+        return round(cart.item_total or 0, 2)
 
 
 admin.site.register(Cart, CartAdmin)
@@ -35,6 +79,29 @@ class OrderItemInline(admin.TabularInline):
 class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
     list_display = ('id', 'user', 'created_at', 'shipped', 'is_paid', 'calculate_order_total')
+    list_select_related = ('user',)
+    search_fields = ('id', 'user__email')
+    search_help_text = "Order number or the customer's exact email."
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            item_total=line_total('orderitem'),
+            # Sorts unpaid and paid orders apart; ordering by the payment column itself would sort by payment id.
+            paid=ExpressionWrapper(Q(payment__isnull=False), output_field=BooleanField()),
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        return search_by_id_or_email(queryset, search_term), False
+
+    @admin.display(description='Paid', boolean=True, ordering='paid')
+    def is_paid(self, order):
+        return order.paid
+
+    @admin.display(description='Total', ordering='item_total')
+    def calculate_order_total(self, order):
+        return round(order.item_total or 0, 2)
 
 
 admin.site.register(Order, OrderAdmin)
@@ -42,6 +109,9 @@ admin.site.register(Order, OrderAdmin)
 
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('order', 'amount', 'payment_method', 'transaction_id', 'payment_status')
+    list_select_related = ('order__user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Payment, PaymentAdmin)
@@ -49,6 +119,9 @@ admin.site.register(Payment, PaymentAdmin)
 
 class AddressAdmin(admin.ModelAdmin):
     list_display = ('order', 'street', 'city', 'state', 'zip_code')
+    list_select_related = ('order__user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(ShippingAddress, AddressAdmin)
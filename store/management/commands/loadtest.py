@@ -0,0 +1,347 @@
+"""
+Drive a running server through shopping journeys and report throughput, errors and latency per step.
+
+    python manage.py runserver --noreload                               # or gunicorn, with the same database
+    python manage.py loadtest --users 50 --concurrency 20 --rate 10 --duration 60
+
+A journey logs in (after registering a new account with ``--register``), lists the categories, browses one
+category, searches, opens a product, adds it to the cart, checks out and pays. Each step is timed on its own;
+a step that gets a 4xx/5xx or no response counts as an error, and the steps that need its result are skipped.
+
+Journeys arrive as a Poisson process at ``--rate`` per second (back to back with ``--rate 0``), at most
+``--concurrency`` at a time. The accounts and their carts are created directly in the database this command
+is configured with, which must be the one the server uses. Logins are throttled per IP (``login`` rate), so a
+journey whose login is refused carries on with a token minted here, and the refusal shows up as an error.
+
+``--fake-gateway PORT`` answers payment requests locally; start the server with
+``FLUTTERWAVE_API_URL=http://127.0.0.1:PORT/v3`` so checkout never reaches the real gateway.
+"""
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import RefreshToken
+
+STEPS = ['register', 'login', 'categories', 'category', 'search', 'product', 'add-to-cart', 'checkout', 'pay']
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last bucket is open.
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+PASSWORD = 'loadtest password'
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class StepStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = Counter()
+        self.skipped = 0
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        histogram = Counter()
+        for latency in latencies:
+            bucket = next((f'<={bound}ms' for bound in BUCKETS_MS if latency <= bound), f'>{BUCKETS_MS[-1]}ms')
+            histogram[bucket] += 1
+        summary = {
+            'requests': len(latencies),
+            'errors': sum(self.errors.values()),
+            'error_rate': round(sum(self.errors.values()) / len(latencies), 4) if latencies else 0,
+            'skipped': self.skipped,
+            'errors_by_kind': dict(self.errors),
+            'histogram': dict(histogram),
+        }
+        if latencies:
+            summary.update({
+                'mean_ms': round(statistics.fmean(latencies), 2),
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'max_ms': round(latencies[-1], 2),
+            })
+        return summary
+
+
+class Recorder:
+    # Shared by every worker thread.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = {step: StepStats() for step in STEPS}
+        self.journeys = Counter()
+
+    def record(self, step, latency_ms, error=None):
+        with self.lock:
+            self.steps[step].latencies.append(latency_ms)
+            if error:
+                self.steps[step].errors[error] += 1
+
+    def skip(self, step):
+        with self.lock:
+            self.steps[step].skipped += 1
+
+    def finish(self, outcome):
+        with self.lock:
+            self.journeys[outcome] += 1
+
+
+class Journey:
+    def __init__(self, session, base_url, timeout, recorder, account, products, rng, register):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.recorder = recorder
+        self.account = account
+        self.products = products
+        self.rng = rng
+        self.register = register
+        self.headers = {}
+
+    def call(self, step, method, path, **kwargs):
+        """
+        Time one request. Returns the decoded JSON body, or None (and records an error) when the step failed.
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, headers=self.headers,
+                                            timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.record(step, (time.perf_counter() - start) * 1000, type(e).__name__)
+            return None
+        latency = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            self.recorder.record(step, latency, str(response.status_code))
+            return None
+        self.recorder.record(step, latency)
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def skip(self, *steps):
+        for step in steps:
+            self.recorder.skip(step)
+        return 'incomplete'
+
+    def run(self):
+        if self.register:
+            suffix = f'{time.time_ns()}{self.rng.randrange(1000)}'
+            self.call('register', 'post', '/api/v1/accounts/register/', json={
+                'email': f'loadtest-new-{suffix}@example.com', 'fullname': 'Load Test',
+                'username': f'lt{suffix}'[-30:], 'password': PASSWORD,
+            })
+
+        body = self.call('login', 'post', '/api/v1/accounts/login/',
+                         json={'email': self.account['email'], 'password': PASSWORD})
+        access = (body or {}).get('tokens', {}).get('access') or self.account['token']
+        self.headers = {'Authorization': f'Bearer {access}'}
+
+        product_id, name, category_id = self.rng.choice(self.products)
+        self.call('categories', 'get', '/api/v1/products/categories/')
+        self.call('category', 'get', f'/api/v1/products/category/{category_id}/')
+        self.call('search', 'get', '/api/v1/products/products/search/', params={'search': name[:30]})
+        self.call('product', 'get', f'/api/v1/products/products/{product_id}')
+
+        if self.call('add-to-cart', 'post', '/api/v1/store/cart-items/', json={
+            'cart': self.account['cart_id'], 'product': str(product_id), 'quantity': 1,
+        }) is None:
+            return self.skip('checkout', 'pay')
+        body = self.call('checkout', 'post', '/api/v1/store/checkout/', json={})
+        order_id = (body or {}).get('order_id')
+        if order_id is None:
+            return self.skip('pay')
+        if self.call('pay', 'post', '/api/v1/store/payments/', json={'order': order_id, 'amount': 1}) is None:
+            return 'incomplete'
+        return 'completed'
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    # Answers like Flutterwave's hosted-payment endpoint after ``latency`` seconds.
+    latency = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        time.sleep(self.latency)
+        payload = json.dumps({
+            'status': 'success',
+            'message': 'Hosted Link',
+            'data': {'link': f"http://{self.server.server_address[0]}/pay/{body.get('tx_ref', '')}"},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def prepare_accounts(count):
+    """
+    The load test accounts, each with one cart, created on the first run and reused after that.
+    """
+    from accounts.models import Profile, User
+    from store.models import Cart
+
+    emails = [f'loadtest{i}@example.com' for i in range(count)]
+    existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+    password = make_password(PASSWORD)
+    created = User.objects.bulk_create([
+        User(email=email, username=email.split('@')[0], fullname='Load Test', password=password)
+        for email in emails if email not in existing
+    ])
+    Profile.objects.bulk_create([Profile(user=user, username=user.username) for user in created])
+
+    users = list(User.objects.filter(email__in=emails).order_by('email'))
+    carts = dict(Cart.objects.filter(user__in=users).values_list('user_id', 'id'))
+    Cart.objects.bulk_create([Cart(user=user) for user in users if user.id not in carts])
+    carts = dict(Cart.objects.filter(user__in=users).values_list('user_id', 'id'))
+    return [
+        {'email': user.email, 'cart_id': carts[user.id], 'token': str(RefreshToken.for_user(user).access_token)}
+        for user in users
+    ]
+
+
+class Command(BaseCommand):
+    help = "Run scripted shopping journeys against a running server and report latency, errors and throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=20, help="Accounts the journeys are spread over.")
+        parser.add_argument('--concurrency', type=int, default=10, help="Journeys in flight at most.")
+        parser.add_argument('--rate', type=float, default=5.0,
+                            help="Journeys started per second on average; 0 starts one whenever a slot frees.")
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds to keep starting journeys.")
+        parser.add_argument('--journeys', type=int, help="Stop after starting this many journeys instead.")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Seconds before a request is an error.")
+        parser.add_argument('--register', action='store_true', help="Register a new account in every journey.")
+        parser.add_argument('--products', type=int, default=1000, help="In-stock products the journeys pick from.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--fake-gateway', type=int, metavar='PORT', help="Serve a fake payment gateway.")
+        parser.add_argument('--gateway-latency-ms', type=float, default=300.0)
+        parser.add_argument('--json', dest='output', help="Also write the report to this JSON file.")
+
+    def handle(self, *args, **options):
+        from Products.models import Product
+
+        gateway = None
+        if options['fake_gateway']:
+            FakeGatewayHandler.latency = options['gateway_latency_ms'] / 1000
+            gateway = ThreadingHTTPServer(('127.0.0.1', options['fake_gateway']), FakeGatewayHandler)
+            threading.Thread(target=gateway.serve_forever, daemon=True).start()
+            self.stdout.write(f"Fake gateway listening; run the server with "
+                              f"FLUTTERWAVE_API_URL=http://127.0.0.1:{options['fake_gateway']}/v3")
+
+        accounts = prepare_accounts(options['users'])
+        products = list(
+            Product.objects.filter(quantity__gt=0).order_by('pk')
+            .values_list('id', 'name', 'category_id')[:options['products']]
+        )
+        if not products:
+            self.stderr.write("No products in stock to shop for.")
+            return
+
+        recorder = Recorder()
+        rng = random.Random(options['seed'])
+        local = threading.local()
+        slots = threading.BoundedSemaphore(options['concurrency'])
+
+        def run_journey(account, journey_seed):
+            # One keep-alive session per worker thread, like one browser per user.
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            journey = Journey(local.session, options['base_url'], options['timeout'], recorder, account, products,
+                              random.Random(journey_seed), options['register'])
+            try:
+                recorder.finish(journey.run())
+            except Exception:
+                recorder.finish('crashed')
+                raise
+            finally:
+                slots.release()
+
+        self.stdout.write(f"Running for {options['duration']:.0f}s against {options['base_url']} ...")
+        started = delayed = 0
+        start = time.perf_counter()
+        next_arrival = start
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            while time.perf_counter() - start < options['duration']:
+                if options['journeys'] is not None and started >= options['journeys']:
+                    break
+                if options['rate'] > 0:
+                    next_arrival += rng.expovariate(options['rate'])
+                    time.sleep(max(0.0, next_arrival - time.perf_counter()))
+                if not slots.acquire(blocking=False):
+                    # Every slot is busy: the arrival waits, so the rate achieved falls below the one asked for.
+                    delayed += 1
+                    slots.acquire()
+                executor.submit(run_journey, accounts[started % len(accounts)], rng.random())
+                started += 1
+        elapsed = time.perf_counter() - start
+        if gateway:
+            gateway.shutdown()
+
+        report = self.report(recorder, elapsed, started, delayed, options)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+
+    def report(self, recorder, elapsed, started, delayed, options):
+        steps = {step: stats.summary() for step, stats in recorder.steps.items()
+                 if stats.latencies or stats.skipped}
+        requests_made = sum(step['requests'] for step in steps.values())
+        report = {
+            'base_url': options['base_url'],
+            'concurrency': options['concurrency'],
+            'rate': options['rate'],
+            'elapsed_s': round(elapsed, 2),
+            'journeys_started': started,
+            'journeys_delayed': delayed,
+            'journeys': dict(recorder.journeys),
+            'journeys_per_s': round(recorder.journeys['completed'] / elapsed, 2),
+            'requests_per_s': round(requests_made / elapsed, 2),
+            'steps': steps,
+        }
+
+        self.stdout.write(
+            f"\n{started} journeys in {elapsed:.1f}s ({delayed} waited for a free slot): "
+            + ', '.join(f'{count} {outcome}' for outcome, count in recorder.journeys.items())
+        )
+        self.stdout.write(f"{report['journeys_per_s']} completed journeys/s, {report['requests_per_s']} requests/s\n")
+        self.stdout.write(f"{'step':12} {'reqs':>6} {'errors':>7} {'skipped':>7} {'mean':>8} {'p50':>8} "
+                          f"{'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+        for step, summary in steps.items():
+            if not summary['requests']:
+                self.stdout.write(f"{step:12} {0:6} {0:7} {summary['skipped']:7}")
+                continue
+            line = (f"{step:12} {summary['requests']:6} {summary['errors']:7} {summary['skipped']:7} "
+                    f"{summary['mean_ms']:8.1f} {summary['p50_ms']:8.1f} {summary['p95_ms']:8.1f} "
+                    f"{summary['p99_ms']:8.1f} {summary['max_ms']:8.1f}")
+            self.stdout.write(self.style.ERROR(line) if summary['errors'] else line)
+
+        self.stdout.write("\nLatency histogram (requests per bucket)")
+        labels = [f'<={bound}ms' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}ms']
+        for step, summary in steps.items():
+            if summary['requests']:
+                self.stdout.write(f"{step:12} " + '  '.join(
+                    f"{label} {summary['histogram'][label]}" for label in labels if label in summary['histogram']
+                ))
+        errors = [(step, kind, count) for step, summary in steps.items()
+                  for kind, count in summary['errors_by_kind'].items()]
+        if errors:
+            self.stdout.write("\nErrors")
+            for step, kind, count in errors:
+                self.stdout.write(f"{step:12} {kind:>20} x{count}")
+        return report
@@ -0,0 +1,153 @@
+"""
+Where a cold start spends its time: each startup phase, and the imports charged to each installed app.
+
+    python manage.py startup_profile
+    python manage.py startup_profile Zentoria.settings Zentoria.settings_api --repeat 5
+
+Each settings module is started in a fresh interpreter with ``-X importtime``, the way a serverless function
+starts: import the settings, populate the app registry, build the WSGI handler (middleware) and load the URLconf
+(every view module). A module's import time is charged to the nearest installed app on its import chain, so a
+library counts against the app that imported it first, e.g. numpy against ``Products``.
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+PHASES = ['settings', 'apps', 'middleware', 'urls']
+
+CHILD = """
+import json, os, sys, time
+os.environ['DJANGO_SETTINGS_MODULE'] = sys.argv[1]
+phases, last = {}, time.perf_counter()
+def mark(name):
+    global last
+    now = time.perf_counter()
+    phases[name], last = (now - last) * 1000, now
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+mark('settings')
+django.setup()
+mark('apps')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+mark('middleware')
+from django.urls import get_resolver
+get_resolver().url_patterns
+mark('urls')
+print(json.dumps({'phases': phases, 'apps': list(settings.INSTALLED_APPS), 'urlconf': settings.ROOT_URLCONF}))
+"""
+
+_import_line = re.compile(r'import time:\s+(\d+) \|\s+\d+ \|( *)(\S+)')
+
+
+def parse_importtime(output):
+    """
+    ``[(module, self_ms, depth)]`` in the order the imports started, from ``-X importtime`` output.
+    """
+    imports = []
+    for line in output.splitlines():
+        match = _import_line.match(line)
+        if match:
+            imports.append((match.group(3), int(match.group(1)) / 1000, len(match.group(2)) // 2))
+    # The interpreter reports an import when it finishes, so parents come after their children.
+    return imports[::-1]
+
+
+def owner_of(module, owners):
+    for owner in owners:
+        if module == owner or module.startswith(owner + '.'):
+            return owner
+    return None
+
+
+def charge_to_apps(imports, apps):
+    """
+    ``{app: Counter({top-level package: ms})}``; imports outside every app are charged to ``''``.
+    """
+    # Longest first, so django.contrib.admin wins over a plain django prefix.
+    owners = sorted(apps, key=len, reverse=True)
+    charged = defaultdict(Counter)
+    stack = []
+    for module, self_ms, depth in imports:
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        owner = owner_of(module, owners) or (stack[-1][1] if stack else '')
+        stack.append((depth, owner))
+        charged[owner][module.split('.')[0]] += self_ms
+    return charged
+
+
+def profile(settings_module):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, settings_module],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode:
+        raise RuntimeError(f"{settings_module} failed to start:\n{result.stderr[-2000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    # The settings package and the URLconf's package count as apps too.
+    apps = set(report['apps']) | {settings_module.split('.')[0], report['urlconf'].split('.')[0]}
+    report['wall_ms'] = wall_ms
+    report['charged'] = charge_to_apps(parse_importtime(result.stderr), apps)
+    return report
+
+
+class Command(BaseCommand):
+    help = "Report cold-start time per startup phase and per installed app, for one or more settings modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument('settings_modules', nargs='*',
+                            help="Settings modules to profile (default: the current DJANGO_SETTINGS_MODULE).")
+        parser.add_argument('--repeat', type=int, default=3, help="Starts per module; the median one is shown.")
+        parser.add_argument('--limit', type=int, default=15, help="Apps listed per module.")
+        parser.add_argument('--json', dest='output', help="Also write the reports to this JSON file.")
+
+    def handle(self, *args, **options):
+        modules = options['settings_modules'] or [os.environ['DJANGO_SETTINGS_MODULE']]
+        reports = {}
+        for module in modules:
+            runs = sorted((profile(module) for _ in range(options['repeat'])), key=lambda run: run['wall_ms'])
+            reports[module] = report = runs[len(runs) // 2]
+            report['wall_ms_runs'] = [round(run['wall_ms'], 1) for run in runs]
+            self.show(module, report, options['limit'])
+
+        if len(reports) > 1:
+            base, *others = modules
+            for module in others:
+                saved = reports[base]['wall_ms'] - reports[module]['wall_ms']
+                self.stdout.write(self.style.SUCCESS(
+                    f"{module}: {saved:.0f} ms faster to start than {base} "
+                    f"(median of {options['repeat']}: {statistics.median(reports[base]['wall_ms_runs']):.0f} -> "
+                    f"{statistics.median(reports[module]['wall_ms_runs']):.0f} ms)"
+                ))
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(reports, file, indent=2)
+
+    def show(self, module, report, limit):
+        phases = report['phases']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{module}: {sum(phases.values()):.0f} ms to a loaded URLconf, {report['wall_ms']:.0f} ms wall "
+            f"including the interpreter"
+        ))
+        for phase in PHASES:
+            self.stdout.write(f"  {phase:12} {phases[phase]:8.1f} ms")
+
+        totals = sorted(((sum(packages.values()), app) for app, packages in report['charged'].items()), reverse=True)
+        self.stdout.write(f"  imports by app ({sum(total for total, _ in totals):.0f} ms)")
+        for total, app in totals[:limit]:
+            heaviest = ', '.join(f'{package} {ms:.0f}' for package, ms in report['charged'][app].most_common(4))
+            self.stdout.write(f"    {app or '(no app)':32} {total:8.1f} ms  {heaviest}")
+        self.stdout.write('')
@@ -1,11 +1,13 @@
 import uuid
-import requests
-from rest_framework.response import Response
+from django.conf import settings
 from secret_keys import FLUTTERWAVE_SECRET_KEY
+from Zentoria.http import http_client
 
 
-def initiate_payment(amount, email, redirect_url):
-    base_url = "https://api.flutterwave.com/v3/payments"
+async def initiate_payment(amount, email, redirect_url):
+    import httpx
+
+    base_url = f"{settings.FLUTTERWAVE_API_URL}/payments"
     headers = {
         'Authorization': f'Bearer {FLUTTERWAVE_SECRET_KEY}',
     }
@@ -27,14 +29,14 @@ def initiate_payment(amount, email, redirect_url):
         }
     }
     try:
-        response = requests.post(base_url, headers=headers, json=data)
+        async with http_client() as client:
+            response = await client.post(base_url, headers=headers, json=data)
 
         if response.status_code == 200:
-            response_data = response.json()
-            return Response(response_data)
+            return response.json()
         else:
             print(f"The payment didn't go through. Status code: {response.status_code}")
-            return Response({"error": f"The payment didn't go through. Status code: {response.status_code}"}, status=500)
-    except requests.exceptions.RequestException as err:
+            return {"error": f"The payment didn't go through. Status code: {response.status_code}"}
+    except httpx.HTTPError as err:
         print(f"The payment didn't go through. Error: {err}")
-        return Response({"error": str(err)}, status=500)
+        return {"error": str(err)}
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from Zentoria.serializers import DynamicFieldsMixin
 from .models import Order, \
     Cart, OrderItem, \
     CartItem, Payment, \
@@ -34,22 +35,27 @@ class CartSerializer(serializers.ModelSerializer):
         return validate_total_quantity(value)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
-        model = Order
-        fields = ['id', 'user', 'created_at', 'shipped', 'payment']
+        model = OrderItem
+        fields = ['id', 'order', 'product', 'quantity']
 
 
-class OrderCreateSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    item_details = OrderItemSerializer(source='orderitem_set', many=True, read_only=True)
+
+    # Items are only embedded with ?expand=item_details (or where a view always expands them).
+    expandable_fields = ('item_details',)
+
     class Meta:
         model = Order
-        fields = ['user']
+        fields = ['id', 'user', 'created_at', 'shipped', 'payment', 'item_details']
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderCreateSerializer(serializers.ModelSerializer):
     class Meta:
-        model = OrderItem
-        fields = ['id', 'order', 'product', 'quantity']
+        model = Order
+        fields = ['user']
 
 
 class AddressSerializer(serializers.ModelSerializer):
@@ -1,3 +1,311 @@
-from django.test import TestCase
+import asyncio
+import shutil
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+
+from accounts.models import User
+from Products.models import Category, Product
+from Zentoria.admin import EstimatedCountPaginator
+from Zentoria.middleware import (
+    QueryInstrumentationMiddleware, QueryRecorder, ReplicaRoutingMiddleware, StaticFilesMiddleware,
+)
+from Zentoria.routers import ReplicaRouter
+from .models import Cart, CartItem, Order, OrderItem, Payment
+
+router = ReplicaRouter()
+
+
+def order_history(request):
+    # None leaves the choice to Django, which reads from the primary.
+    return HttpResponse(router.db_for_read(Order) or 'default')
+
+
+order_history.read_replica = True
+
+
+def checkout(request):
+    return HttpResponse(router.db_for_write(Order))
+
+
+@override_settings(REPLICA_DATABASES=['replica_1'], REPLICA_STICKY_SECONDS=5)
+class ReplicaStickyWindowTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method, view, cookies=None, **headers):
+        request = getattr(self.factory, method)('/', headers=headers)
+        request.COOKIES.update(cookies or {})
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request)
+
+    def test_reads_go_to_a_replica(self):
+        response = self.request('get', order_history)
+
+        self.assertEqual(response.content, b'replica_1')
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_write_pins_the_client_to_the_primary_for_the_window(self):
+        response = self.request('post', checkout)
+        cookies = {settings.REPLICA_STICKY_COOKIE: response.cookies[settings.REPLICA_STICKY_COOKIE].value}
+        self.assertEqual(response.cookies[settings.REPLICA_STICKY_COOKIE]['max-age'], 5)
+
+        self.assertEqual(self.request('get', order_history, cookies).content, b'default')
+
+        later = float(cookies[settings.REPLICA_STICKY_COOKIE]) + 1
+        with mock.patch('Zentoria.middleware.time.time', return_value=later):
+            self.assertEqual(self.request('get', order_history, cookies).content, b'replica_1')
+
+    def test_safe_request_that_writes_starts_the_window(self):
+        response = self.request('get', checkout)
+
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_token_clients_without_cookies_are_pinned_by_token(self):
+        self.request('post', checkout, Authorization='Bearer first')
+
+        self.assertEqual(self.request('get', order_history, Authorization='Bearer first').content, b'default')
+        self.assertEqual(self.request('get', order_history, Authorization='Bearer second').content, b'replica_1')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_window_without_replicas(self):
+        response = self.request('post', checkout)
+
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+
+class OrderAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='secret', username='admin')
+        self.client.force_login(self.admin)
+        category = Category.objects.create(name='Clothing')
+        self.shirt, self.socks = [
+            Product.objects.create(name=name, description='', price=price, quantity=10, category=category,
+                                   image=f'product_images/{name}.jpg')
+            for name, price in [('shirt', Decimal('12.50')), ('socks', Decimal('3.20'))]
+        ]
+        self.unpaid = Order.objects.create(user=self.admin)
+        self.paid = []
+        for amount in [20, 10]:
+            order = Order.objects.create(user=self.admin)
+            order.payment = Payment.objects.create(order=order, user=self.admin, amount=amount,
+                                                   payment_method=Payment.FLUTTERWAVE, transaction_id='tx')
+            order.save()
+            self.paid.append(order)
+        OrderItem.objects.create(order=self.unpaid, product=self.shirt, quantity=2)
+        OrderItem.objects.create(order=self.unpaid, product=self.socks, quantity=3)
+        OrderItem.objects.create(order=self.paid[0], product=self.socks, quantity=1)
+
+    def changelist(self, model='order', **params):
+        response = self.client.get(reverse(f'admin:store_{model}_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_sort_by_paid_groups_unpaid_and_paid_orders(self):
+        column = self.changelist().list_display.index('is_paid')
+
+        self.assertEqual([order.paid for order in self.changelist(o=column).result_list], [False, True, True])
+        self.assertEqual([order.paid for order in self.changelist(o=f'-{column}').result_list], [True, True, False])
+
+    def test_order_totals_and_paid_flag_match_the_model(self):
+        cl = self.changelist()
+        rows = {order.pk: order for order in cl.result_list}
+
+        self.assertEqual(cl.model_admin.calculate_order_total(rows[self.unpaid.pk]), Decimal('34.60'))
+        self.assertEqual(cl.model_admin.calculate_order_total(rows[self.paid[0].pk]), Decimal('3.20'))
+        self.assertEqual(cl.model_admin.calculate_order_total(rows[self.paid[1].pk]), 0)
+        for order in Order.objects.all():
+            self.assertEqual(cl.model_admin.calculate_order_total(rows[order.pk]), order.calculate_order_total())
+            self.assertEqual(cl.model_admin.is_paid(rows[order.pk]), order.is_paid())
+
+    def test_cart_totals_match_the_model(self):
+        full, empty = Cart.objects.create(user=self.admin), Cart.objects.create(user=self.admin)
+        CartItem.objects.create(cart=full, product=self.shirt, quantity=1)
+        CartItem.objects.create(cart=full, product=self.socks, quantity=4)
+
+        cl = self.changelist('cart')
+        rows = {cart.pk: cart for cart in cl.result_list}
+        for cart, quantity, total in [(full, 5, Decimal('25.30')), (empty, 0, 0)]:
+            self.assertEqual(cl.model_admin.total_quantity(rows[cart.pk]), quantity)
+            self.assertEqual(cl.model_admin.total_quantity(rows[cart.pk]), cart.total_quantity())
+            self.assertEqual(cl.model_admin.calculate_total(rows[cart.pk]), total)
+            self.assertEqual(cl.model_admin.calculate_total(rows[cart.pk]), cart.calculate_total())
+
+    def test_change_list_reads_totals_in_the_list_query(self):
+        with CaptureQueriesContext(connection) as before:
+            self.changelist()
+        for _ in range(5):
+            order = Order.objects.create(user=self.admin)
+            OrderItem.objects.create(order=order, product=self.shirt, quantity=1)
+
+        with self.assertNumQueries(len(before)):
+            self.changelist()
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='ada@example.com', username='ada')
+        for _ in range(3):
+            Order.objects.create(user=user)
+        Order.objects.create(user=user, shipped=True)
+        self.lookups = []
+
+    def pg_class(self, reltuples):
+        """
+        Answers the ``pg_class`` lookup with ``reltuples``, as PostgreSQL would, and runs everything else.
+        """
+        def answer(execute, sql, params, many, context):
+            if 'pg_class' in sql:
+                self.lookups.append(params)
+                return execute('SELECT %s', [reltuples], many, context)
+            return execute(sql, params, many, context)
+
+        return connection.execute_wrapper(answer)
+
+    def count(self, queryset, vendor='postgresql', reltuples=250000.0):
+        with mock.patch.object(connections['default'], 'vendor', vendor), self.pg_class(reltuples):
+            return EstimatedCountPaginator(queryset, 10).count
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_unfiltered_large_table_takes_the_planner_estimate(self):
+        self.assertEqual(self.count(Order.objects.all()), 250000)
+        self.assertEqual(self.lookups, [['"store_order"']])
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_exact_count_for_filtered_lists(self):
+        self.assertEqual(self.count(Order.objects.filter(shipped=True)), 1)
+        self.assertEqual(self.lookups, [])
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_exact_count_below_the_threshold_or_before_analyze(self):
+        for reltuples in [99999.0, -1.0]:
+            with self.subTest(reltuples=reltuples):
+                self.assertEqual(self.count(Order.objects.all(), reltuples=reltuples), 4)
+
+    def test_exact_count_on_other_databases(self):
+        for vendor in ['sqlite', 'mysql']:
+            with self.subTest(vendor=vendor):
+                self.assertEqual(self.count(Order.objects.all(), vendor=vendor), 4)
+        self.assertEqual(self.lookups, [])
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=100000)
+    def test_searched_change_list_is_counted_exactly(self):
+        admin = User.objects.create_superuser(email='admin@example.com', password='secret', username='admin')
+        self.client.force_login(admin)
+
+        with mock.patch.object(connections['default'], 'vendor', 'postgresql'), self.pg_class(250000.0):
+            unfiltered = self.client.get(reverse('admin:store_order_changelist')).context['cl']
+            searched = self.client.get(reverse('admin:store_order_changelist'), {'q': 'ada@example.com'}).context['cl']
+
+        self.assertEqual(unfiltered.result_count, 250000)
+        self.assertEqual(searched.result_count, 4)
+
+
+def order_lookups(request):
+    # One query per id, the shape of an N+1.
+    for pk in request.GET.getlist('id'):
+        Order.objects.filter(pk=pk).exists()
+    return HttpResponse()
+
+
+urlpatterns = [path('orders/', order_lookups)]
+
+
+@override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=1.0, QUERY_DUPLICATE_THRESHOLD=3)
+class QueryInstrumentationTests(TestCase):
+    def request(self, *ids):
+        request = RequestFactory().get('/', {'id': ids})
+        return QueryInstrumentationMiddleware(order_lookups)(request)
+
+    def test_server_timing_reports_the_queries(self):
+        response = self.request(1, 2)
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", total;dur=[\d.]+$')
+
+    @override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_recorded(self):
+        with mock.patch('Zentoria.middleware.QueryRecorder') as recorder:
+            response = self.request(1, 2)
+
+        self.assertFalse(recorder.called)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_repeated_statement_is_logged_as_a_possible_n_plus_one(self):
+        with self.assertLogs('Zentoria.middleware', 'INFO') as logs:
+            self.request(1, 2)
+            self.request(1, 2, 3)
+
+        self.assertEqual([record.levelname for record in logs.records], ['INFO', 'WARNING'])
+        self.assertIn('possible N+1', logs.output[1])
+        self.assertIn('"count": 3', logs.output[1])
+
+    @override_settings(ROOT_URLCONF='store.tests')
+    async def test_asgi_requests_record_their_own_queries(self):
+        # Under ASGI the sync view's queries run in a thread other than the middleware's.
+        one, three = await asyncio.gather(
+            self.async_client.get('/orders/', {'id': [1]}),
+            self.async_client.get('/orders/', {'id': [1, 2, 3]}),
+        )
+
+        self.assertIn('desc="1 queries"', one['Server-Timing'])
+        self.assertIn('desc="3 queries"', three['Server-Timing'])
+
+    def test_repeated_placeholders_are_folded(self):
+        recorder = QueryRecorder()
+        for sql in [
+            'SELECT * FROM t WHERE id IN (%s, %s)',
+            'SELECT * FROM t WHERE id IN (%s, %s, %s, %s)',
+            'INSERT INTO t VALUES (%s, %s), (%s, %s)',
+            'INSERT INTO t VALUES (%s, %s), (%s, %s), (%s, %s)',
+        ]:
+            recorder(lambda *args: None, sql, (), False, {})
+
+        self.assertEqual(recorder.fingerprints, {
+            'SELECT * FROM t WHERE id IN (%s, ...)': 2,
+            'INSERT INTO t VALUES (%s, %s), ...': 2,
+        })
+        self.assertEqual(recorder.repeated(2), [('SELECT * FROM t WHERE id IN (%s, ...)', 2),
+                                                ('INSERT INTO t VALUES (%s, %s), ...', 2)])
+
+
+class StaticFilesMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        Path(static_root, 'app.css').write_text('body{}')
+        settings_override = self.settings(STATIC_ROOT=static_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.factory = RequestFactory()
+
+    def test_serves_static_files_and_passes_on_the_rest(self):
+        middleware = StaticFilesMiddleware(lambda request: HttpResponse('view'))
+
+        response = middleware(self.factory.get('/static/app.css'))
+        self.assertEqual(b''.join(response.streaming_content), b'body{}')
+        self.assertEqual(middleware(self.factory.get('/static/missing.css')).content, b'view')
+
+    async def test_async_chain(self):
+        async def view(request):
+            return HttpResponse('view')
+
+        middleware = StaticFilesMiddleware(view)
+
+        response = await middleware(self.factory.get('/static/app.css'))
+        self.assertEqual(b''.join(response.streaming_content), b'body{}')
+        self.assertEqual((await middleware(self.factory.get('/products/'))).content, b'view')
@@ -1,4 +1,7 @@
+from asgiref.sync import sync_to_async
 from utils import custom_response
+from Zentoria.views import AsyncAPIView
+from Zentoria.serializers import requested_fields
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, BasePermission
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -243,6 +246,7 @@ class CartItemView(APIView):
 
 class OrderListView(APIView):
     permission_classes = [IsAuthenticated | IsAdminUser]
+    read_replica = True
     serializer_class = OrderSerializer
 
     class OrderListPagination(PageNumberPagination):
@@ -267,13 +271,15 @@ class OrderListView(APIView):
                 orders = Order.objects.filter(user=request.user)
             else:
                 orders = Order.objects.all()
+            fields, expand = requested_fields(request)
+            orders = OrderSerializer.optimize(orders.order_by('-created_at', '-id'), fields, expand)
 
             page = self.paginate_queryset(orders)
             if page is not None:
-                serializer = OrderSerializer(page, many=True)
+                serializer = OrderSerializer(page, many=True, fields=fields, expand=expand)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = OrderSerializer(orders, many=True)
+            serializer = OrderSerializer(orders, many=True, fields=fields, expand=expand)
             return custom_response(serializer.data, status.HTTP_200_OK, 'success')
 
         except Order.DoesNotExist:
@@ -300,13 +306,10 @@ class OrderListView(APIView):
                 orders = Order.objects.filter(status=status_filter)
             else:
                 orders = Order.objects.all()
-            serializer = OrderSerializer(orders, many=True)
-
-            for order_data in serializer.data:
-                order_id = order_data['id']
-                order_items = OrderItem.objects.filter(order=order_id)
-                order_item_serializer = OrderItemSerializer(order_items, many=True)
-                order_data['item_details'] = order_item_serializer.data
+            fields, expand = requested_fields(request)
+            expand = [*expand, 'item_details']
+            orders = OrderSerializer.optimize(orders, fields, expand)
+            serializer = OrderSerializer(orders, many=True, fields=fields, expand=expand)
 
             return custom_response(serializer.data, "Filtered orders retrieved successfully", status.HTTP_200_OK,
                                    "success")
@@ -361,14 +364,12 @@ class OrderItemList(APIView):
 
 class OrderView(APIView):
     permission_classes = [IsAuthenticated, IsOrderOwner]
+    read_replica = True
     serializer_classes = OrderSerializer
 
     @staticmethod
     def get_order_details(order):
-        serializer = OrderSerializer(order)
-        item_details = OrderItemSerializer(order.orderitem_set.all(), many=True)
-        serializer.data["item_details"] = item_details.data
-        return serializer.data
+        return OrderSerializer(order, expand=['item_details']).data
 
     @extend_schema(
         summary="Retrieve Order",
@@ -412,11 +413,8 @@ class OrderView(APIView):
             serializer = OrderSerializer(order, data=request.data)
             if serializer.is_valid():
                 serializer.save()
-
-                item_details = OrderItemSerializer(order.orderitem_set.all(), many=True).data
-                serializer.data["item_details"] = item_details
-
-                return custom_response(serializer.data, "Order updated successfully", status.HTTP_200_OK, "success")
+                return custom_response(self.get_order_details(order), "Order updated successfully",
+                                       status.HTTP_200_OK, "success")
             return custom_response(serializer.errors, "Invalid data", status.HTTP_400_BAD_REQUEST, "error")
         except Order.DoesNotExist:
             return custom_response({}, "Order not found", status.HTTP_404_NOT_FOUND, "error")
@@ -454,6 +452,7 @@ class OrderView(APIView):
 
 class OrderItemView(APIView):
     permission_classes = [IsAuthenticated, IsOrderOwner]
+    read_replica = True
     serializer_classes = OrderItemSerializer
 
     @extend_schema(
@@ -517,7 +516,7 @@ class OrderItemView(APIView):
             return custom_response(data, "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, "error")
 
 
-class PaymentView(APIView):
+class PaymentView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = PaymentSerializer
 
@@ -530,20 +529,21 @@ class PaymentView(APIView):
             status.HTTP_500_INTERNAL_SERVER_ERROR: OpenApiResponse(description="Internal server error"),
         }
     )
-    def post(self, request):
+    async def post(self, request):
         try:
-            serializer = PaymentSerializer(data={**request.data, 'user': request.user.id})
-            if serializer.is_valid():
+            serializer = PaymentSerializer(data={**request.data, 'user': request.user.id}, context={'request': request})
+            if await sync_to_async(serializer.is_valid)():
                 order_id = serializer.validated_data['order'].id
-                order = Order.objects.get(id=order_id, user=request.user)
-                serializer.save(order=order)
+                order = await Order.objects.aget(id=order_id, user=request.user)
+                await sync_to_async(serializer.save)(order=order)
 
                 amount = serializer.validated_data['amount']
                 email = serializer.validated_data['user'].email
                 redirect_url = "https://your-redirect-url.com"
-                flutterwave_response = initiate_payment(amount, email, redirect_url)
+                # The gateway call is awaited on the event loop; under ASGI it holds no worker while it waits.
+                flutterwave_response = await initiate_payment(amount, email, redirect_url)
 
-                if 'status' in flutterwave_response and flutterwave_response['status'] == 'success':
+                if flutterwave_response.get('status') == 'success':
                     return custom_response(serializer.data, "Payment created successfully",
                                            status.HTTP_201_CREATED, "success")
                 else:
@@ -813,6 +813,7 @@ class CheckoutView(APIView):
 
 class CouponCodeView(APIView):
     permission_classes = [IsAuthenticated]
+    read_replica = True
 
     @extend_schema(
         summary="Retrieve Available Coupons",
@@ -1,3 +1,6 @@
+import json
+
+from django.http import HttpResponse
 from rest_framework.response import Response
 
 
@@ -19,3 +22,15 @@ def custom_response(data=None, message=None, status_code=None, status_text=None,
         response_data["tokens"] = tokens
 
     return Response(response_data, status=status_code)
+
+
+def custom_json_response(data_json, message=None, status_code=None, status_text=None):
+    """
+    ``custom_response`` for a ``data`` payload that is already encoded JSON, spliced into the envelope as is.
+    """
+    status_code = int(status_code)
+    body = f'{{"status_code":{status_code},"message":{json.dumps(message)},"data":{data_json}'
+    if status_text is not None:
+        body += f',"status":{json.dumps(status_text)}'
+    return HttpResponse(body + '}', status=status_code, content_type='application/json')
+